@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark tools/spotify_control.py against the local Spotify mock
+
+Scenarios (end-to-end latency + Spotify API calls per endpoint):
+    playlist    create_playlist with 20 songs (create_and_populate_playlist)
+    queue       add_to_queue with 10 songs while something is playing
+    queue_idle  add_to_queue with 10 songs on an idle player
+    batch       10-op execute_batch mixing playlist, search and playback ops
+
+Songs are sampled from the mock's seeded catalog, so runs with the same --seed
+are comparable. --compare-keepalive repeats each scenario with a fresh
+connection per request (the old urllib behaviour).
+
+Usage:
+    python scripts/bench_spotify.py --latency-ms 40 --connect-ms 120 --runs 3
+    python scripts/bench_spotify.py --scenario batch --jitter-ms 15 --rate-limit-every 30
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from spotify_mock_server import SpotifyMockServer
+
+TOOL_PATH = Path(__file__).resolve().parent.parent / "tools" / "spotify_control.py"
+
+def load_tool(base_url, cache_dir):
+    """Import spotify_control with its endpoints pointed at the mock"""
+    os.environ.update({
+        "SPOTIFY_API_BASE": f"{base_url}/v1",
+        "SPOTIFY_TOKEN_URL": f"{base_url}/api/token",
+        "SPOTIFY_CLIENT_ID": "bench-client",
+        "SPOTIFY_CLIENT_SECRET": "bench-secret",
+        "SPOTIFY_REFRESH_TOKEN": "bench-refresh",
+        "SPOTIFY_CACHE_DIR": cache_dir,
+    })
+    spec = importlib.util.spec_from_file_location("spotify_control_bench", TOOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def disable_keepalive(tool):
+    """Drop every pooled connection after each request - one connection per call"""
+    original = tool._http_request
+
+    def one_shot(*args, **kwargs):
+        try:
+            return original(*args, **kwargs)
+        finally:
+            for conn in tool._connection_pool.__dict__.get("connections", {}).values():
+                conn.close()
+            tool._connection_pool.__dict__["connections"] = {}
+
+    tool._http_request = one_shot
+
+
+def reset_caches(tool):
+    """Start a run cold: drop on-disk caches (keeping the token) and in-memory state"""
+    for name in os.listdir(tool.SPOTIFY_CACHE_DIR):
+        path = os.path.join(tool.SPOTIFY_CACHE_DIR, name)
+        if name == os.path.basename(tool.ETAG_CACHE_DIR):
+            shutil.rmtree(path)  # Stored playlist bodies would turn cold reads into 304s
+        elif (name.endswith(".json") and name != "token.json") or name.startswith(("spotify.db", "mood_index")):
+            os.remove(path)
+    tool._search_cache.update(entries=None, dirty=False, hits=0, misses=0, counted=set())
+
+
+def _check(result, label):
+    if result.startswith("❌"):
+        raise RuntimeError(f"{label} failed: {result}")
+    return result
+
+
+def scenario_playlist(tool, server, run, songs):
+    """Measured call: create a 20-song playlist"""
+    return lambda: tool.spotify_control(
+        action="create_playlist",
+        playlist_name=f"Bench {run}",
+        songs="; ".join(songs[:20]),
+    )
+
+
+def scenario_queue(tool, server, run, songs):
+    _check(tool.spotify_control(action="play", query=songs[-1]), "queue setup")
+    return lambda: tool.spotify_control(action="add_to_queue", query="; ".join(songs[:10]))
+
+
+def scenario_queue_idle(tool, server, run, songs):
+    return lambda: tool.spotify_control(action="add_to_queue", query="; ".join(songs[:10]))
+
+
+def scenario_batch(tool, server, run, songs):
+    name = f"Bench Mix {run}"
+    operations = [
+        {"action": "create_playlist", "playlist_name": name, "songs": "; ".join(songs[:8])},
+        {"action": "create_playlist", "playlist_name": f"{name} B", "songs": "; ".join(songs[8:14])},
+        {"action": "play", "query": name, "content_type": "playlist"},
+        {"action": "add_to_queue", "query": "; ".join(songs[14:18])},
+        {"action": "search", "query": songs[18], "limit": 5},
+        {"action": "my_playlists"},
+        {"action": "now_playing"},
+        {"action": "next"},
+        {"action": "find_playlist", "query": name},
+        {"action": "pause"},
+    ]
+    return lambda: tool.spotify_control(action="execute_batch", operations=operations)
+
+
+SCENARIOS = {
+    "playlist": scenario_playlist,
+    "queue": scenario_queue,
+    "queue_idle": scenario_queue_idle,
+    "batch": scenario_batch,
+}
+
+
+def run_scenario(tool, server, name, runs, warm=False, seed=0):
+    """Run a scenario `runs` times; returns (timings, stats of the last run)"""
+    timings = []
+    stats = None
+    songs = server.state.sample_queries(20, seed)
+    for i in range(runs):
+        if not warm:
+            reset_caches(tool)
+        server.state.reset_library()
+        call = SCENARIOS[name](tool, server, i, songs)
+        server.state.reset_stats()
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+        _check(result, name)
+        stats = server.state.stats()
+    return timings, stats
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(timings, stats):
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 1),
+        "p95_ms": round(_percentile(timings, 95) * 1000, 1),
+        "min_ms": round(min(timings) * 1000, 1),
+        "max_ms": round(max(timings) * 1000, 1),
+        "api_calls": stats["requests"],
+        "rate_limited": stats["rate_limited"],
+        "connections": stats["connections"],
+        "by_endpoint": stats["by_endpoint"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spotify_control against a local mock")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS) + ["all"], default="all")
+    parser.add_argument("--latency-ms", type=int, default=40, help="Mock per-request latency")
+    parser.add_argument("--jitter-ms", type=int, default=0, help="Mock latency spread (+/-)")
+    parser.add_argument("--connect-ms", type=int, default=120, help="Mock per-connection latency (handshake)")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Mock answers every Nth API call with 429")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of API calls answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sent with injected 429s")
+    parser.add_argument("--seed", type=int, default=0, help="Catalog / song sample seed")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warm", action="store_true", help="Keep the search cache between runs")
+    parser.add_argument("--compare-keepalive", action="store_true",
+                        help="Also run with a fresh connection per request")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    names = sorted(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    modes = [("keep-alive pool", True)]
+    if args.compare_keepalive:
+        modes.insert(0, ("per-request connections", False))
+
+    results = {}
+    with SpotifyMockServer(
+        latency_ms=args.latency_ms, connect_ms=args.connect_ms, jitter_ms=args.jitter_ms,
+        seed=args.seed, rate_limit_every=args.rate_limit_every,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+    ) as server, tempfile.TemporaryDirectory() as cache_dir:
+        if not args.json:
+            print(f"Mock: {server.base_url}  latency={args.latency_ms}±{args.jitter_ms}ms  "
+                  f"connect={args.connect_ms}ms  429 every={args.rate_limit_every or '-'} "
+                  f"rate={args.rate_limit_rate}  seed={args.seed}  runs={args.runs}\n")
+
+        for label, keepalive in modes:
+            tool = load_tool(server.base_url, cache_dir)
+            reset_caches(tool)
+            if not keepalive:
+                disable_keepalive(tool)
+            tool.get_access_token()  # Token refresh is not part of the measured flows
+
+            for name in names:
+                timings, stats = run_scenario(tool, server, name, args.runs, args.warm, args.seed)
+                summary = _summary(timings, stats)
+                results.setdefault(label, {})[name] = summary
+                if args.json:
+                    continue
+                print(f"{name} ({label}):")
+                print(f"  median {summary['median_ms']:.0f} ms  p95 {summary['p95_ms']:.0f} ms  "
+                      f"(min {summary['min_ms']:.0f} / max {summary['max_ms']:.0f})")
+                print(f"  api calls {summary['api_calls']}  429s {summary['rate_limited']}  "
+                      f"new connections {summary['connections']}")
+                for endpoint, count in sorted(summary["by_endpoint"].items()):
+                    print(f"    {count:4d}  {endpoint}")
+                print()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+#!/usr/bin/env python3
+"""
+Local Spotify Web API mock for benchmarking tools/spotify_control.py
+
+Serves the token endpoint and the Web API endpoints spotify_control uses
+(/me, /search, /tracks, /artists, /audio-features, /me/tracks, /me/playlists, /playlists/{id}/tracks,
+/me/player/* including recently-played) over
+HTTP/1.1 keep-alive, and counts requests + TCP connections so a benchmark can
+show how many calls and connections (= TLS handshakes in production) a flow
+needed.
+
+Search runs against a seeded, deterministic catalog (same --seed = same
+tracks and IDs); unknown queries fall back to a synthesized track so flows
+never fail on lookups. Latency (with jitter) and 429 responses with
+Retry-After can be injected to exercise the tool's back-off. Playlist reads
+carry ETags and answer If-None-Match with 304. --audio-features-forbidden
+answers /audio-features with 403, like Spotify does for newer apps.
+
+Usage:
+    python scripts/spotify_mock_server.py --port 8765 --latency-ms 40 --connect-ms 120
+    python scripts/spotify_mock_server.py --latency-ms 40 --jitter-ms 20 --rate-limit-every 25 --seed 7
+
+    SPOTIFY_API_BASE=http://127.0.0.1:8765/v1 \\
+    SPOTIFY_TOKEN_URL=http://127.0.0.1:8765/api/token \\
+    SPOTIFY_CLIENT_ID=x SPOTIFY_CLIENT_SECRET=x SPOTIFY_REFRESH_TOKEN=x \\
+    python -c "from tools.spotify_control import spotify_control; print(spotify_control('search', query='abba'))"
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _audio_features(track_id):
+    """Deterministic fake audio features for a track ID"""
+    digest = hashlib.sha1(f"features:{track_id}".encode("utf-8")).digest()
+    unit = [b / 255 for b in digest]
+    return {
+        "id": track_id,
+        "energy": unit[0],
+        "valence": unit[1],
+        "danceability": unit[2],
+        "acousticness": unit[3],
+        "instrumentalness": unit[4] ** 3,  # Mostly vocal, like real libraries
+        "tempo": 60 + unit[5] * 130,
+    }
+
+
+_GENRES = (
+    "indie rock", "dance pop", "deep house", "melodic techno", "acoustic folk", "singer-songwriter",
+    "uk hip hop", "neo soul", "contemporary jazz", "ambient", "modern classical", "pop punk",
+    "alternative metal", "lo-fi beats", "latin pop", "roots reggae", "disco", "emo",
+)
+
+
+def _artist_id(name):
+    return hashlib.sha1(f"artist:{name}".encode("utf-8")).hexdigest()[:22]
+
+
+def _artist_genres(artist_id):
+    """Deterministic 0-3 genres for an artist ID (some artists have none, like on Spotify)"""
+    digest = hashlib.sha1(f"genres:{artist_id}".encode("utf-8")).digest()
+    return sorted({_GENRES[b % len(_GENRES)] for b in digest[1:1 + digest[0] % 4]})
+
+
+def _track_for_query(query):
+    """Deterministic fake track for a search query"""
+    track_id = hashlib.sha1(query.lower().encode("utf-8")).hexdigest()[:22]
+    return {
+        "id": track_id,
+        "uri": f"spotify:track:{track_id}",
+        "name": query.title(),
+        "artists": [{"name": "Mock Artist"}],
+        "album": {"name": "Mock Album"},
+        "duration_ms": 200000,
+    }
+
+
+_WORDS = (
+    "midnight summer river neon golden broken electric silver wild paper "
+    "ocean city heart fire dream lonely velvet desert echo thunder glass "
+    "honey winter satellite crystal shadow running dancing falling burning "
+    "blue red black sugar radio highway morning stranger forever paradise"
+).split()
+
+
+def _build_catalog(seed, size):
+    """Seeded fake catalog: `size` tracks over size // 10 artists, stable per seed"""
+    rng = random.Random(seed)
+    artists = [
+        " ".join(rng.choice(_WORDS).title() for _ in range(2)) for _ in range(max(1, size // 10))
+    ]
+    tracks = []
+    for i in range(size):
+        track_id = hashlib.sha1(f"{seed}:{i}".encode("utf-8")).hexdigest()[:22]
+        artist = rng.choice(artists)
+        tracks.append({
+            "id": track_id,
+            "uri": f"spotify:track:{track_id}",
+            "name": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 4))).title(),
+            "artists": [{"name": artist, "id": _artist_id(artist)}],
+            "album": {"name": f"{rng.choice(_WORDS).title()} {rng.choice(('Sessions', 'Nights', 'Tapes', 'Live'))}"},
+            "duration_ms": rng.randint(120000, 360000),
+        })
+    return tracks
+
+
+class _MockState:
+    """Counters, catalog + in-memory playlists shared by all handler threads"""
+
+    def __init__(self, latency_ms=0, connect_ms=0, jitter_ms=0, seed=0, catalog_size=2000,
+                 rate_limit_every=0, rate_limit_rate=0.0, retry_after=1, history_size=120,
+                 library_size=1000, audio_features_forbidden=False):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.connect_latency = connect_ms / 1000.0
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.audio_features_forbidden = audio_features_forbidden  # Like apps registered after Nov 2024
+        self.rng = random.Random(seed)
+        self.base_url = ""  # Set by SpotifyMockServer (for "next" links)
+        self.lock = threading.Lock()
+        self.catalog = _build_catalog(seed, catalog_size)
+        self.tracks_by_id = {t["id"]: t for t in self.catalog}
+        self.artists_by_id = {a["id"]: a["name"] for t in self.catalog for a in t["artists"]}
+        self.index = {}
+        for position, track in enumerate(self.catalog):
+            words = f"{track['name']} {track['artists'][0]['name']}".lower().split()
+            for word in set(words):
+                self.index.setdefault(word, []).append(position)
+        self.playlists = {}
+        # Listening history: history_size seeded plays spread over the last 7 days
+        now_ms = int(time.time() * 1000)
+        self.history = sorted(
+            (now_ms - self.rng.randint(60_000, 7 * 86_400_000), self.rng.choice(self.catalog)["uri"])
+            for _ in range(history_size)
+        )
+        # Saved tracks, newest first, saved one per ~hour going back from now
+        self.saved = [
+            (now_ms - i * 3_600_000, t["uri"])
+            for i, t in enumerate(self.rng.sample(self.catalog, min(library_size, len(self.catalog))))
+        ]
+        self.devices = [
+            {"id": "dev-desktop-0001", "name": "Desktop", "type": "Computer", "is_active": False, "is_restricted": False},
+            {"id": "dev-phone-000002", "name": "Phone", "type": "Smartphone", "is_active": False, "is_restricted": False},
+        ]
+        self.queue = []
+        self.playback = None  # {"uri", "is_playing", "progress_ms"} once something plays
+        self.reset_stats()
+
+    def reset_library(self):
+        """Forget playlists, queue and playback (catalog and devices stay)"""
+        with self.lock:
+            self.playlists = {}
+            self.queue = []
+            self.playback = None
+            for device in self.devices:
+                device["is_active"] = False
+
+    def search(self, q, limit, offset=0):
+        """Catalog tracks containing every word of q, in catalog order"""
+        words = q.lower().split()
+        if not words:
+            return []
+        postings = [set(self.index.get(word, ())) for word in words]
+        hits = sorted(set.intersection(*postings))
+        return [self.catalog[i] for i in hits[offset:offset + limit]]
+
+    def save_tracks(self, uris):
+        """Like PUT /me/tracks: newly saved tracks go to the top of the library"""
+        now_ms = int(time.time() * 1000)
+        with self.lock:
+            self.saved = [(now_ms + i * 1000, uri) for i, uri in enumerate(reversed(uris))][::-1] + \
+                [s for s in self.saved if s[1] not in uris]
+
+    def record_play(self, uri):
+        """Log a started track (caller holds the lock)"""
+        if uri.startswith("spotify:track:"):
+            self.history.append((int(time.time() * 1000), uri))
+
+    def track(self, track_id):
+        return self.tracks_by_id.get(track_id) or {**_track_for_query(track_id), "id": track_id,
+                                                   "uri": f"spotify:track:{track_id}"}
+
+    def sample_queries(self, count, seed=0):
+        """`count` distinct "name artist" queries that resolve to catalog tracks"""
+        rng = random.Random(seed)
+        picks = rng.sample(self.catalog, min(count, len(self.catalog)))
+        return [f"{t['name']} {t['artists'][0]['name']}".lower() for t in picks]
+
+    def delay(self):
+        """Per-request latency, uniformly jittered by +/- jitter"""
+        if not (self.latency or self.jitter):
+            return 0.0
+        with self.lock:
+            offset = self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + offset)
+
+    def should_rate_limit(self):
+        """Every Nth API request and/or a seeded random share get a 429"""
+        with self.lock:
+            self.api_requests += 1
+            if self.rate_limit_every and self.api_requests % self.rate_limit_every == 0:
+                hit = True
+            else:
+                hit = bool(self.rate_limit_rate) and self.rng.random() < self.rate_limit_rate
+            if hit:
+                self.rate_limited += 1
+            return hit
+
+    def activate(self, device_id):
+        """Make a device active; returns False if it doesn't exist"""
+        with self.lock:
+            if not any(d["id"] == device_id for d in self.devices):
+                return False
+            for device in self.devices:
+                device["is_active"] = device["id"] == device_id
+            return True
+
+    def active_device(self):
+        with self.lock:
+            return next((d for d in self.devices if d["is_active"]), None)
+
+    def reset_stats(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+            self.api_requests = 0
+            self.rate_limited = 0
+            self.not_modified = 0
+            self.by_endpoint = {}
+
+    def count(self, method, path):
+        # Collapse IDs so stats group by endpoint shape
+        parts = ["{id}" if len(p) >= 16 and p.isalnum() else p for p in path.split("/")]
+        key = f"{method} {'/'.join(parts)}"
+        with self.lock:
+            self.requests += 1
+            self.by_endpoint[key] = self.by_endpoint.get(key, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "connections": self.connections,
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "not_modified": self.not_modified,
+                "by_endpoint": dict(self.by_endpoint),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    wbufsize = -1  # Buffer headers + body into one send (avoids Nagle/delayed-ACK stalls)
+    state = None  # Set by SpotifyMockServer
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+        if self.state.connect_latency:
+            time.sleep(self.state.connect_latency)  # Stand-in for TCP + TLS handshake
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- plumbing ---------------------------------------------------------
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload=None, extra_headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", **(extra_headers or {})}
+        path = urllib.parse.urlsplit(self.path).path
+        if status == 200 and self.command == "GET" and path.startswith(("/v1/playlists/", "/v1/me/playlists")):
+            # Playlist reads support conditional requests, like Spotify's
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                with self.state.lock:
+                    self.state.not_modified += 1
+                status, body = 304, b""
+        if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    @staticmethod
+    def _page(items, query, max_limit):
+        limit = int(query.get("limit", 20))
+        if limit > max_limit:
+            limit = max_limit
+        offset = int(query.get("offset", 0))
+        return {"items": items[offset:offset + limit], "total": len(items), "limit": limit, "offset": offset}
+
+    @staticmethod
+    def _playlist_json(playlist):
+        return {
+            "id": playlist["id"],
+            "name": playlist["name"],
+            "owner": {"id": "mockuser", "display_name": "Mock User"},
+            "snapshot_id": playlist["snapshot_id"],
+            "tracks": {"total": len(playlist["uris"])},
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist['id']}"},
+        }
+
+    def _dispatch(self, method):
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        raw = self._read_body()
+        self.state.count(method, parsed.path)
+        delay = self.state.delay()
+        if delay:
+            time.sleep(delay)
+
+        path = parsed.path
+        if path == "/api/token" and method == "POST":
+            return self._send(200, {"access_token": uuid.uuid4().hex, "token_type": "Bearer", "expires_in": 3600})
+
+        if self.state.should_rate_limit():
+            return self._send(
+                429,
+                {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                {"Retry-After": str(self.state.retry_after)},
+            )
+
+        data = json.loads(raw) if raw.strip() else {}
+        segments = [s for s in path.split("/") if s]
+        if segments[:1] != ["v1"]:
+            return self._send(404, {"error": {"status": 404, "message": "Not found"}})
+        segments = segments[1:]
+
+        if segments == ["me"] and method == "GET":
+            return self._send(200, {"id": "mockuser", "display_name": "Mock User"})
+
+        if segments == ["search"] and method == "GET":
+            limit = min(int(query.get("limit", 10)), 50)
+            q = query.get("q", "")
+            search_type = query.get("type", "track").split(",")[0]
+            if search_type == "playlist":
+                words = q.lower().split()
+                with self.state.lock:
+                    matches = [p for p in self.state.playlists.values()
+                               if all(w in p["name"].lower().split() for w in words)]
+                    matches.sort(key=lambda p: len(p["name"]))  # Closest name first
+                    items = [self._playlist_json(p) for p in matches[:limit]]
+            else:
+                tracks = self.state.search(q, limit, int(query.get("offset", 0)))
+                if not tracks:
+                    tracks = [_track_for_query(q if i == 0 else f"{q} {i}") for i in range(limit)]
+                if search_type == "artist":
+                    items = [{"id": hashlib.sha1(a["name"].encode("utf-8")).hexdigest()[:22], "name": a["name"]}
+                             for a in (t["artists"][0] for t in tracks)]
+                elif search_type == "album":
+                    items = [{"id": hashlib.sha1(t["album"]["name"].encode("utf-8")).hexdigest()[:22],
+                              "name": t["album"]["name"], "artists": t["artists"]} for t in tracks]
+                else:
+                    items = tracks
+            return self._send(200, {f"{search_type}s": {"items": items, "total": len(items)}})
+
+        if segments == ["tracks"] and method == "GET":
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            if len(ids) > 50:
+                return self._send(400, {"error": {"status": 400, "message": "Too many ids requested"}})
+            # Unknown IDs come back as null, like the real endpoint
+            return self._send(200, {"tracks": [
+                self.state.track(i) if i in self.state.tracks_by_id or (len(i) == 22 and i.isalnum()) else None
+                for i in ids
+            ]})
+
+        if len(segments) == 3 and segments[0] == "users" and segments[2] == "playlists" and method == "POST":
+            playlist_id = uuid.uuid4().hex[:22]
+            playlist = {"id": playlist_id, "name": data.get("name", ""), "uris": [], "snapshot_id": uuid.uuid4().hex}
+            with self.state.lock:
+                self.state.playlists[playlist_id] = playlist
+            return self._send(201, self._playlist_json(playlist))
+
+        if segments == ["me", "playlists"] and method == "GET":
+            with self.state.lock:
+                playlists = [self._playlist_json(p) for p in reversed(list(self.state.playlists.values()))]
+            return self._send(200, self._page(playlists, query, max_limit=50))
+
+        if len(segments) == 3 and segments[0] == "playlists" and segments[2] == "tracks" and method == "GET":
+            with self.state.lock:
+                playlist = self.state.playlists.get(segments[1])
+                uris = list(playlist["uris"]) if playlist else None
+            if uris is None:
+                return self._send(404, {"error": {"status": 404, "message": "Playlist not found"}})
+            items = [{"track": {"id": uri.rsplit(":", 1)[-1], "uri": uri}} for uri in uris]
+            return self._send(200, self._page(items, query, max_limit=100))
+
+        if len(segments) == 3 and segments[0] == "playlists" and segments[2] == "tracks" and method == "POST":
+            uris = data.get("uris", [])
+            if len(uris) > 100:
+                return self._send(400, {"error": {"status": 400, "message": "Too many ids requested"}})
+            with self.state.lock:
+                playlist = self.state.playlists.get(segments[1])
+                if playlist is None:
+                    return self._send(404, {"error": {"status": 404, "message": "Playlist not found"}})
+                playlist["uris"].extend(uris)
+                playlist["snapshot_id"] = uuid.uuid4().hex
+            return self._send(201, {"snapshot_id": playlist["snapshot_id"]})
+
+        if segments == ["me", "player", "devices"] and method == "GET":
+            with self.state.lock:
+                devices = [dict(d) for d in self.state.devices]
+            return self._send(200, {"devices": devices})
+
+        if segments == ["me", "player"] and method == "PUT":
+            device_ids = data.get("device_ids") or []
+            if not device_ids or not self.state.activate(device_ids[0]):
+                return self._send(404, {"error": {"status": 404, "message": "Device not found"}})
+            return self._send(204)
+
+        if segments == ["audio-features"] and method == "GET":
+            if self.state.audio_features_forbidden:
+                return self._send(403, {"error": {"status": 403, "message": "Forbidden"}})
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            if len(ids) > 100:
+                return self._send(400, {"error": {"status": 400, "message": "Too many ids requested"}})
+            return self._send(200, {"audio_features": [
+                _audio_features(i) if i in self.state.tracks_by_id or (len(i) == 22 and i.isalnum()) else None
+                for i in ids
+            ]})
+
+        if segments == ["artists"] and method == "GET":
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            if len(ids) > 50:
+                return self._send(400, {"error": {"status": 400, "message": "Too many ids requested"}})
+            return self._send(200, {"artists": [
+                {"id": i, "name": self.state.artists_by_id[i], "genres": _artist_genres(i)}
+                if i in self.state.artists_by_id else None
+                for i in ids
+            ]})
+
+        if segments == ["me", "tracks"] and method == "GET":
+            with self.state.lock:
+                saved = list(self.state.saved)
+            items = [{
+                "added_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ms / 1000)),
+                "track": self.state.track(uri.rsplit(":", 1)[-1]),
+            } for ms, uri in saved]
+            return self._send(200, self._page(items, query, max_limit=50))
+
+        if segments == ["me", "player", "recently-played"] and method == "GET":
+            # Like Spotify: only the 50 most recent plays are visible; items newest first
+            limit = min(int(query.get("limit", 20)), 50)
+            with self.state.lock:
+                visible = self.state.history[-50:]
+            if "after" in query:
+                newer = [h for h in visible if h[0] > int(query["after"])]
+                page, more = newer[:limit], len(newer) > limit
+            elif "before" in query:
+                older = [h for h in visible if h[0] < int(query["before"])]
+                page, more = older[-limit:], len(older) > limit
+            else:
+                page, more = visible[-limit:], len(visible) > limit
+            items = [{
+                "track": self.state.track(uri.rsplit(":", 1)[-1]),
+                "played_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ms / 1000)) + f".{ms % 1000:03d}Z",
+                "context": None,
+            } for ms, uri in reversed(page)]
+            cursors = {"after": str(page[-1][0]), "before": str(page[0][0])} if page else None
+            direction = "before" if "before" in query else "after"
+            next_url = None
+            if more and cursors:
+                next_url = f"{self.state.base_url}/v1/me/player/recently-played?limit={limit}&{direction}={cursors[direction]}"
+            return self._send(200, {"items": items, "cursors": cursors, "next": next_url, "limit": limit})
+
+        if segments in (["me", "player"], ["me", "player", "currently-playing"]) and method == "GET":
+            device = self.state.active_device()
+            with self.state.lock:
+                playback = dict(self.state.playback) if self.state.playback else None
+            if device is None or playback is None:
+                return self._send(204)
+            track_id = playback["uri"].rsplit(":", 1)[-1]
+            return self._send(200, {
+                "device": device,
+                "is_playing": playback["is_playing"],
+                "progress_ms": playback["progress_ms"],
+                "currently_playing_type": "track",
+                "item": self.state.track(track_id),
+            })
+
+        if segments[:2] == ["me", "player"]:
+            # Commands go to device_id (activating it) or the active device
+            if query.get("device_id"):
+                if not self.state.activate(query["device_id"]):
+                    return self._send(404, {"error": {"status": 404, "message": "Device not found"}})
+            elif self.state.active_device() is None:
+                return self._send(404, {"error": {"status": 404, "message": "Player command failed: No active device found"}})
+            with self.state.lock:
+                if segments == ["me", "player", "queue"] and method == "POST":
+                    if self.state.playback is None:
+                        return self._send(404, {"error": {"status": 404, "message": "No active playback"}})
+                    self.state.queue.append(query.get("uri"))
+                elif segments == ["me", "player", "play"] and method == "PUT":
+                    uris = [u for u in (data.get("uris") or [data.get("context_uri")]) if u]
+                    if uris and uris[0].startswith("spotify:playlist:"):
+                        playlist = self.state.playlists.get(uris[0].rsplit(":", 1)[-1])
+                        uris = list(playlist["uris"]) if playlist else uris
+                    if uris:
+                        self.state.playback = {"uri": uris[0], "is_playing": True, "progress_ms": 0}
+                        self.state.queue = list(uris[1:])
+                        self.state.record_play(uris[0])
+                    elif self.state.playback:
+                        self.state.playback["is_playing"] = True
+                elif segments == ["me", "player", "pause"] and self.state.playback:
+                    self.state.playback["is_playing"] = False
+                elif segments[2:] == ["next"] and self.state.queue:
+                    self.state.playback = {"uri": self.state.queue.pop(0), "is_playing": True, "progress_ms": 0}
+                    self.state.record_play(self.state.playback["uri"])
+            return self._send(204)
+
+        return self._send(404, {"error": {"status": 404, "message": f"No mock for {method} {path}"}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class SpotifyMockServer:
+    """Threaded mock server; use as a context manager or start()/stop()"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, connect_ms=0, **options):
+        """options: jitter_ms, seed, catalog_size, rate_limit_every, rate_limit_rate, retry_after, history_size,
+        library_size, audio_features_forbidden"""
+        self.state = _MockState(latency_ms, connect_ms, **options)
+        handler = type("MockHandler", (_Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.state.base_url = self.base_url
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Spotify Web API mock")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Added per-request latency")
+    parser.add_argument("--connect-ms", type=int, default=0, help="Added per-connection latency (simulated handshake)")
+    parser.add_argument("--jitter-ms", type=int, default=0, help="Random +/- spread on the per-request latency")
+    parser.add_argument("--seed", type=int, default=0, help="Catalog / jitter / 429 seed")
+    parser.add_argument("--catalog-size", type=int, default=2000, help="Tracks in the seeded catalog")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth API request with 429 (0 = off)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of API requests answered with 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--library-size", type=int, default=1000, help="Seeded saved tracks (/me/tracks)")
+    parser.add_argument("--history-size", type=int, default=120, help="Seeded plays in the listening history")
+    parser.add_argument("--audio-features-forbidden", action="store_true",
+                        help="Answer /audio-features with 403 (apps registered after Nov 2024)")
+    args = parser.parse_args()
+
+    server = SpotifyMockServer(
+        args.host, args.port, args.latency_ms, args.connect_ms,
+        jitter_ms=args.jitter_ms, seed=args.seed, catalog_size=args.catalog_size,
+        rate_limit_every=args.rate_limit_every, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, history_size=args.history_size,
+        library_size=args.library_size, audio_features_forbidden=args.audio_features_forbidden,
+    )
+    print(f"Spotify mock listening on {server.base_url} (API base {server.base_url}/v1)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.state.stats(), indent=2))
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
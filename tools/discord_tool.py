@@ -35,6 +35,8 @@ USAGE EXAMPLES:
 1. SEND MESSAGES:
    discord_tool(action="send_message", message="Hello!", target="1234567890", target_type="channel")
    discord_tool(action="send_message", message="Hi there!", target="1234567890", target_type="user")
+   # Long output (logs, transcripts) → ONE message with preview + full text as .md/.txt attachment
+   discord_tool(action="send_message", message=long_log, target="1234567890", attachment_threshold=3)
 
 2. READ MESSAGES:
    # Basic reading
@@ -68,6 +70,24 @@ USAGE EXAMPLES:
                 time_filter="last_thursday", start_time="10:00", end_time="12:00",
                 search_keywords="meeting")
 
+   # Include threads / forum posts (grouped per thread, max thread_limit messages each)
+   discord_tool(action="read_messages", target="1234567890", time_filter="last_7_days",
+                include_threads=True, include_archived=True, thread_limit=20)
+   
+   # Read files people posted (downloaded once into a local cache; text files get an excerpt)
+   discord_tool(action="read_messages", target="1234567890", limit=10, fetch_attachments=True)
+   
+   # Cross-channel view: several channels/DMs read concurrently, merged into ONE timeline
+   discord_tool(action="read_messages", targets=["1234567890", "2345678901", {"target": "3456789012", "target_type": "user"}],
+                time_filter="today")
+   
+   # Context around search hits ("the 20 messages around message X") - ONE request per hit!
+   discord_tool(action="read_context", target="1234567890", message_id="1111111111", context_limit=20)
+   discord_tool(action="read_context", target="1234567890", message_ids=["1111111111", "2222222222"])
+
+   # Activity digest ("how active was the channel this week, who talked most?") - no message payload!
+   discord_tool(action="channel_digest", target="1234567890", time_filter="last_7_days")
+
 3. LIST GUILDS (ALL SERVERS):
    discord_tool(action="list_guilds")
    discord_tool(action="list_guilds", include_channels=True)  # With channels in one call!
@@ -136,9 +156,22 @@ User asks: "Suche nach 'deployment' in den letzten 3 Tagen"
 import requests
 import os
 import json
+import re
+import heapq
+import hashlib
+import itertools
+import tempfile
+import threading
+import contextlib
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl  # POSIX file locks for the shared attachment cache index
+except ImportError:
+    fcntl = None
 
 def discord_tool(
     action: str,
@@ -146,9 +179,11 @@ def discord_tool(
     message: str = None,
     target: str = None,
     target_type: str = None,  # "user" or "channel"
+    targets: list = None,  # Multiple channels/users for read_messages (one merged timeline)
     mention_users: list = None,  # List of user IDs to mention
     ping_everyone: bool = False,  # Ping @everyone (channel only)
     ping_here: bool = False,  # Ping @here (channel only)
+    attachment_threshold: int = None,  # Send as file attachment above this many chunks
     # Read parameters
     limit: int = 50,
     time_filter: str = "all",
@@ -157,6 +192,13 @@ def discord_tool(
     search_keywords: str = None,
     start_time: str = None,
     end_time: str = None,
+    include_threads: bool = False,
+    include_archived: bool = False,
+    thread_limit: int = 20,
+    fetch_attachments: bool = False,
+    # Context parameters (for read_context)
+    message_ids: list = None,
+    context_limit: int = 20,
     # Task parameters
     message_id: str = None,
     channel_id: str = None,
@@ -187,7 +229,7 @@ def discord_tool(
     Unified Discord tool that handles core Discord operations.
     
     Args:
-        action: The action to perform (send_message, read_messages,
+        action: The action to perform (send_message, read_messages, read_context, channel_digest,
                 list_guilds, list_channels, create_task, delete_task, list_tasks,
                 manage_tasks - BATCH task operations,
                 execute_batch - ULTIMATE POWER: Execute ANY combination in ONE call!)
@@ -211,10 +253,20 @@ def discord_tool(
     try:
         if action == "send_message":
             return _send_message(DISCORD_BOT_TOKEN, message, target, target_type, 
-                               mention_users, ping_everyone, ping_here)
+                               mention_users, ping_everyone, ping_here, attachment_threshold)
         
         elif action == "read_messages":
-            return _read_messages(DISCORD_BOT_TOKEN, target, target_type, limit, time_filter, timezone, show_both, search_keywords, start_time, end_time)
+            if targets:
+                return _read_messages_multi(DISCORD_BOT_TOKEN, targets, limit, time_filter, timezone, show_both, search_keywords, start_time, end_time)
+            return _read_messages(DISCORD_BOT_TOKEN, target, target_type, limit, time_filter, timezone, show_both, search_keywords, start_time, end_time,
+                                  include_threads, include_archived, thread_limit, fetch_attachments)
+        
+        elif action == "read_context":
+            return _read_context(DISCORD_BOT_TOKEN, target or channel_id, target_type or "channel", message_id, message_ids,
+                                 context_limit, timezone, show_both)
+        
+        elif action == "channel_digest":
+            return _channel_digest(DISCORD_BOT_TOKEN, target, target_type, time_filter, timezone, search_keywords, start_time, end_time)
         
         elif action == "list_guilds":
             return _list_guilds(DISCORD_BOT_TOKEN, include_channels)
@@ -249,8 +301,12 @@ def discord_tool(
     except Exception as e:
         return {"status": "error", "message": f"Error: {str(e)}"}
 
-def _send_message(bot_token, message, target, target_type, mention_users=None, ping_everyone=False, ping_here=False):
-    """Send a message to Discord (DM or channel) with mentions/pings and auto-chunking."""
+def _send_message(bot_token, message, target, target_type, mention_users=None, ping_everyone=False, ping_here=False, attachment_threshold=None):
+    """
+    Send a message to Discord (DM or channel) with mentions/pings and auto-chunking.
+    Messages that would need more than attachment_threshold chunks are sent as ONE
+    message with a short preview plus the full text as a file attachment.
+    """
     # 🔒 DM RESTRICTION: Only allow DMs to authorized user ID (configured in .env)
     ALLOWED_DM_USER_ID = os.getenv("ALLOWED_DM_USER_ID", "")
     
@@ -348,8 +404,16 @@ def _send_message(bot_token, message, target, target_type, mention_users=None, p
                     final_chunks.append(chunk[i:i+MAX_LENGTH])
         chunks = final_chunks
     
-    # Send all chunks
     message_url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+    
+    # Too many chunks? Send ONE message with preview + full text as attachment
+    if attachment_threshold is None:
+        attachment_threshold = int(os.getenv("DISCORD_ATTACHMENT_CHUNK_THRESHOLD", "3"))
+    if attachment_threshold > 0 and len(chunks) > attachment_threshold:
+        return _send_as_attachment(bot_token, message_url, full_message, mentions_text,
+                                   len(chunks), channel_id, target, target_type)
+    
+    # Send all chunks
     sent_messages = []
     
     for i, chunk in enumerate(chunks):
@@ -379,21 +443,297 @@ def _send_message(bot_token, message, target, target_type, mention_users=None, p
         "mentions_added": bool(mentions_text)
     }
 
-def _read_messages(bot_token, target, target_type, limit, time_filter, timezone, show_both, search_keywords=None, start_time=None, end_time=None):
-    """Read messages from Discord (DM or channel) with advanced filtering and smart pagination."""
-    headers = {"Authorization": f"Bot {bot_token}"}
+def _send_as_attachment(bot_token, message_url, full_message, mentions_text, chunk_count, channel_id, target, target_type):
+    """Send a long message as ONE post: short preview + full text as .md/.txt attachment (multipart)."""
+    PREVIEW_LENGTH = 1500
+    
+    # Markdown-looking content keeps its formatting as .md, everything else is plain text
+    body = full_message[len(mentions_text):] if mentions_text else full_message
+    is_markdown = any(marker in body for marker in ("```", "\n#", "**", "\n- ", "\n* ")) or body.startswith("#")
+    filename = "message.md" if is_markdown else "message.txt"
+    content_type = "text/markdown" if is_markdown else "text/plain"
+    
+    preview = body[:PREVIEW_LENGTH]
+    if "\n" in preview[PREVIEW_LENGTH // 2:]:
+        # Cut at a line break so the preview doesn't end mid-line
+        preview = preview[:preview.rfind("\n")]
+    preview_text = f"{mentions_text}{preview}\n\n📎 *Full text ({len(body)} chars) attached as `{filename}`*"
+    
+    payload = {
+        "content": preview_text,
+        "attachments": [{"id": 0, "filename": filename}]
+    }
+    files = {"files[0]": (filename, body.encode("utf-8"), content_type)}
+    
+    # Don't set Content-Type, requests builds the multipart boundary
+    response = requests.post(
+        message_url,
+        headers={"Authorization": f"Bot {bot_token}"},
+        data={"payload_json": json.dumps(payload)},
+        files=files,
+        timeout=30
+    )
+    
+    if response.status_code not in (200, 201):
+        return {"status": "error", "message": f"Failed to send message as attachment: {response.text}"}
     
+    return {
+        "status": "success",
+        "message": f"Message sent to {target_type} {target} as attachment '{filename}' (would have been {chunk_count} chunks)",
+        "message_ids": [response.json()["id"]],
+        "chunks_sent": 1,
+        "channel_id": channel_id,
+        "target_type": target_type,
+        "mentions_added": bool(mentions_text),
+        "sent_as_attachment": True,
+        "attachment_filename": filename
+    }
+
+def _read_messages(bot_token, target, target_type, limit, time_filter, timezone, show_both, search_keywords=None, start_time=None, end_time=None,
+                   include_threads=False, include_archived=False, thread_limit=20, fetch_attachments=False):
+    """Read messages from Discord (DM or channel) with advanced filtering and smart pagination."""
     # Determine channel ID
-    if target_type == "user":
-        # Get DM channel
-        dm_url = f"https://discord.com/api/v10/users/@me/channels"
-        dm_data = {"recipient_id": target}
-        dm_response = requests.post(dm_url, headers=headers, json=dm_data, timeout=10)
-        if dm_response.status_code != 200:
-            return {"status": "error", "message": f"Failed to access DM: {dm_response.text}"}
-        channel_id = dm_response.json()["id"]
+    channel_id, error = _resolve_channel_id(bot_token, target, target_type)
+    if error:
+        return error
+    
+    # Thread traversal needs the channel's guild + type (forums have no top-level messages)
+    channel_info = None
+    if include_threads and target_type != "user":
+        headers = {"Authorization": f"Bot {bot_token}"}
+        response = requests.get(f"https://discord.com/api/v10/channels/{channel_id}", headers=headers, timeout=10)
+        if response.status_code != 200:
+            return {"status": "error", "message": f"Failed to read channel info: {response.text}"}
+        channel_info = response.json()
+    
+    # Forum (15) and media (16) channels only contain threads (posts), no top-level messages
+    if channel_info and channel_info.get("type") in (15, 16):
+        messages = []
     else:
-        channel_id = target
+        messages, error = _collect_messages(bot_token, channel_id, limit, time_filter, timezone, search_keywords, start_time, end_time)
+        if error:
+            return error
+    
+    # Apply keyword search result limit
+    results_limited = False
+    if search_keywords:
+        # IMPORTANT: Limit results to prevent overload
+        MAX_RESULTS = 10
+        if len(messages) > MAX_RESULTS:
+            results_limited = True
+            original_count = len(messages)
+            messages = messages[:MAX_RESULTS]
+    
+    # Format messages
+    formatted_messages = [_format_message(msg, timezone, show_both) for msg in messages]
+    
+    # Add warning if results were limited
+    filter_desc = _describe_filters(time_filter, search_keywords, start_time, end_time)
+    message_text = f"Found {len(formatted_messages)} message(s){filter_desc}"
+    if results_limited:
+        message_text += f" [LIMITED: {original_count} total matches, showing first 10. Add time filter for better results!]"
+    
+    result = {
+        "status": "success",
+        "message": message_text,
+        "messages": formatted_messages,
+        "count": len(formatted_messages),
+        "timezone": timezone,
+        "time_filter": time_filter,
+        "search_keywords": search_keywords,
+        "results_limited": results_limited
+    }
+    
+    if fetch_attachments:
+        result["attachments_fetched"] = _fetch_attachments(formatted_messages)
+    
+    if channel_info:
+        threads, thread_errors = _read_threads(bot_token, channel_info, include_archived, thread_limit, time_filter,
+                                               timezone, show_both, search_keywords, start_time, end_time)
+        thread_message_count = sum(thread["count"] for thread in threads)
+        result["threads"] = threads
+        result["thread_count"] = len(threads)
+        result["message"] += f" + {thread_message_count} message(s) in {len(threads)} thread(s)"
+        if thread_errors:
+            result["thread_errors"] = thread_errors
+    
+    return result
+
+def _read_threads(bot_token, channel_info, include_archived, thread_limit, time_filter, timezone, show_both,
+                  search_keywords=None, start_time=None, end_time=None):
+    """
+    Read the threads/forum posts of a channel concurrently with the same filters.
+    Lists active threads (and optionally archived public threads, paged) and returns
+    messages grouped per thread, capped at thread_limit messages per thread.
+    """
+    MAX_THREADS = 25
+    MAX_ARCHIVED_PAGES = 3
+    headers = {"Authorization": f"Bot {bot_token}"}
+    channel_id = channel_info["id"]
+    thread_limit = max(1, min(100, thread_limit or 20))
+    errors = []
+    
+    # Active threads are listed per guild - keep only this channel's
+    threads = {}
+    guild_id = channel_info.get("guild_id")
+    if guild_id:
+        response = requests.get(f"https://discord.com/api/v10/guilds/{guild_id}/threads/active", headers=headers, timeout=10)
+        if response.status_code == 200:
+            for thread in response.json().get("threads", []):
+                if thread.get("parent_id") == channel_id:
+                    threads[thread["id"]] = thread
+        else:
+            errors.append({"stage": "list_active_threads", "error": f"HTTP {response.status_code}: {response.text}"})
+    
+    # Archived public threads, newest archived first (paged via before=archive_timestamp)
+    if include_archived:
+        before = None
+        for page in range(MAX_ARCHIVED_PAGES):
+            params = {"limit": 100}
+            if before:
+                params["before"] = before
+            response = requests.get(f"https://discord.com/api/v10/channels/{channel_id}/threads/archived/public",
+                                    headers=headers, params=params, timeout=10)
+            if response.status_code != 200:
+                errors.append({"stage": "list_archived_threads", "error": f"HTTP {response.status_code}: {response.text}"})
+                break
+            data = response.json()
+            archived = data.get("threads", [])
+            for thread in archived:
+                threads.setdefault(thread["id"], thread)
+            if not data.get("has_more") or not archived:
+                break
+            before = archived[-1].get("thread_metadata", {}).get("archive_timestamp")
+            if not before:
+                break
+    
+    # Most recently active threads first
+    ordered = sorted(threads.values(), key=lambda t: int(t.get("last_message_id") or t["id"]), reverse=True)
+    skipped = max(0, len(ordered) - MAX_THREADS)
+    ordered = ordered[:MAX_THREADS]
+    if skipped:
+        errors.append({"stage": "thread_limit", "error": f"{skipped} more thread(s) not read (max {MAX_THREADS} per call)"})
+    
+    def read_thread(thread):
+        # One extra message tells us whether the thread was truncated
+        messages, error = _collect_messages(bot_token, thread["id"], min(100, thread_limit + 1), time_filter, timezone,
+                                            search_keywords, start_time, end_time)
+        return thread, messages, error
+    
+    if not ordered:
+        return [], errors
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(ordered))) as pool:
+        results = list(pool.map(read_thread, ordered))
+    
+    grouped = []
+    for thread, messages, error in results:
+        if error:
+            errors.append({"thread_id": thread["id"], "name": thread.get("name"), "error": error["message"]})
+            continue
+        # Skip threads with nothing in the filtered range
+        if not messages and (time_filter != "all" or start_time or end_time or search_keywords):
+            continue
+        grouped.append({
+            "thread_id": thread["id"],
+            "name": thread.get("name"),
+            "archived": thread.get("thread_metadata", {}).get("archived", False),
+            "messages": [_format_message(msg, timezone, show_both) for msg in messages[:thread_limit]],
+            "count": min(len(messages), thread_limit),
+            "truncated": len(messages) > thread_limit
+        })
+    
+    return grouped, errors
+
+def _read_messages_multi(bot_token, targets, limit, time_filter, timezone, show_both, search_keywords=None, start_time=None, end_time=None):
+    """
+    Read several channels/DMs concurrently with the same filters and return ONE timeline.
+    Per-channel streams (newest first) are k-way merged by snowflake ID with a heap,
+    so the call takes as long as the slowest channel instead of the sum of all.
+    """
+    MAX_TARGETS = 10
+    
+    # Normalize targets: "123" = channel, {"target": "123", "target_type": "user"} = DM
+    normalized = []
+    for entry in targets:
+        if isinstance(entry, dict):
+            entry_target = entry.get("target") or entry.get("channel_id")
+            entry_type = entry.get("target_type", "channel")
+        else:
+            entry_target, entry_type = str(entry), "channel"
+        if entry_target and (entry_target, entry_type) not in normalized:
+            normalized.append((entry_target, entry_type))
+    
+    if not normalized:
+        return {"status": "error", "message": "read_messages with targets requires at least one channel or user ID"}
+    if len(normalized) > MAX_TARGETS:
+        return {"status": "error", "message": f"read_messages supports max {MAX_TARGETS} targets per call (got {len(normalized)})"}
+    
+    def read_target(entry):
+        entry_target, entry_type = entry
+        channel_id, error = _resolve_channel_id(bot_token, entry_target, entry_type)
+        if error:
+            return entry_target, entry_type, None, [], error["message"]
+        messages, error = _collect_messages(bot_token, channel_id, limit, time_filter, timezone, search_keywords, start_time, end_time)
+        if error:
+            return entry_target, entry_type, channel_id, [], error["message"]
+        return entry_target, entry_type, channel_id, messages, None
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(normalized))) as pool:
+        results = list(pool.map(read_target, normalized))
+    
+    streams = []
+    sources = []
+    errors = []
+    for entry_target, entry_type, channel_id, messages, error in results:
+        if error:
+            errors.append({"target": entry_target, "target_type": entry_type, "error": error})
+            continue
+        for msg in messages:
+            msg["_source"] = (entry_target, entry_type, channel_id)
+        # Each stream must be newest first for the merge
+        streams.append(sorted(messages, key=lambda m: int(m["id"]), reverse=True))
+        sources.append({"target": entry_target, "target_type": entry_type, "channel_id": channel_id, "count": len(messages)})
+    
+    if not streams:
+        return {"status": "error", "message": "Failed to read any of the targets", "errors": errors}
+    
+    # Bounded timeline: keyword searches keep the usual 10-result limit
+    max_results = 10 if search_keywords else max(1, min(100, limit or 50))
+    total_matches = sum(len(stream) for stream in streams)
+    merged = heapq.merge(*streams, key=lambda m: int(m["id"]), reverse=True)
+    
+    timeline = []
+    for msg in itertools.islice(merged, max_results):
+        entry_target, entry_type, channel_id = msg["_source"]
+        formatted = _format_message(msg, timezone, show_both)
+        formatted["channel_id"] = channel_id
+        formatted["target"] = entry_target
+        formatted["target_type"] = entry_type
+        timeline.append(formatted)
+    
+    results_limited = total_matches > len(timeline)
+    filter_desc = _describe_filters(time_filter, search_keywords, start_time, end_time)
+    message_text = f"Found {len(timeline)} message(s) across {len(streams)} target(s){filter_desc}"
+    if results_limited:
+        message_text += f" [LIMITED: {total_matches} total matches, showing newest {len(timeline)}]"
+    
+    return {
+        "status": "success" if not errors else "partial_success",
+        "message": message_text,
+        "messages": timeline,
+        "count": len(timeline),
+        "sources": sources,
+        "timezone": timezone,
+        "time_filter": time_filter,
+        "search_keywords": search_keywords,
+        "results_limited": results_limited,
+        "errors": errors
+    }
+
+def _collect_messages(bot_token, channel_id, limit, time_filter, timezone, search_keywords=None, start_time=None, end_time=None):
+    """Fetch messages of ONE channel and apply time + keyword filters (newest first). Returns (messages, error_dict)."""
+    headers = {"Authorization": f"Bot {bot_token}"}
     
     # Fetch messages with smart pagination if time filters OR keywords are used
     if time_filter != "all" or start_time or end_time or search_keywords:
@@ -404,7 +744,7 @@ def _read_messages(bot_token, target, target_type, limit, time_filter, timezone,
         response = requests.get(url, headers=headers, params={"limit": limit}, timeout=10)
         
         if response.status_code != 200:
-            return {"status": "error", "message": f"Failed to read messages: {response.text}"}
+            return None, {"status": "error", "message": f"Failed to read messages: {response.text}"}
         
         messages = response.json()
     
@@ -412,39 +752,14 @@ def _read_messages(bot_token, target, target_type, limit, time_filter, timezone,
     if time_filter != "all" or start_time or end_time:
         messages = _filter_messages_by_time(messages, time_filter, timezone, start_time, end_time)
     
-    # Apply keyword search with result limit
-    results_limited = False
+    # Apply keyword search
     if search_keywords:
         messages = _filter_messages_by_keywords(messages, search_keywords)
-        # IMPORTANT: Limit results to prevent overload
-        MAX_RESULTS = 10
-        if len(messages) > MAX_RESULTS:
-            results_limited = True
-            original_count = len(messages)
-            messages = messages[:MAX_RESULTS]
     
-    # Format messages
-    formatted_messages = []
-    for msg in messages:
-        author = msg["author"]["username"]
-        content = msg["content"]
-        msg_time = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
-        
-        if show_both:
-            msg_time_local = msg_time.astimezone(ZoneInfo(timezone))
-            timestamp_display = f"{msg_time.strftime('%Y-%m-%d %H:%M:%S UTC')} / {msg_time_local.strftime('%Y-%m-%d %H:%M:%S %z')}"
-        else:
-            msg_time_local = msg_time.astimezone(ZoneInfo(timezone))
-            timestamp_display = msg_time_local.strftime("%Y-%m-%d %H:%M:%S %z")
-        
-        formatted_messages.append({
-            "id": msg["id"],
-            "author": author,
-            "content": content,
-            "timestamp": timestamp_display
-        })
-    
-    # Build filter description
+    return messages, None
+
+def _describe_filters(time_filter, search_keywords=None, start_time=None, end_time=None):
+    """Build the ' (time: ..., keywords: ...)' suffix for result messages."""
     filter_parts = []
     if time_filter != "all":
         filter_parts.append(f"time: {time_filter}")
@@ -453,22 +768,300 @@ def _read_messages(bot_token, target, target_type, limit, time_filter, timezone,
     if search_keywords:
         filter_parts.append(f"keywords: '{search_keywords}'")
     
-    filter_desc = f" ({', '.join(filter_parts)})" if filter_parts else ""
+    return f" ({', '.join(filter_parts)})" if filter_parts else ""
+
+def _resolve_channel_id(bot_token, target, target_type):
+    """Resolve a target to a channel ID (opens the DM channel for users). Returns (channel_id, error_dict)."""
+    if target_type != "user":
+        return target, None
     
-    # Add warning if results were limited
-    message_text = f"Found {len(formatted_messages)} message(s){filter_desc}"
-    if results_limited:
-        message_text += f" [LIMITED: {original_count} total matches, showing first 10. Add time filter for better results!]"
+    headers = {"Authorization": f"Bot {bot_token}"}
+    dm_url = f"https://discord.com/api/v10/users/@me/channels"
+    dm_data = {"recipient_id": target}
+    dm_response = requests.post(dm_url, headers=headers, json=dm_data, timeout=10)
+    if dm_response.status_code != 200:
+        return None, {"status": "error", "message": f"Failed to access DM: {dm_response.text}"}
+    return dm_response.json()["id"], None
+
+def _format_message(msg, timezone, show_both):
+    """Format a raw Discord message for output (id, author, content, timestamp)."""
+    author = msg["author"]["username"]
+    content = msg["content"]
+    msg_time = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
+    
+    if show_both:
+        msg_time_local = msg_time.astimezone(ZoneInfo(timezone))
+        timestamp_display = f"{msg_time.strftime('%Y-%m-%d %H:%M:%S UTC')} / {msg_time_local.strftime('%Y-%m-%d %H:%M:%S %z')}"
+    else:
+        msg_time_local = msg_time.astimezone(ZoneInfo(timezone))
+        timestamp_display = msg_time_local.strftime("%Y-%m-%d %H:%M:%S %z")
+    
+    formatted = {
+        "id": msg["id"],
+        "author": author,
+        "content": content,
+        "timestamp": timestamp_display
+    }
+    
+    # Attachment metadata (download with fetch_attachments=True)
+    if msg.get("attachments"):
+        formatted["attachments"] = [
+            {
+                "id": attachment["id"],
+                "filename": attachment.get("filename"),
+                "size": attachment.get("size"),
+                "content_type": attachment.get("content_type"),
+                "url": attachment.get("url")
+            }
+            for attachment in msg["attachments"]
+        ]
+    
+    return formatted
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive cross-process lock on '<path>.lock' (no locking where fcntl is unavailable)."""
+    try:
+        lock_file = open(f"{path}.lock", "a")
+    except OSError:
+        yield
+        return
+    
+    with lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _fetch_attachments(formatted_messages):
+    """
+    Download the attachments of formatted messages into a local content-addressed cache.
+    Bodies are streamed to disk and hashed (SHA-256) on the fly, with a per-file and a
+    per-call byte cap. Downloads run concurrently. Attachments already in the cache index
+    are never downloaded again. Adds local_path / sha256 / excerpt to each attachment entry.
+    """
+    MAX_FILE_BYTES = int(os.getenv("DISCORD_ATTACHMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+    MAX_CALL_BYTES = int(os.getenv("DISCORD_ATTACHMENT_CALL_MAX_BYTES", str(25 * 1024 * 1024)))
+    EXCERPT_LENGTH = 2000
+    TEXT_EXTENSIONS = {".txt", ".md", ".json", ".csv", ".log", ".py", ".js", ".ts", ".yaml", ".yml", ".xml", ".html"}
+    
+    cache_dir = Path(os.getenv("DISCORD_ATTACHMENT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "discord_attachment_cache")))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_path = cache_dir / "index.json"
+    try:
+        index = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        index = {}
+    
+    lock = threading.Lock()
+    budget = {"used": 0}
+    
+    # One entry per attachment ID (the same file can show up in several messages)
+    entries = {}
+    for msg in formatted_messages:
+        for attachment in msg.get("attachments", []):
+            entries.setdefault(attachment["id"], []).append(attachment)
+    
+    def download(attachment_id):
+        attachment = entries[attachment_id][0]
+        filename = attachment.get("filename") or attachment_id
+        extension = Path(filename).suffix.lower()
+        
+        # Cache hit: same attachment was downloaded before
+        cached = index.get(attachment_id) or {}
+        if "skipped" in cached and cached.get("max_bytes", 0) >= MAX_FILE_BYTES:
+            return attachment_id, {"error": cached["skipped"]}  # Still over the (unchanged or lowered) cap
+        if "file" in cached and (cache_dir / cached["file"]).exists():
+            return attachment_id, {"file": cached["file"], "sha256": cached["sha256"], "size": cached["size"], "cached": True}
+        # A skip recorded under a smaller (or unknown) cap is stale - fall through and re-evaluate
+        stale_skip = "skipped" in cached
+        
+        if (attachment.get("size") or 0) > MAX_FILE_BYTES:
+            return attachment_id, {"error": f"Skipped: {attachment.get('size')} bytes exceeds per-file cap of {MAX_FILE_BYTES} bytes", "permanent": True}
+        
+        hasher = hashlib.sha256()
+        size = 0
+        temp_path = cache_dir / f".{attachment_id}.{os.getpid()}.part"
+        try:
+            with requests.get(attachment["url"], stream=True, timeout=30) as response:
+                if response.status_code != 200:
+                    return attachment_id, {"error": f"Download failed: HTTP {response.status_code}", "stale_skip": stale_skip}
+                with open(temp_path, "wb") as handle:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        size += len(chunk)
+                        with lock:
+                            budget["used"] += len(chunk)
+                            over_call_cap = budget["used"] > MAX_CALL_BYTES
+                        if size > MAX_FILE_BYTES:
+                            raise OverflowError(f"Skipped: exceeds per-file cap of {MAX_FILE_BYTES} bytes")
+                        if over_call_cap:
+                            raise ValueError(f"Skipped: exceeds per-call cap of {MAX_CALL_BYTES} bytes")
+                        hasher.update(chunk)
+                        handle.write(chunk)
+            
+            # Content-addressed: identical files share one cache entry
+            digest = hasher.hexdigest()
+            final_name = f"{digest}{extension}"
+            final_path = cache_dir / final_name
+            if final_path.exists():
+                temp_path.unlink()
+            else:
+                os.replace(temp_path, final_path)
+            return attachment_id, {"file": final_name, "sha256": digest, "size": size, "cached": False}
+        except (OverflowError, ValueError, requests.exceptions.RequestException, OSError) as e:
+            if temp_path.exists():
+                temp_path.unlink()
+            # Too-large files stay too large - remember that instead of re-downloading
+            return attachment_id, {"error": str(e), "permanent": isinstance(e, OverflowError), "stale_skip": stale_skip}
+    
+    if not entries:
+        return {"downloaded": 0, "cached": 0, "bytes_downloaded": 0}
+    
+    with ThreadPoolExecutor(max_workers=min(4, len(entries))) as pool:
+        results = dict(pool.map(download, list(entries)))
+    
+    downloaded = 0
+    cached_hits = 0
+    bytes_downloaded = 0
+    index_updates = {}
+    for attachment_id, result in results.items():
+        if result.get("permanent"):
+            # Remember the cap that caused the skip - a raised cap re-evaluates the file
+            index_updates[attachment_id] = {"skipped": result["error"], "max_bytes": MAX_FILE_BYTES}
+        elif "error" not in result:
+            index_updates[attachment_id] = {"file": result["file"], "sha256": result["sha256"], "size": result["size"]}
+            if result["cached"]:
+                cached_hits += 1
+            else:
+                downloaded += 1
+                bytes_downloaded += result["size"]
+        elif result.get("stale_skip"):
+            index_updates[attachment_id] = None  # Drop the stale skip record; the next call retries
+        
+        for attachment in entries[attachment_id]:
+            if "error" in result:
+                attachment["download_error"] = result["error"]
+                continue
+            local_path = cache_dir / result["file"]
+            attachment["local_path"] = str(local_path)
+            attachment["sha256"] = result["sha256"]
+            attachment["cached"] = result["cached"]
+            content_type = attachment.get("content_type") or ""
+            if content_type.startswith("text/") or local_path.suffix.lower() in TEXT_EXTENSIONS:
+                with open(local_path, "r", encoding="utf-8", errors="replace") as handle:
+                    attachment["excerpt"] = handle.read(EXCERPT_LENGTH)
+    
+    # Merge into the current index under the lock, so concurrent calls keep each other's entries
+    if index_updates:
+        with _file_lock(index_path):
+            try:
+                index = json.loads(index_path.read_text())
+            except (OSError, ValueError):
+                index = {}
+            for attachment_id, update in index_updates.items():
+                if update is None:
+                    index.pop(attachment_id, None)
+                else:
+                    index[attachment_id] = update
+            temp_index = cache_dir / f".index.{os.getpid()}.tmp"
+            temp_index.write_text(json.dumps(index))
+            os.replace(temp_index, index_path)
+    
+    return {"downloaded": downloaded, "cached": cached_hits, "bytes_downloaded": bytes_downloaded}
+
+def _read_context(bot_token, target, target_type, message_id=None, message_ids=None, context_limit=20, timezone="Europe/Berlin", show_both=True):
+    """
+    Fetch the messages AROUND one or more message IDs (e.g. to expand search hits).
+    Uses Discord's around= parameter: ONE request per hit instead of a time-filtered scan.
+    Multiple hits are fetched concurrently and overlapping windows are merged.
+    """
+    MAX_ANCHORS = 10
+    
+    # Collect anchor IDs (deduplicated, order preserved)
+    anchors = []
+    for anchor in ([message_id] if message_id else []) + list(message_ids or []):
+        anchor = str(anchor).strip()
+        if anchor and anchor not in anchors:
+            anchors.append(anchor)
+    
+    if not anchors:
+        return {"status": "error", "message": "read_context requires message_id or message_ids"}
+    if len(anchors) > MAX_ANCHORS:
+        return {"status": "error", "message": f"read_context supports max {MAX_ANCHORS} message IDs per call (got {len(anchors)})"}
+    
+    channel_id, error = _resolve_channel_id(bot_token, target, target_type)
+    if error:
+        return error
+    
+    context_limit = max(1, min(100, context_limit or 20))
+    headers = {"Authorization": f"Bot {bot_token}"}
+    url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+    
+    def fetch_window(anchor):
+        response = requests.get(url, headers=headers, params={"around": anchor, "limit": context_limit}, timeout=10)
+        if response.status_code != 200:
+            return anchor, None, f"HTTP {response.status_code}: {response.text}"
+        return anchor, response.json(), None
+    
+    # Fetch all windows concurrently (a single hit needs no thread pool)
+    if len(anchors) == 1:
+        fetched = [fetch_window(anchors[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(5, len(anchors))) as pool:
+            fetched = list(pool.map(fetch_window, anchors))
+    
+    windows = []
+    errors = []
+    for anchor, batch, fetch_error in fetched:
+        if fetch_error:
+            errors.append({"message_id": anchor, "error": fetch_error})
+        elif batch:
+            ordered = sorted(batch, key=lambda m: int(m["id"]))
+            windows.append({"anchor_ids": [anchor], "messages": ordered})
+        else:
+            errors.append({"message_id": anchor, "error": "No messages found around this ID"})
+    
+    # Merge overlapping windows (chronological, deduplicated by message ID)
+    windows.sort(key=lambda w: int(w["messages"][0]["id"]))
+    merged = []
+    for window in windows:
+        if merged and int(window["messages"][0]["id"]) <= int(merged[-1]["messages"][-1]["id"]):
+            previous = merged[-1]
+            by_id = {m["id"]: m for m in previous["messages"] + window["messages"]}
+            previous["messages"] = sorted(by_id.values(), key=lambda m: int(m["id"]))
+            previous["anchor_ids"].extend(window["anchor_ids"])
+        else:
+            merged.append(window)
+    
+    formatted_windows = []
+    for window in merged:
+        formatted = []
+        for msg in window["messages"]:
+            entry = _format_message(msg, timezone, show_both)
+            if msg["id"] in window["anchor_ids"]:
+                entry["is_anchor"] = True
+            formatted.append(entry)
+        formatted_windows.append({
+            "anchor_ids": window["anchor_ids"],
+            "messages": formatted,
+            "count": len(formatted)
+        })
+    
+    total = sum(w["count"] for w in formatted_windows)
+    if not formatted_windows:
+        return {"status": "error", "message": "Failed to read context for any message ID", "errors": errors}
     
     return {
-        "status": "success",
-        "message": message_text,
-        "messages": formatted_messages,
-        "count": len(formatted_messages),
+        "status": "success" if not errors else "partial_success",
+        "message": f"Found {total} message(s) in {len(formatted_windows)} context window(s) around {len(anchors)} message ID(s) (oldest first)",
+        "channel_id": channel_id,
+        "windows": formatted_windows,
+        "count": total,
         "timezone": timezone,
-        "time_filter": time_filter,
-        "search_keywords": search_keywords,
-        "results_limited": results_limited
+        "errors": errors
     }
 
 def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone, start_time_str=None, end_time_str=None, max_messages=5000):
@@ -476,15 +1069,25 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
     Fetch messages with smart pagination - goes back in time until reaching the desired time range.
     Only returns messages within the specified time range.
     """
-    headers = {"Authorization": f"Bot {bot_token}"}
-    url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+    target_start, target_end = _resolve_time_window(time_filter, timezone, start_time_str, end_time_str)
+    
+    # If no time range specified, just return recent messages
+    if not target_start and not target_end:
+        headers = {"Authorization": f"Bot {bot_token}"}
+        url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+        response = requests.get(url, headers=headers, params={"limit": 100}, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        return []
     
     all_messages = []
-    oldest_message_id = None
-    messages_fetched = 0
-    max_iterations = 50  # Safety limit (50 * 100 = 5000 messages max) - increased for active chats
+    for page in _iter_message_pages(bot_token, channel_id, timezone, target_start, target_end, max_messages):
+        all_messages.extend(page)
     
-    # Calculate the time range we're looking for
+    return all_messages
+
+def _resolve_time_window(time_filter, timezone, start_time_str=None, end_time_str=None):
+    """Calculate the (target_start, target_end) range for a time filter / custom times. Either may be None."""
     now = datetime.now(ZoneInfo(timezone))
     target_start = None
     target_end = None
@@ -529,14 +1132,24 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
         # Weekday filter without custom time - use end of day
         target_end = reference_day.replace(hour=23, minute=59, second=59, microsecond=999999)
     
-    # If no time range specified, just return recent messages
-    if not target_start and not target_end:
-        response = requests.get(url, headers=headers, params={"limit": 100}, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return []
+    return target_start, target_end
+
+def _iter_message_pages(bot_token, channel_id, timezone, target_start=None, target_end=None, max_messages=5000, progress=None):
+    """
+    Generator: page backwards through a channel (100 messages per request) and yield
+    the in-range messages of each page. Stops once the page reaches before target_start,
+    the history ends, or max_messages were fetched. Callers can stream without buffering.
+    If a progress dict is passed, progress["truncated"] is set when the message limit
+    stopped the walk before the window start / end of history was reached, and
+    progress["error"] holds the HTTP status and text of a page request that failed.
+    """
+    headers = {"Authorization": f"Bot {bot_token}"}
+    url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+    
+    oldest_message_id = None
+    messages_fetched = 0
+    max_iterations = 50  # Safety limit (50 * 100 = 5000 messages max) - increased for active chats
     
-    # Pagination loop
     for iteration in range(max_iterations):
         params = {"limit": 100}
         if oldest_message_id:
@@ -545,6 +1158,8 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
         response = requests.get(url, headers=headers, params=params, timeout=10)
         
         if response.status_code != 200:
+            if progress is not None:
+                progress["error"] = f"HTTP {response.status_code}: {response.text}"
             break
         
         batch = response.json()
@@ -554,6 +1169,7 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
         messages_fetched += len(batch)
         
         # Check messages in batch
+        in_range_messages = []
         for msg in batch:
             msg_time = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
             msg_time_local = msg_time.astimezone(ZoneInfo(timezone))
@@ -566,7 +1182,9 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
                 in_range = False
             
             if in_range:
-                all_messages.append(msg)
+                in_range_messages.append(msg)
+        
+        yield in_range_messages
         
         # Check if we've gone too far back in time
         oldest_msg_in_batch = batch[-1]
@@ -580,11 +1198,120 @@ def _fetch_messages_with_pagination(bot_token, channel_id, time_filter, timezone
         # Set up for next iteration
         oldest_message_id = batch[-1]["id"]
         
-        # Safety check
-        if messages_fetched >= max_messages:
+        # Safety check (a short page means the history ended - nothing was cut off)
+        if messages_fetched >= max_messages or iteration == max_iterations - 1:
+            if progress is not None and len(batch) == 100:
+                progress["truncated"] = True
             break
+
+def _channel_digest(bot_token, target, target_type, time_filter, timezone, search_keywords=None, start_time=None, end_time=None):
+    """
+    Summarize channel activity WITHOUT returning messages: streams pages and keeps
+    constant-memory aggregates (per author, hour-of-day, day, attachments) plus top
+    terms via a bounded Space-Saving heavy-hitters sketch.
+    """
+    MAX_MESSAGES = 5000
+    SKETCH_SIZE = 64  # Max tracked terms (memory bound of the heavy-hitters sketch)
+    TOP_N = 10
+    STOPWORDS = {
+        "the", "and", "for", "you", "that", "this", "with", "are", "was", "have", "but", "not", "just",
+        "your", "what", "all", "can", "its", "it's", "i'm", "der", "die", "das", "und", "ich", "nicht",
+        "ist", "mit", "den", "ein", "eine", "auf", "auch", "sie", "wir", "was", "aber", "dass", "https"
+    }
     
-    return all_messages
+    channel_id, error = _resolve_channel_id(bot_token, target, target_type)
+    if error:
+        return error
+    
+    target_start, target_end = _resolve_time_window(time_filter, timezone, start_time, end_time)
+    keyword_list = [k.strip().lower() for k in (search_keywords or "").replace(",", " ").split() if k.strip()]
+    
+    total = 0
+    pages = 0
+    per_author = {}
+    per_hour = [0] * 24
+    per_day = {}
+    attachment_count = 0
+    messages_with_attachments = 0
+    first_time = None
+    last_time = None
+    term_counts = {}  # Space-Saving sketch: term -> (over)estimated count
+    progress = {"truncated": False, "error": None}
+    
+    for page in _iter_message_pages(bot_token, channel_id, timezone, target_start, target_end, MAX_MESSAGES, progress):
+        pages += 1
+        for msg in page:
+            content = msg.get("content", "") or ""
+            lowered = content.lower()
+            if keyword_list and not any(keyword in lowered for keyword in keyword_list):
+                continue
+            
+            total += 1
+            msg_time_local = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00")).astimezone(ZoneInfo(timezone))
+            if not last_time:
+                last_time = msg_time_local
+            first_time = msg_time_local
+            
+            author = msg["author"]["username"]
+            per_author[author] = per_author.get(author, 0) + 1
+            per_hour[msg_time_local.hour] += 1
+            day = msg_time_local.strftime("%Y-%m-%d")
+            per_day[day] = per_day.get(day, 0) + 1
+            
+            attachments = msg.get("attachments") or []
+            if attachments:
+                attachment_count += len(attachments)
+                messages_with_attachments += 1
+            
+            for term in re.findall(r"[\w']{3,}", lowered):
+                if term in STOPWORDS or term.isdigit():
+                    continue
+                if term in term_counts:
+                    term_counts[term] += 1
+                elif len(term_counts) < SKETCH_SIZE:
+                    term_counts[term] = 1
+                else:
+                    # Replace the smallest counter; the newcomer inherits its count
+                    smallest = min(term_counts, key=term_counts.get)
+                    term_counts[term] = term_counts.pop(smallest) + 1
+    
+    if progress["error"] and not pages:
+        return {"status": "error", "message": f"Failed to read messages: {progress['error']}"}
+    
+    top_authors = sorted(per_author.items(), key=lambda item: item[1], reverse=True)[:TOP_N]
+    top_terms = sorted(term_counts.items(), key=lambda item: item[1], reverse=True)[:TOP_N]
+    busiest_hour = max(range(24), key=lambda hour: per_hour[hour]) if total else None
+    
+    filter_desc = _describe_filters(time_filter, search_keywords, start_time, end_time)
+    message_text = f"Digest of {total} message(s) from {len(per_author)} author(s){filter_desc}"
+    if top_authors:
+        message_text += f" - most active: {top_authors[0][0]} ({top_authors[0][1]})"
+    if progress["error"]:
+        # A later page failed - the counts only cover the pages read before it
+        message_text += f" (partial: page {pages + 1} failed with {progress['error']})"
+    
+    return {
+        "status": "success",
+        "message": message_text,
+        "channel_id": channel_id,
+        "total_messages": total,
+        "pages_fetched": pages,
+        "first_message": first_time.strftime("%Y-%m-%d %H:%M:%S %z") if first_time else None,
+        "last_message": last_time.strftime("%Y-%m-%d %H:%M:%S %z") if last_time else None,
+        "unique_authors": len(per_author),
+        "top_authors": [{"author": author, "messages": count} for author, count in top_authors],
+        "messages_per_hour": {f"{hour:02d}": count for hour, count in enumerate(per_hour) if count},
+        "busiest_hour": f"{busiest_hour:02d}:00" if busiest_hour is not None else None,
+        "messages_per_day": dict(sorted(per_day.items())),
+        "attachments": attachment_count,
+        "messages_with_attachments": messages_with_attachments,
+        "top_terms": [{"term": term, "count": count} for term, count in top_terms],
+        "timezone": timezone,
+        "time_filter": time_filter,
+        "truncated": progress["truncated"],
+        "partial": bool(progress["error"]),
+        "error": progress["error"]
+    }
 
 def _list_guilds(bot_token, include_channels=True):
     """
@@ -1281,7 +2008,20 @@ def _execute_batch(operations, bot_token, tasks_channel_id, heartbeat_log_channe
                     operation.get("target_type"),
                     operation.get("mention_users"),
                     operation.get("ping_everyone", False),
-                    operation.get("ping_here", False)
+                    operation.get("ping_here", False),
+                    operation.get("attachment_threshold")
+                )
+            elif action == "read_messages" and operation.get("targets"):
+                result = _read_messages_multi(
+                    bot_token,
+                    operation.get("targets"),
+                    operation.get("limit", 50),
+                    operation.get("time_filter", "all"),
+                    operation.get("timezone", "Europe/Berlin"),
+                    operation.get("show_both", True),
+                    operation.get("search_keywords"),
+                    operation.get("start_time"),
+                    operation.get("end_time")
                 )
             elif action == "read_messages":
                 result = _read_messages(
@@ -1294,6 +2034,32 @@ def _execute_batch(operations, bot_token, tasks_channel_id, heartbeat_log_channe
                     operation.get("show_both", True),
                     operation.get("search_keywords"),
                     operation.get("start_time"),
+                    operation.get("end_time"),
+                    operation.get("include_threads", False),
+                    operation.get("include_archived", False),
+                    operation.get("thread_limit", 20),
+                    operation.get("fetch_attachments", False)
+                )
+            elif action == "read_context":
+                result = _read_context(
+                    bot_token,
+                    operation.get("target"),
+                    operation.get("target_type", "channel"),
+                    operation.get("message_id"),
+                    operation.get("message_ids"),
+                    operation.get("context_limit", 20),
+                    operation.get("timezone", "Europe/Berlin"),
+                    operation.get("show_both", True)
+                )
+            elif action == "channel_digest":
+                result = _channel_digest(
+                    bot_token,
+                    operation.get("target"),
+                    operation.get("target_type"),
+                    operation.get("time_filter", "all"),
+                    operation.get("timezone", "Europe/Berlin"),
+                    operation.get("search_keywords"),
+                    operation.get("start_time"),
                     operation.get("end_time")
                 )
             elif action == "list_guilds":
@@ -31,9 +31,23 @@ send_heartbeat(temperature="scorching", whisper="I want to make your heartbeat s
 import requests
 import os
 import json
+import time
+import tempfile
+import contextlib
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+try:
+    import fcntl  # POSIX file locks for the shared Spotify cache files
+except ImportError:
+    fcntl = None
+
+# Shared with spotify_control (same files, same format) - keep in sync
+SPOTIFY_API_BASE = os.getenv("SPOTIFY_API_BASE", "https://api.spotify.com/v1")
+SPOTIFY_TOKEN_URL = os.getenv("SPOTIFY_TOKEN_URL", "https://accounts.spotify.com/api/token")
+SPOTIFY_CACHE_DIR = os.getenv("SPOTIFY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "spotify_tool_cache"))
+NOW_PLAYING_TTL_SECONDS = 5
+
 
 def send_heartbeat(
     temperature: str,
@@ -176,45 +190,17 @@ def _get_spotify_now_playing():
         return None
 
     try:
-        # Get access token
-        token_url = "https://accounts.spotify.com/api/token"
-        token_data = {
-            "grant_type": "refresh_token",
-            "refresh_token": SPOTIFY_REFRESH_TOKEN
-        }
-        token_headers = {
-            "Authorization": f"Basic {_base64_encode(f'{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}')}"
-        }
-
-        token_response = requests.post(token_url, data=token_data, headers=token_headers, timeout=5)
-
-        if token_response.status_code != 200:
-            return None
-
-        access_token = token_response.json().get("access_token")
-
-        # Get currently playing
-        playing_url = "https://api.spotify.com/v1/me/player/currently-playing"
-        playing_headers = {"Authorization": f"Bearer {access_token}"}
-
-        playing_response = requests.get(playing_url, headers=playing_headers, timeout=5)
-
-        if playing_response.status_code == 204:
-            return None  # Nothing playing
+        # Shared snapshot - usually no Spotify call (and no token) needed at all
+        snapshot = _get_now_playing_snapshot(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_REFRESH_TOKEN)
 
-        if playing_response.status_code != 200:
+        if not snapshot or not snapshot.get("item"):
             return None
 
-        data = playing_response.json()
-
-        if not data or not data.get("item"):
-            return None
-
-        track = data["item"]
-        artists = ", ".join([artist["name"] for artist in track.get("artists", [])])
+        track = snapshot["item"]
+        artists = ", ".join(track.get("artists", []))
         track_name = track.get("name", "Unknown")
 
-        progress_ms = data.get("progress_ms", 0)
+        progress_ms = snapshot.get("progress_ms", 0)
         duration_ms = track.get("duration_ms", 0)
 
         progress_min = progress_ms // 60000
@@ -228,6 +214,153 @@ def _get_spotify_now_playing():
         return None
 
 
+@contextlib.contextmanager
+def _spotify_cache_lock(path):
+    """Exclusive lock on <path>.lock (same protocol as spotify_control); no-op if unavailable."""
+    lock_file = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(path + ".lock", "a")
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+    except OSError:
+        pass  # No usable cache dir - proceed unlocked
+
+    try:
+        yield
+    finally:
+        if lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+
+def _write_spotify_cache(path, data):
+    """Atomic write so the other tool never reads a partial file."""
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+
+def _get_now_playing_snapshot(client_id, client_secret, refresh_token):
+    """
+    Now-playing snapshot shared with spotify_control (now_playing.json).
+    Only fetched from Spotify when older than NOW_PLAYING_TTL_SECONDS, so a burst
+    of heartbeats and music queries costs one call per window.
+    """
+    path = os.path.join(SPOTIFY_CACHE_DIR, "now_playing.json")
+
+    def read_fresh():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("client_id") == client_id and time.time() - snapshot.get("fetched_at", 0) < NOW_PLAYING_TTL_SECONDS:
+            return snapshot
+        return None
+
+    snapshot = read_fresh()
+    if snapshot is None:
+        with _spotify_cache_lock(path):
+            # Another process may have fetched while we waited for the lock
+            snapshot = read_fresh()
+            if snapshot is None:
+                access_token = _get_spotify_access_token(client_id, client_secret, refresh_token)
+                if not access_token:
+                    return None
+
+                playing_response = requests.get(
+                    f"{SPOTIFY_API_BASE}/me/player/currently-playing",
+                    headers={"Authorization": f"Bearer {access_token}"},
+                    timeout=5
+                )
+
+                if playing_response.status_code == 204:
+                    data = {}  # Nothing playing
+                elif playing_response.status_code == 200:
+                    data = playing_response.json() or {}
+                else:
+                    return None
+
+                item = data.get("item")
+                snapshot = {
+                    "fetched_at": time.time(),
+                    "client_id": client_id,
+                    "is_playing": bool(data.get("is_playing")) and bool(item),
+                    "progress_ms": data.get("progress_ms") or 0,
+                    "item": {
+                        "id": item.get("id"),
+                        "uri": item.get("uri"),
+                        "name": item.get("name", "Unknown"),
+                        "artists": [a.get("name", "") for a in item.get("artists", [])],
+                        "album": (item.get("album") or {}).get("name", ""),
+                        "duration_ms": item.get("duration_ms", 0)
+                    } if item else None
+                }
+                _write_spotify_cache(path, snapshot)
+
+    # Progress moves on while the snapshot is reused
+    if snapshot["is_playing"] and snapshot["item"]:
+        elapsed_ms = int((time.time() - snapshot["fetched_at"]) * 1000)
+        snapshot["progress_ms"] = min(snapshot["progress_ms"] + elapsed_ms, snapshot["item"]["duration_ms"])
+    return snapshot
+
+
+def _get_spotify_access_token(client_id, client_secret, refresh_token):
+    """
+    Get a Spotify access token from the token store shared with spotify_control
+    (same file + lock protocol), refreshing only when it is missing or expired.
+    """
+    store_path = os.path.join(SPOTIFY_CACHE_DIR, "token.json")
+
+    def read_valid_token():
+        try:
+            with open(store_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("client_id") == client_id and int(time.time() * 1000) < stored.get("expires_at", 0) - 60000:
+            return stored.get("access_token")
+        return None
+
+    # Fast path: valid token in the store, no lock needed
+    token = read_valid_token()
+    if token:
+        return token
+
+    with _spotify_cache_lock(store_path):
+        # Another process may have refreshed while we waited for the lock
+        token = read_valid_token()
+        if token:
+            return token
+
+        token_response = requests.post(
+            SPOTIFY_TOKEN_URL,
+            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+            headers={"Authorization": f"Basic {_base64_encode(f'{client_id}:{client_secret}')}"},
+            timeout=5
+        )
+
+        if token_response.status_code != 200:
+            return None
+
+        token_json = token_response.json()
+        access_token = token_json.get("access_token")
+
+        _write_spotify_cache(store_path, {
+            "access_token": access_token,
+            "expires_at": int(time.time() * 1000) + token_json.get("expires_in", 3600) * 1000,
+            "client_id": client_id
+        })
+
+        return access_token
+
+
 def _get_weather():
     """Get current weather (if API available)."""
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
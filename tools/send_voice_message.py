@@ -4,9 +4,16 @@ Sendet Sprachnachrichten über Discord mit ElevenLabs Text-to-Speech
 """
 
 import requests
+import io
 import os
 import sys
-from typing import Optional
+import json
+import time
+import hashlib
+import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, BinaryIO
 
 # Configuration from environment
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN", "")
@@ -20,9 +27,229 @@ MAX_AUDIO_SIZE_MB = 25
 
 # Timeout configuration
 ELEVENLABS_TIMEOUT = 300  # 5 minutes for TTS generation
+ELEVENLABS_CONNECT_TIMEOUT = 10
+DISCORD_DM_TIMEOUT = 10  # DM channel creation
 DISCORD_UPLOAD_TIMEOUT_BASE = 60  # Base timeout: 60 seconds
 DISCORD_UPLOAD_TIMEOUT_PER_MB = 10  # Additional 10 seconds per MB
 
+# Streaming: audio arrives from ElevenLabs' /stream endpoint while it is generated and is
+# spooled to a temp file chunk by chunk - memory stays flat however long the message is
+ELEVENLABS_STREAMING = os.getenv("ELEVENLABS_STREAMING", "true").lower() != "false"
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+# Content-addressed audio cache: identical lines (greetings, sign-offs) are synthesized once.
+# Oldest-used files are evicted beyond ELEVENLABS_CACHE_MAX_MB (0 = cache disabled)
+ELEVENLABS_CACHE_DIR = os.getenv("ELEVENLABS_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "elevenlabs_tts_cache")
+ELEVENLABS_CACHE_MAX_MB = float(os.getenv("ELEVENLABS_CACHE_MAX_MB", "200"))
+
+
+def _tts_cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict[str, Any]) -> str:
+    """sha256 over everything that changes the generated audio (whitespace-normalized text)."""
+    key_data = {
+        "text": " ".join(text.split()),
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "voice_settings": voice_settings
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _tts_cache_path(key: str) -> str:
+    return os.path.join(ELEVENLABS_CACHE_DIR, f"{key}.mp3")
+
+
+def _tts_cache_get(key: str) -> Optional[BinaryIO]:
+    """
+    Open the cached MP3 for this key (and mark it as recently used), or None.
+    
+    The file is opened here so an eviction right after the lookup cannot pull
+    it away - the open handle stays readable. Any failure counts as a miss.
+    """
+    if ELEVENLABS_CACHE_MAX_MB <= 0:
+        return None
+    path = _tts_cache_path(key)
+    try:
+        cached = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        os.utime(path)  # mtime = last use, drives LRU eviction
+    except OSError:
+        pass
+    return cached
+
+
+def _tts_cache_evict() -> None:
+    """Delete least recently used MP3s until the cache fits ELEVENLABS_CACHE_MAX_MB."""
+    max_bytes = ELEVENLABS_CACHE_MAX_MB * 1024 * 1024
+    entries = []
+    total = 0
+    try:
+        with os.scandir(ELEVENLABS_CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(".mp3"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    except OSError:
+        return
+    
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _open_audio_spool() -> BinaryIO:
+    """
+    File to synthesize into: a part file inside the cache dir (so a finished
+    synthesis becomes a cache entry by rename), else an anonymous temp file.
+    """
+    if ELEVENLABS_CACHE_MAX_MB > 0:
+        try:
+            os.makedirs(ELEVENLABS_CACHE_DIR, exist_ok=True)
+            return tempfile.NamedTemporaryFile(dir=ELEVENLABS_CACHE_DIR, suffix=".part", delete=False)
+        except OSError:
+            pass
+    return tempfile.TemporaryFile()
+
+
+def _resolve_channel(target: str, target_type: str) -> Dict[str, Any]:
+    """
+    Discord channel for the target: creates/gets the DM channel for users.
+    
+    Returns:
+        Dict mit channel_id, is_dm und error (None bei Erfolg)
+    """
+    if target_type == "user" or (target_type == "auto" and target.startswith("7")):
+        # Try to create DM channel
+        dm_url = "https://discord.com/api/v10/users/@me/channels"
+        dm_response = requests.post(
+            dm_url,
+            headers={"Authorization": f"Bot {DISCORD_BOT_TOKEN}", "Content-Type": "application/json"},
+            json={"recipient_id": target},
+            timeout=DISCORD_DM_TIMEOUT
+        )
+        if dm_response.status_code == 200:
+            return {"channel_id": dm_response.json()["id"], "is_dm": True, "error": None}
+        return {"channel_id": None, "is_dm": True, "error": f"Failed to create DM channel: {dm_response.text}"}
+    
+    return {"channel_id": target, "is_dm": False, "error": None}
+
+
+def _synthesize_to_file(url: str, request_body: Dict[str, Any], headers: Dict[str, str], out: BinaryIO) -> Dict[str, Any]:
+    """
+    Stream ElevenLabs audio into an open file as it arrives.
+    
+    Aborts as soon as the audio exceeds MAX_AUDIO_SIZE_MB or the whole
+    synthesis takes longer than ELEVENLABS_TIMEOUT.
+    
+    Returns:
+        Dict mit size (bytes), first_byte_ms und error (None bei Erfolg)
+    """
+    start = time.perf_counter()
+    max_bytes = MAX_AUDIO_SIZE_MB * 1024 * 1024
+    size = 0
+    first_byte_ms = None
+    
+    with requests.post(
+        url,
+        json=request_body,
+        headers=headers,
+        stream=True,
+        timeout=(ELEVENLABS_CONNECT_TIMEOUT, ELEVENLABS_TIMEOUT)
+    ) as tts_response:
+        if tts_response.status_code != 200:
+            error_detail = tts_response.text
+            try:
+                error_json = tts_response.json()
+                if "detail" in error_json:
+                    error_detail = error_json["detail"].get("message", str(error_json))
+            except:
+                pass
+            return {"size": 0, "first_byte_ms": None, "error": f"ElevenLabs API error ({tts_response.status_code}): {error_detail}"}
+        
+        for chunk in tts_response.iter_content(chunk_size=AUDIO_CHUNK_SIZE):
+            if not chunk:
+                continue
+            if first_byte_ms is None:
+                first_byte_ms = round((time.perf_counter() - start) * 1000)
+            size += len(chunk)
+            if size > max_bytes:
+                return {"size": size, "first_byte_ms": first_byte_ms,
+                        "error": f"Audio file too large (>{MAX_AUDIO_SIZE_MB}MB). Maximum is {MAX_AUDIO_SIZE_MB}MB."}
+            if time.perf_counter() - start > ELEVENLABS_TIMEOUT:
+                raise requests.exceptions.Timeout(f"TTS generation exceeded {ELEVENLABS_TIMEOUT}s")
+            out.write(chunk)
+    
+    out.flush()
+    return {"size": size, "first_byte_ms": first_byte_ms, "error": None}
+
+
+class _MultipartUpload:
+    """
+    multipart/form-data body that streams the audio file instead of loading it.
+    
+    File-like (read) and iterable with a known length, so requests sends it with
+    a Content-Length header in AUDIO_CHUNK_SIZE pieces.
+    """
+    
+    def __init__(self, fileobj: BinaryIO, size: int, filename: str, content_type: str,
+                 payload_json: Optional[Dict[str, Any]] = None):
+        self.boundary = uuid.uuid4().hex
+        head = b""
+        if payload_json:
+            head += (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="payload_json"\r\n'
+                f"Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(payload_json)}\r\n"
+            ).encode("utf-8")
+        head += (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        
+        fileobj.seek(0)
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+    
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while self._parts and (size < 0 or size > 0):
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+    
+    def __iter__(self):
+        while True:
+            chunk = self.read(AUDIO_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
 
 def send_voice_message(
     text: str,
@@ -78,12 +305,22 @@ def send_voice_message(
             "message": f"Text too long ({len(sanitized_text)} chars). Maximum is {MAX_TEXT_LENGTH} characters."
         }
     
+    timings = {}
+    started = time.perf_counter()
+    phase = "ElevenLabs TTS generation"
+    discord_upload_timeout = None
+    channel_pool = ThreadPoolExecutor(max_workers=1)
+    audio_file = None
+    spool_path = None
+    
     try:
         # Step 1: Generate audio using ElevenLabs API
         voice_id_to_use = voice_id or ELEVENLABS_VOICE_ID
         model_id_to_use = model_id or ELEVENLABS_MODEL_ID
         
         elevenlabs_url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id_to_use}"
+        if ELEVENLABS_STREAMING:
+            elevenlabs_url += "/stream"
         
         headers = {
             "xi-api-key": ELEVENLABS_API_KEY,
@@ -118,104 +355,109 @@ def send_voice_message(
         
         request_body["voice_settings"] = voice_settings
         
-        # Generate audio with progress logging
-        print(f"🎤 STEP 1: Generating voice message with ElevenLabs (text length: {len(sanitized_text)} chars)...")
-        print(f"   This may take a while for long messages, please wait...", flush=True)
-        sys.stdout.flush()
-        
-        tts_response = requests.post(
-            elevenlabs_url,
-            json=request_body,
-            headers=headers,
-            timeout=ELEVENLABS_TIMEOUT
-        )
-        
-        if tts_response.status_code != 200:
-            error_detail = tts_response.text
+        # Resolve the Discord channel (DM creation) while the audio is being generated
+        def resolve_channel_timed() -> Dict[str, Any]:
+            resolve_start = time.perf_counter()
             try:
-                error_json = tts_response.json()
-                if "detail" in error_json:
-                    error_detail = error_json["detail"].get("message", str(error_json))
-            except:
-                pass
-            
-            return {
-                "status": "error",
-                "message": f"ElevenLabs API error ({tts_response.status_code}): {error_detail}"
-            }
+                return _resolve_channel(target, target_type)
+            finally:
+                timings["channel_resolve_ms"] = round((time.perf_counter() - resolve_start) * 1000)
         
-        audio_data = tts_response.content
+        channel_future = channel_pool.submit(resolve_channel_timed)
         
-        # Security: Validate audio size
-        audio_size_mb = len(audio_data) / (1024 * 1024)
-        print(f"✅ STEP 1 COMPLETE: Audio generated ({audio_size_mb:.2f}MB, {len(audio_data)} bytes)", flush=True)
-        sys.stdout.flush()
+        cache_key = _tts_cache_key(sanitized_text, voice_id_to_use, model_id_to_use, voice_settings)
+        audio_file = _tts_cache_get(cache_key)
+        cache_hit = audio_file is not None
         
-        if audio_size_mb > MAX_AUDIO_SIZE_MB:
-            return {
-                "status": "error",
-                "message": f"Audio file too large ({audio_size_mb:.2f}MB). Maximum is {MAX_AUDIO_SIZE_MB}MB."
-            }
+        if cache_hit:
+            # Cache hit: no synthesis at all, straight to upload
+            audio_size = os.fstat(audio_file.fileno()).st_size
+            audio_size_mb = audio_size / (1024 * 1024)
+            print(f"♻️ STEP 1 SKIPPED: Audio served from cache ({audio_size_mb:.2f}MB, {audio_size} bytes)", flush=True)
+            sys.stdout.flush()
+        else:
+            # Generate audio with progress logging
+            mode = "streaming" if ELEVENLABS_STREAMING else "buffered"
+            print(f"🎤 STEP 1: Generating voice message with ElevenLabs ({mode}, text length: {len(sanitized_text)} chars)...")
+            print(f"   This may take a while for long messages, please wait...", flush=True)
+            sys.stdout.flush()
+            
+            audio_file = _open_audio_spool()
+            spool_path = audio_file.name if isinstance(audio_file.name, str) else None
+            
+            synthesis_start = time.perf_counter()
+            synthesis = _synthesize_to_file(elevenlabs_url, request_body, headers, audio_file)
+            timings["synthesis_ms"] = round((time.perf_counter() - synthesis_start) * 1000)
+            timings["synthesis_first_byte_ms"] = synthesis["first_byte_ms"]
+            
+            if synthesis["error"]:
+                return {
+                    "status": "error",
+                    "message": synthesis["error"]
+                }
+            
+            audio_size = synthesis["size"]
+            audio_size_mb = audio_size / (1024 * 1024)
+            print(f"✅ STEP 1 COMPLETE: Audio generated ({audio_size_mb:.2f}MB, {audio_size} bytes)", flush=True)
+            sys.stdout.flush()
+            
+            # Finished part file becomes the cache entry (atomic rename; the open handle stays valid)
+            if spool_path and audio_size > 0:
+                try:
+                    os.replace(spool_path, _tts_cache_path(cache_key))
+                    spool_path = None
+                    _tts_cache_evict()
+                except OSError:
+                    pass
         
         # Step 2: Send to Discord
         # Calculate dynamic timeout based on file size (larger files need more time)
         discord_upload_timeout = DISCORD_UPLOAD_TIMEOUT_BASE + int(audio_size_mb * DISCORD_UPLOAD_TIMEOUT_PER_MB)
         # Cap at 5 minutes maximum
         discord_upload_timeout = min(discord_upload_timeout, 300)
+        phase = "Discord DM channel creation"
         
+        # Usually resolved long ago - only waits if DM creation was slower than synthesis
+        wait_start = time.perf_counter()
+        channel = channel_future.result()
+        timings["channel_wait_ms"] = round((time.perf_counter() - wait_start) * 1000)
+        if channel["error"]:
+            return {
+                "status": "error",
+                "message": channel["error"]
+            }
+        channel_id = channel["channel_id"]
+        is_dm = channel["is_dm"]
+        
+        phase = "Discord upload"
         print(f"📤 STEP 2: Uploading to Discord ({audio_size_mb:.2f}MB, timeout: {discord_upload_timeout}s)...", flush=True)
         sys.stdout.flush()
-        discord_headers = {
-            "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
         
-        # Determine channel ID
-        channel_id = None
-        is_dm = False
-        
-        if target_type == "user" or (target_type == "auto" and target.startswith("7")):
-            # Try to create DM channel
-            dm_url = "https://discord.com/api/v10/users/@me/channels"
-            dm_data = {"recipient_id": target}
-            dm_response = requests.post(dm_url, headers=discord_headers, json=dm_data, timeout=10)
-            
-            if dm_response.status_code == 200:
-                channel_id = dm_response.json()["id"]
-                is_dm = True
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Failed to create DM channel: {dm_response.text}"
-                }
-        else:
-            channel_id = target
-            is_dm = False
-        
-        # Prepare Discord message with audio attachment
-        # Discord requires multipart/form-data for file uploads
-        files = {
-            "file": ("voice_message.mp3", audio_data, "audio/mpeg")
-        }
-        
-        data = {}
+        # Discord requires multipart/form-data for file uploads; the body streams from the temp file
+        payload_json = None
         if reply_to_message_id:
-            data["message_reference"] = {
-                "message_id": reply_to_message_id
+            payload_json = {
+                "message_reference": {
+                    "message_id": reply_to_message_id
+                }
             }
+        upload = _MultipartUpload(audio_file, audio_size, "voice_message.mp3", "audio/mpeg", payload_json)
         
         # Send message with attachment
         message_url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
         
-        # Use requests with files parameter for multipart upload
         # Dynamic timeout based on file size - larger files need more time
+        upload_start = time.perf_counter()
         send_response = requests.post(
             message_url,
-            headers={"Authorization": f"Bot {DISCORD_BOT_TOKEN}"},  # Don't set Content-Type, requests will set it
-            files=files,
-            data=data,
+            headers={
+                "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
+                "Content-Type": upload.content_type
+            },
+            data=upload,
             timeout=discord_upload_timeout
         )
+        timings["upload_ms"] = round((time.perf_counter() - upload_start) * 1000)
         
         if send_response.status_code not in (200, 201):
             print(f"❌ STEP 2 FAILED: Discord returned {send_response.status_code}", flush=True)
@@ -226,7 +468,9 @@ def send_voice_message(
             }
         
         sent_message = send_response.json()
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000)
         print(f"✅ STEP 2 COMPLETE: Voice message sent successfully to Discord!", flush=True)
+        print(f"⏱️ Timings (ms): {timings}", flush=True)
         sys.stdout.flush()
         
         # Build result
@@ -243,22 +487,21 @@ def send_voice_message(
             "text_length": len(sanitized_text),
             "voice_id": voice_id_to_use,
             "model_id": model_id_to_use,
+            "streamed": ELEVENLABS_STREAMING and not cache_hit,
+            "cached": cache_hit,
+            "timings_ms": timings,
             "timestamp": sent_message.get("timestamp")
         }
         
         return result
         
     except requests.exceptions.Timeout as e:
-        # Try to determine which request timed out based on error context
-        error_msg = str(e)
-        # Check if we're in the Discord upload phase (discord_upload_timeout would be defined)
-        if 'discord_upload_timeout' in locals():
-            timeout_source = "Discord upload"
-            timeout_duration = discord_upload_timeout
-        else:
-            # Must be ElevenLabs TTS generation phase
-            timeout_source = "ElevenLabs TTS generation"
-            timeout_duration = ELEVENLABS_TIMEOUT
+        # The phase tells which request timed out
+        timeout_source = phase
+        timeout_duration = {
+            "Discord DM channel creation": DISCORD_DM_TIMEOUT,
+            "Discord upload": discord_upload_timeout
+        }.get(phase, ELEVENLABS_TIMEOUT)
         
         print(f"⏰ TIMEOUT: {timeout_source} timed out after {timeout_duration}s", flush=True)
         sys.stdout.flush()
@@ -277,4 +520,14 @@ def send_voice_message(
             "status": "error",
             "message": f"Unexpected error: {str(e)}"
         }
+    finally:
+        channel_pool.shutdown(wait=False)
+        if audio_file:
+            audio_file.close()
+        if spool_path:
+            # Failed or aborted synthesis - never leave partial audio in the cache dir
+            try:
+                os.remove(spool_path)
+            except OSError:
+                pass
 
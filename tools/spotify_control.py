@@ -7,28 +7,356 @@ Controls Spotify playback and manages playlists via Web API
 import os
 import json
 import time
-import urllib.request
+import gzip
+import sqlite3
+import zlib
+import hashlib
+import tempfile
+import threading
+import contextlib
+import http.client
 import urllib.parse
-import urllib.error
-from typing import Optional, Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import fcntl  # POSIX file locks for the shared cache files
+except ImportError:
+    fcntl = None
+
+try:
+    import numpy as np  # Optional: only the mood index (build_mood_index / play_mood) needs it
+except ImportError:
+    np = None
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-SPOTIFY_API_BASE = "https://api.spotify.com/v1"
+# Overridable so the tool can run against a local mock (see scripts/spotify_mock_server.py)
+SPOTIFY_API_BASE = os.getenv("SPOTIFY_API_BASE", "https://api.spotify.com/v1")
+SPOTIFY_TOKEN_URL = os.getenv("SPOTIFY_TOKEN_URL", "https://accounts.spotify.com/api/token")
 
 # Load Spotify credentials from environment variables
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID", "")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET", "")
 SPOTIFY_REFRESH_TOKEN = os.getenv("SPOTIFY_REFRESH_TOKEN", "")
 
-# In-memory token cache (since we can't write to filesystem in Letta cloud)
+# Local cache directory shared by all Spotify tools (token store, caches).
+# Every tool invocation is a fresh process - anything worth keeping lives here.
+SPOTIFY_CACHE_DIR = os.getenv("SPOTIFY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "spotify_tool_cache"))
+TOKEN_STORE_PATH = os.path.join(SPOTIFY_CACHE_DIR, "token.json")
+SEARCH_CACHE_PATH = os.path.join(SPOTIFY_CACHE_DIR, "search_cache.json")
+PLAYLIST_CATALOG_PATH = os.path.join(SPOTIFY_CACHE_DIR, "playlists.json")
+DEVICE_CACHE_PATH = os.path.join(SPOTIFY_CACHE_DIR, "devices.json")
+NOW_PLAYING_PATH = os.path.join(SPOTIFY_CACHE_DIR, "now_playing.json")
+TRACK_CACHE_PATH = os.path.join(SPOTIFY_CACHE_DIR, "tracks.json")
+LIBRARY_DB_PATH = os.path.join(SPOTIFY_CACHE_DIR, "spotify.db")  # SQLite: listening history, saved tracks
+MOOD_INDEX_PATH = os.path.join(SPOTIFY_CACHE_DIR, "mood_index.npz")  # NumPy: audio features of your tracks
+ETAG_CACHE_DIR = os.path.join(SPOTIFY_CACHE_DIR, "etag")  # One file per conditional-GET URL
+
+# Device to wake up when nothing is active (device name or ID; falls back to the last used device)
+SPOTIFY_PREFERRED_DEVICE = os.getenv("SPOTIFY_PREFERRED_DEVICE", "")
+DEVICE_CACHE_TTL_SECONDS = 30
+
+# Now-playing snapshot shared with send_heartbeat: one Spotify call per window
+NOW_PLAYING_TTL_SECONDS = 5
+
+# Query -> top result cache for programmatic lookups (play by name, multi-song adds)
+SEARCH_CACHE_TTL_SECONDS = 7 * 24 * 3600
+SEARCH_CACHE_MAX_ENTRIES = 2000
+
+# Conditional GETs (If-None-Match): playlist reads whose 304 is answered from ETAG_CACHE_DIR
+ETAG_CACHEABLE_PREFIXES = ("/playlists/", "/me/playlists")
+ETAG_CACHE_MAX_ENTRIES = 500
+ETAG_EVICT_EVERY = 50  # Writes between eviction scans (the first write of a process scans too)
+
+# Track ID -> name/artists for displaying raw IDs (GET /tracks takes up to 50 IDs per call)
+TRACK_LOOKUP_BATCH_SIZE = 50
+TRACK_CACHE_MAX_ENTRIES = 5000
+
+# In-memory token cache (backed by the file token store, shared with send_heartbeat)
 _token_cache = {
     "access_token": None,
     "expires_at": 0
 }
 
+# Parallel searches when resolving multi-song queries ("song1; song2; ...")
+MAX_SEARCH_WORKERS = 8
+
+# Spotify accepts at most 100 URIs per "add items to playlist" request
+PLAYLIST_ADD_CHUNK_SIZE = 100
+MAX_LISTED_TRACKS = 50  # Result messages list this many tracks, then summarize
+
+# Bulk queueing: an idle player gets ONE play request with up to this many URIs
+PLAY_URIS_MAX = 100
+
+# Local playlist catalog: re-synced (incrementally) when older than this
+PLAYLIST_CATALOG_MAX_AGE_SECONDS = 15 * 60
+
+# Listening history: listening_stats pulls new plays first when the last sync is older than this
+HISTORY_SYNC_MAX_AGE_SECONDS = 15 * 60
+HISTORY_PAGE_SIZE = 50  # recently-played maximum
+HISTORY_MAX_PAGES = 20
+HISTORY_PERIODS = {"day": 1, "week": 7, "month": 30}  # Calendar days, counted in LOCAL_TIMEZONE
+LOCAL_TIMEZONE = os.getenv("TIMEZONE", "Europe/Berlin")  # Same setting send_heartbeat uses
+
+# Saved-tracks export: offset pages in flight at once (the shared 429 back-off handles the rest)
+SAVED_TRACKS_PAGE_SIZE = 50
+LIBRARY_EXPORT_WORKERS = 4
+SAVED_TRACKS_FULL_EXPORT_MAX_AGE_SECONDS = 7 * 24 * 3600  # Catches unsaves the cheap checks can't see
+
+# Mood index: audio features of saved + playlist tracks, matched against per-temperature targets.
+# Columns of the feature matrix, all scaled to 0..1 (tempo: 60-180 BPM)
+AUDIO_FEATURES_BATCH_SIZE = 100
+MOOD_FEATURES = ("energy", "valence", "danceability", "acousticness", "instrumentalness", "tempo")
+MOOD_FEATURE_WEIGHTS = (1.5, 1.2, 0.8, 0.8, 0.4, 0.6)  # Energy and valence carry a mood the most
+# send_heartbeat temperatures -> target (energy, valence, danceability, acousticness, instrumentalness, tempo)
+MOOD_TARGETS = {
+    "warm": (0.45, 0.70, 0.55, 0.50, 0.10, 0.40),
+    "scorching": (0.90, 0.50, 0.65, 0.10, 0.10, 0.70),
+    "tender": (0.25, 0.45, 0.40, 0.75, 0.20, 0.30),
+    "race": (0.85, 0.65, 0.70, 0.10, 0.10, 0.90),
+    "stutter": (0.40, 0.30, 0.45, 0.55, 0.20, 0.45),
+    "aching": (0.30, 0.20, 0.35, 0.60, 0.20, 0.35),
+    "fierce": (0.90, 0.35, 0.55, 0.10, 0.15, 0.65),
+    "still": (0.15, 0.40, 0.30, 0.80, 0.50, 0.25),
+    "electric": (0.85, 0.80, 0.80, 0.10, 0.20, 0.75),
+    "languid": (0.30, 0.50, 0.50, 0.50, 0.30, 0.20),
+    "feral": (0.95, 0.35, 0.60, 0.05, 0.20, 0.80),
+    "breath-held": (0.35, 0.35, 0.35, 0.50, 0.50, 0.40),
+}
+MOOD_CANDIDATES_FACTOR = 3  # Pick randomly among the N*3 nearest tracks so a mood isn't always the same list
+# GET /audio-features answers 403 for apps registered after Nov 2024: after a 403 it isn't asked
+# again for a week, and tracks are placed from their artists' genres instead (GET /artists, 50 per request)
+AUDIO_FEATURES_RETRY_SECONDS = 7 * 24 * 3600
+ARTIST_LOOKUP_BATCH_SIZE = 50
+# Genre keyword (substring of a Spotify genre) -> approximate feature row, same order as MOOD_TARGETS
+MOOD_GENRE_HINTS = {
+    "metal": (0.95, 0.30, 0.40, 0.05, 0.20, 0.75),
+    "punk": (0.90, 0.50, 0.50, 0.05, 0.05, 0.85),
+    "hardcore": (0.95, 0.30, 0.45, 0.05, 0.10, 0.85),
+    "emo": (0.75, 0.25, 0.45, 0.10, 0.05, 0.65),
+    "rock": (0.75, 0.50, 0.50, 0.15, 0.10, 0.60),
+    "drum and bass": (0.95, 0.50, 0.65, 0.05, 0.50, 0.95),
+    "techno": (0.85, 0.40, 0.75, 0.05, 0.70, 0.60),
+    "house": (0.80, 0.65, 0.85, 0.05, 0.50, 0.55),
+    "edm": (0.90, 0.60, 0.75, 0.05, 0.40, 0.65),
+    "dance": (0.80, 0.70, 0.85, 0.10, 0.20, 0.55),
+    "disco": (0.75, 0.85, 0.85, 0.10, 0.10, 0.55),
+    "funk": (0.70, 0.80, 0.80, 0.15, 0.10, 0.50),
+    "latin": (0.75, 0.80, 0.80, 0.20, 0.05, 0.55),
+    "reggae": (0.55, 0.75, 0.80, 0.25, 0.05, 0.35),
+    "hip hop": (0.70, 0.55, 0.80, 0.10, 0.05, 0.45),
+    "rap": (0.70, 0.50, 0.80, 0.10, 0.05, 0.45),
+    "pop": (0.65, 0.65, 0.70, 0.20, 0.05, 0.50),
+    "indie": (0.55, 0.50, 0.55, 0.35, 0.10, 0.50),
+    "country": (0.55, 0.60, 0.60, 0.45, 0.05, 0.50),
+    "soul": (0.50, 0.60, 0.60, 0.40, 0.05, 0.40),
+    "r&b": (0.50, 0.55, 0.70, 0.25, 0.05, 0.40),
+    "blues": (0.45, 0.40, 0.50, 0.55, 0.10, 0.40),
+    "jazz": (0.35, 0.55, 0.55, 0.70, 0.40, 0.45),
+    "folk": (0.35, 0.50, 0.50, 0.80, 0.05, 0.40),
+    "singer-songwriter": (0.30, 0.40, 0.45, 0.80, 0.05, 0.35),
+    "acoustic": (0.30, 0.50, 0.50, 0.90, 0.10, 0.35),
+    "lo-fi": (0.30, 0.50, 0.65, 0.60, 0.70, 0.30),
+    "soundtrack": (0.35, 0.35, 0.30, 0.55, 0.80, 0.40),
+    "classical": (0.20, 0.40, 0.25, 0.90, 0.90, 0.35),
+    "ambient": (0.15, 0.35, 0.25, 0.70, 0.90, 0.20),
+}
+MOOD_INDEX_RETRY_SECONDS = 6 * 3600  # After a failed build, play_mood reports it instead of rebuilding each call
+
+# 429 handling: every thread waits out Retry-After together, then retries
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_AFTER_SECONDS = 30  # Longer bans are reported instead of slept through
+_rate_limit = {
+    "until": 0.0,
+    "lock": threading.Lock()
+}
+
+# execute_batch deadline: no request starts after it, and each one's timeout is cut to the time left
+HTTP_TIMEOUT_SECONDS = 10
+MIN_REQUEST_TIMEOUT_SECONDS = 1  # Never start a request with a uselessly short timeout
+BATCH_DEADLINE_ERROR = "Batch deadline reached - request not sent"
+_request_deadline = {
+    "at": None
+}
+
+# Within an execute_batch, repeated GETs of these stable endpoints are answered from memory
+MEMOIZED_ENDPOINTS = ("/me",)
+_request_memo = {
+    "depth": 0,
+    "responses": {},  # endpoint -> Future (concurrent callers wait for the one request in flight)
+    "lock": threading.Lock()
+}
+
+# Per-process ETag cache write counter: only every ETAG_EVICT_EVERY-th write scans the directory
+_etag_cache_writes = {
+    "count": 0,
+    "lock": threading.Lock()
+}
+
+# In-memory view of the search cache; loaded on first lookup, flushed once per tool call
+_search_cache = {
+    "entries": None,
+    "dirty": False,
+    "hits": 0,
+    "misses": 0,
+    "counted": set(),  # Keys a batch pre-resolution already counted - the op's own read doesn't count again
+    "lock": threading.Lock()
+}
+
+# =============================================================================
+# LOCAL CACHE FILES
+# =============================================================================
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """
+    Exclusive cross-process lock on '<path>.lock'.
+    Degrades to no locking where fcntl or the cache dir is unavailable.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(path + ".lock", "a")
+    except OSError:
+        yield
+        return
+    
+    with lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_json_file(path: str, default: Any = None) -> Any:
+    """Read a JSON cache file, returning default if missing or corrupt"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON via temp file + rename so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+
+# =============================================================================
+# HTTP TRANSPORT
+# =============================================================================
+
+# Persistent keep-alive connections, one per (scheme, host) per thread.
+# Reused for the life of the process: one TLS handshake instead of one per request.
+_connection_pool = threading.local()
+
+# Safe to resend after the server dropped a reused connection mid-response (a POST may
+# already have been applied - it is only retried when sending itself failed)
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+
+
+def _get_connection(scheme: str, netloc: str, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+    """Return (connection, reused) from the per-thread pool, opening one if needed"""
+    pool = _connection_pool.__dict__.setdefault("connections", {})
+    conn = pool.get((scheme, netloc))
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)  # The socket keeps the timeout it was opened with otherwise
+        return conn, True
+    
+    if scheme == "https":
+        conn = http.client.HTTPSConnection(netloc, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(netloc, timeout=timeout)
+    pool[(scheme, netloc)] = conn
+    return conn, False
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    """Close and forget a pooled connection"""
+    pool = _connection_pool.__dict__.setdefault("connections", {})
+    conn = pool.pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+def _http_request(
+    method: str,
+    url: str,
+    body: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 10
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Send a request over a pooled keep-alive connection with gzip/deflate support.
+    
+    Returns:
+        (status, lowercased response headers, decoded body bytes)
+    """
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    request_headers = {"Accept-Encoding": "gzip, deflate"}
+    request_headers.update(headers or {})
+    
+    while True:
+        conn, reused = _get_connection(parsed.scheme, parsed.netloc, timeout)
+        try:
+            conn.request(method, path, body=body, headers=request_headers)
+        except (http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError):
+            _drop_connection(parsed.scheme, parsed.netloc)
+            if reused:
+                continue  # Server closed the idle keep-alive connection - request never arrived, retry once
+            raise
+        except Exception:
+            _drop_connection(parsed.scheme, parsed.netloc)
+            raise
+        
+        try:
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError):
+            _drop_connection(parsed.scheme, parsed.netloc)
+            if reused and method in IDEMPOTENT_METHODS:
+                continue  # Closed while we were sending - harmless to repeat
+            raise
+        except Exception:
+            _drop_connection(parsed.scheme, parsed.netloc)
+            raise
+        break
+    
+    if response.will_close:
+        _drop_connection(parsed.scheme, parsed.netloc)
+    
+    response_headers = {key.lower(): value for key, value in response.getheaders()}
+    encoding = response_headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "deflate":
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)  # Raw deflate stream
+    
+    return response.status, response_headers, data
+
+
 # =============================================================================
 # AUTHENTICATION
 # =============================================================================
@@ -48,9 +376,18 @@ def load_spotify_config() -> Dict[str, Any]:
 
 
 def save_spotify_config(config: Dict[str, Any]) -> None:
-    """Save updated tokens to in-memory cache"""
+    """Save updated tokens to in-memory cache and the shared token store"""
     _token_cache["access_token"] = config.get("accessToken")
     _token_cache["expires_at"] = config.get("expiresAt", 0)
+    
+    try:
+        _write_json_atomic(TOKEN_STORE_PATH, {
+            "access_token": config.get("accessToken"),
+            "expires_at": config.get("expiresAt", 0),
+            "client_id": config["clientId"]
+        })
+    except OSError:
+        pass  # Read-only filesystem - in-memory cache still works
 
 
 def refresh_access_token(config: Dict[str, Any]) -> str:
@@ -62,36 +399,63 @@ def refresh_access_token(config: Dict[str, Any]) -> str:
         "client_secret": config["clientSecret"],
     }).encode('utf-8')
     
-    req = urllib.request.Request(
-        "https://accounts.spotify.com/api/token",
-        data=data,
-        method='POST'
+    status, _, body = _http_request(
+        "POST",
+        SPOTIFY_TOKEN_URL,
+        body=data,
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
     )
     
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            response_data = json.loads(response.read().decode('utf-8'))
-            config["accessToken"] = response_data["access_token"]
-            config["expiresAt"] = int(time.time() * 1000) + (response_data["expires_in"] * 1000)
-            save_spotify_config(config)
-            return response_data["access_token"]
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
-        raise Exception(f"Failed to refresh token: {error_body}")
+    if status != 200:
+        raise Exception(f"Failed to refresh token: {body.decode('utf-8', errors='replace')}")
+    
+    response_data = json.loads(body.decode('utf-8'))
+    config["accessToken"] = response_data["access_token"]
+    config["expiresAt"] = int(time.time() * 1000) + (response_data["expires_in"] * 1000)
+    save_spotify_config(config)
+    return response_data["access_token"]
 
 
 def get_access_token() -> str:
-    """Get valid access token, refreshing if necessary"""
+    """
+    Get valid access token, refreshing if necessary.
+    
+    The token is shared across processes via the file token store: one refresh
+    serves every tool call for the whole token lifetime (~60 min). The store is
+    locked while checking/refreshing so parallel calls don't all refresh at once.
+    """
     config = load_spotify_config()
     
     # Check if token is expired (with 60s buffer)
     current_time = int(time.time() * 1000)
     expires_at = config.get("expiresAt", 0)
     
-    if current_time >= (expires_at - 60000):
+    if current_time < (expires_at - 60000):
+        return config["accessToken"]
+    
+    with _file_lock(TOKEN_STORE_PATH):
+        # Another process may have refreshed while we waited for the lock
+        stored = _read_json_file(TOKEN_STORE_PATH, {})
+        if (stored.get("client_id") == config["clientId"] and stored.get("access_token")
+                and int(time.time() * 1000) < stored.get("expires_at", 0) - 60000):
+            _token_cache["access_token"] = stored["access_token"]
+            _token_cache["expires_at"] = stored["expires_at"]
+            return stored["access_token"]
         return refresh_access_token(config)
-    
-    return config["accessToken"]
+
+
+@contextlib.contextmanager
+def _memoized_requests():
+    """Scope (e.g. one batch) in which MEMOIZED_ENDPOINTS are fetched at most once"""
+    with _request_memo["lock"]:
+        _request_memo["depth"] += 1
+    try:
+        yield
+    finally:
+        with _request_memo["lock"]:
+            _request_memo["depth"] -= 1
+            if _request_memo["depth"] == 0:
+                _request_memo["responses"].clear()
 
 
 def make_spotify_request(
@@ -100,7 +464,42 @@ def make_spotify_request(
     data: Optional[Dict] = None,
     params: Optional[Dict] = None
 ) -> Dict[str, Any]:
-    """Make authenticated request to Spotify API"""
+    """Make authenticated request to Spotify API (over the pooled keep-alive transport)"""
+    memoize = method == "GET" and not params and endpoint in MEMOIZED_ENDPOINTS and _request_memo["depth"] > 0
+    if memoize:
+        # Single-flight: the first caller fetches, everyone else waits for its Future
+        with _request_memo["lock"]:
+            pending = _request_memo["responses"].get(endpoint)
+            owner = pending is None
+            if owner:
+                pending = _request_memo["responses"][endpoint] = Future()
+        if not owner:
+            return pending.result()
+        
+        try:
+            response = _send_spotify_request(method, endpoint, data, params)
+        except BaseException as e:
+            with _request_memo["lock"]:
+                _request_memo["responses"].pop(endpoint, None)
+            pending.set_exception(e)
+            raise
+        if not response.get("success", True):
+            # Waiting callers share this failure; later ones try again
+            with _request_memo["lock"]:
+                _request_memo["responses"].pop(endpoint, None)
+        pending.set_result(response)
+        return response
+    
+    return _send_spotify_request(method, endpoint, data, params)
+
+
+def _send_spotify_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict] = None,
+    params: Optional[Dict] = None
+) -> Dict[str, Any]:
+    """Send one Spotify API request with group 429 back-off (no memoization)"""
     token = get_access_token()
     headers = {
         "Authorization": f"Bearer {token}",
@@ -113,37 +512,1481 @@ def make_spotify_request(
     if params:
         url += "?" + urllib.parse.urlencode(params)
     
-    # Prepare request data
+    # Playlist reads: revalidate a stored copy instead of downloading it again
+    etag_entry = None
+    if method == "GET" and endpoint.startswith(ETAG_CACHEABLE_PREFIXES):
+        etag_entry = _etag_cache_get(url)
+        if etag_entry:
+            headers["If-None-Match"] = etag_entry["etag"]
+    
+    # Prepare request data (PUT/POST without payload still need a Content-Length)
     request_data = None
     if data:
         request_data = json.dumps(data).encode('utf-8')
+    elif method in ("PUT", "POST"):
+        request_data = b""
+    
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        # Honour a back-off set by any thread (one 429 pauses the whole group)
+        wait = _rate_limit["until"] - time.time()
+        deadline = _request_deadline["at"]
+        if deadline is not None and time.time() + max(wait, 0) >= deadline:
+            return {"success": False, "error": BATCH_DEADLINE_ERROR, "status": 0}
+        if wait > 0:
+            time.sleep(wait)
+        
+        timeout = HTTP_TIMEOUT_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - time.time(), MIN_REQUEST_TIMEOUT_SECONDS))
+        try:
+            status, response_headers, body = _http_request(method, url, body=request_data, headers=headers, timeout=timeout)
+        except TimeoutError:
+            if deadline is None:
+                raise
+            return {"success": False, "status": 0,
+                    "error": "Batch deadline reached while waiting for Spotify - the request may or may not have been applied"}
+        if status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            break
+        
+        try:
+            retry_after = float(response_headers.get("retry-after", "1"))
+        except ValueError:
+            retry_after = 1.0
+        if retry_after > MAX_RETRY_AFTER_SECONDS:
+            break
+        with _rate_limit["lock"]:
+            _rate_limit["until"] = max(_rate_limit["until"], time.time() + retry_after)
+    
+    if status >= 400:
+        error_body = body.decode('utf-8', errors='replace')
+        try:
+            error_json = json.loads(error_body)
+            error_msg = error_json.get("error", {}).get("message", error_body)
+        except:
+            error_msg = error_body
+        return {"success": False, "error": error_msg, "status": status}
+    
+    # 304 Not Modified = our stored copy is current
+    if status == 304 and etag_entry:
+        return json.loads(etag_entry["body"])
+    
+    # 204 No Content = success (common for POST/PUT with no return data)
+    if status == 204:
+        return {"success": True}
+    
+    # 200 OK with potential body
+    response_body = body.decode('utf-8').strip()
+    if status == 200 and response_body and method == "GET" and response_headers.get("etag") and \
+            endpoint.startswith(ETAG_CACHEABLE_PREFIXES):
+        _etag_cache_put(url, response_headers["etag"], response_body)
+    if response_body:
+        try:
+            return json.loads(response_body)
+        except json.JSONDecodeError:
+            # Empty or invalid JSON but status was OK = success
+            return {"success": True}
+    return {"success": True}
+
+
+# =============================================================================
+# CONDITIONAL REQUESTS (ETAG CACHE)
+# =============================================================================
+
+def _etag_cache_path(url: str) -> str:
+    return os.path.join(ETAG_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".json")
+
+
+def _etag_cache_get(url: str) -> Optional[Dict[str, Any]]:
+    """Stored {url, etag, body} for a GET URL, or None"""
+    entry = _read_json_file(_etag_cache_path(url), None)
+    if isinstance(entry, dict) and entry.get("url") == url and entry.get("etag") and "body" in entry:
+        return entry
+    return None
+
+
+def _etag_cache_put(url: str, etag: str, body: str) -> None:
+    """
+    Remember a cacheable response body under its ETag
+    
+    One file per URL (written atomically, last writer wins), so no lock is
+    needed. Past ETAG_CACHE_MAX_ENTRIES the least recently written files go -
+    checked on one write in ETAG_EVICT_EVERY (by exactly one thread), not on
+    every write, so catalog syncs don't rescan the directory per playlist.
+    """
+    try:
+        _write_json_atomic(_etag_cache_path(url), {"url": url, "etag": etag, "body": body})
+        
+        with _etag_cache_writes["lock"]:
+            evict = _etag_cache_writes["count"] % ETAG_EVICT_EVERY == 0
+            _etag_cache_writes["count"] += 1
+        if not evict:
+            return
+        
+        names = [n for n in os.listdir(ETAG_CACHE_DIR) if n.endswith(".json")]
+        if len(names) > ETAG_CACHE_MAX_ENTRIES:
+            paths = sorted((os.path.join(ETAG_CACHE_DIR, n) for n in names), key=os.path.getmtime)
+            for path in paths[:len(paths) - ETAG_CACHE_MAX_ENTRIES]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)  # Another process may be evicting too
+    except OSError:
+        pass  # Cache is an optimization - never fail the tool call over it
+
+
+# =============================================================================
+# SEARCH CACHE
+# =============================================================================
+
+def _search_cache_key(query: str, search_type: str) -> str:
+    """Normalize a query so 'Bohemian  Rhapsody' and 'bohemian rhapsody' share an entry"""
+    return f"{search_type}:{' '.join(query.casefold().split())}"
+
+
+def _search_cache_get(query: str, search_type: str) -> Optional[Dict[str, Any]]:
+    """Return the cached top result for a query, or None on miss/expiry"""
+    key = _search_cache_key(query, search_type)
+    now = time.time()
+    
+    with _search_cache["lock"]:
+        if _search_cache["entries"] is None:
+            stored = _read_json_file(SEARCH_CACHE_PATH, {})
+            _search_cache["entries"] = stored.get("entries", {}) if isinstance(stored, dict) else {}
+        
+        # One logical lookup = one hit or miss, even when pre-resolution read it first
+        counted = key in _search_cache["counted"]
+        _search_cache["counted"].discard(key)
+        
+        entry = _search_cache["entries"].get(key)
+        if entry and now - entry.get("cached_at", 0) < SEARCH_CACHE_TTL_SECONDS:
+            entry["last_used"] = now
+            if not counted:
+                _search_cache["hits"] += 1
+            _search_cache["dirty"] = True
+            return entry["item"]
+        
+        _search_cache["misses"] += 1
+        _search_cache["dirty"] = True
+        return None
+
+
+def _slim_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields result messages read from a search / track object"""
+    slim = {"id": item["id"], "name": item.get("name", "Unknown"), "uri": item.get("uri")}
+    if "artists" in item:
+        slim["artists"] = [{"name": a.get("name", "")} for a in item["artists"]]
+    return slim
+
+
+def _search_cache_put(query: str, search_type: str, item: Dict[str, Any]) -> None:
+    """Remember the top result for a query (only the fields callers read)"""
+    slim = _slim_item(item)
+    
+    now = time.time()
+    with _search_cache["lock"]:
+        if _search_cache["entries"] is None:
+            _search_cache["entries"] = {}
+        _search_cache["entries"][_search_cache_key(query, search_type)] = {
+            "item": slim,
+            "cached_at": now,
+            "last_used": now
+        }
+        _search_cache["dirty"] = True
+
+
+def _flush_search_cache() -> None:
+    """
+    Merge this process's cache changes into search_cache.json.
     
-    req = urllib.request.Request(url, data=request_data, headers=headers, method=method)
+    Re-reads the file under its lock so concurrent tool calls don't drop each
+    other's entries, then applies TTL expiry and evicts least-recently-used
+    entries beyond SEARCH_CACHE_MAX_ENTRIES.
+    """
+    with _search_cache["lock"]:
+        if not _search_cache["dirty"]:
+            return
+        local_entries = dict(_search_cache["entries"] or {})
+        hits, misses = _search_cache["hits"], _search_cache["misses"]
+        _search_cache["hits"] = _search_cache["misses"] = 0
+        _search_cache["dirty"] = False
     
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            # 204 No Content = success (common for POST/PUT with no return data)
-            if response.status == 204:
-                return {"success": True}
+        with _file_lock(SEARCH_CACHE_PATH):
+            stored = _read_json_file(SEARCH_CACHE_PATH, {})
+            if not isinstance(stored, dict):
+                stored = {}
+            entries = stored.get("entries", {})
+            for key, entry in local_entries.items():
+                if key not in entries or entry["last_used"] >= entries[key].get("last_used", 0):
+                    entries[key] = entry
             
-            # 200 OK with potential body
-            response_body = response.read().decode('utf-8').strip()
-            if response_body:
+            now = time.time()
+            live = [(k, e) for k, e in entries.items() if now - e.get("cached_at", 0) < SEARCH_CACHE_TTL_SECONDS]
+            live.sort(key=lambda kv: kv[1].get("last_used", 0), reverse=True)
+            
+            stats = stored.get("stats", {})
+            _write_json_atomic(SEARCH_CACHE_PATH, {
+                "entries": dict(live[:SEARCH_CACHE_MAX_ENTRIES]),
+                "stats": {
+                    "hits": stats.get("hits", 0) + hits,
+                    "misses": stats.get("misses", 0) + misses,
+                    "since": stats.get("since", int(now))
+                }
+            })
+    except OSError:
+        pass  # Cache is an optimization - never fail the tool call over it
+
+
+def get_search_cache_stats() -> str:
+    """Report search cache size and how many /search calls it has saved"""
+    _flush_search_cache()
+    stored = _read_json_file(SEARCH_CACHE_PATH, {})
+    if not isinstance(stored, dict):
+        stored = {}
+    stats = stored.get("stats", {})
+    hits = stats.get("hits", 0)
+    misses = stats.get("misses", 0)
+    lookups = hits + misses
+    hit_rate = f"{hits / lookups * 100:.1f}%" if lookups else "n/a"
+    since = time.strftime("%Y-%m-%d", time.localtime(stats["since"])) if stats.get("since") else "never"
+    
+    return f"""📊 Search cache ({SEARCH_CACHE_PATH})
+🗂️ Entries: {len(stored.get("entries", {}))}/{SEARCH_CACHE_MAX_ENTRIES} (TTL {SEARCH_CACHE_TTL_SECONDS // 86400} days)
+✅ Hits: {hits} (= /search calls saved)
+🔍 Misses: {misses}
+📈 Hit rate: {hit_rate} since {since}"""
+
+
+# =============================================================================
+# TRACK METADATA
+# =============================================================================
+
+def lookup_tracks(track_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], set]:
+    """
+    Resolve track IDs to name/artists, from tracks.json or GET /tracks?ids=
+    
+    Uncached IDs are fetched TRACK_LOOKUP_BATCH_SIZE at a time, with the groups
+    sent concurrently - one request per 50 tracks instead of one per track.
+    Track metadata doesn't change, so entries never expire; the oldest are
+    evicted beyond TRACK_CACHE_MAX_ENTRIES.
+    
+    Args:
+        track_ids: Spotify track IDs (duplicates and blanks are ignored)
+    
+    Returns:
+        (tracks by ID, IDs Spotify reported as nonexistent). IDs in neither
+        could not be looked up right now - callers fall back to the raw ID.
+    """
+    wanted = list(dict.fromkeys(tid for tid in track_ids if tid))
+    if not wanted:
+        return {}, set()
+    
+    stored = _read_json_file(TRACK_CACHE_PATH, {})
+    entries = stored.get("entries", {}) if isinstance(stored, dict) else {}
+    tracks = {tid: entries[tid]["item"] for tid in wanted if tid in entries}
+    missing = [tid for tid in wanted if tid not in tracks]
+    unknown = set()
+    if not missing:
+        return tracks, unknown
+    
+    groups = [missing[i:i + TRACK_LOOKUP_BATCH_SIZE] for i in range(0, len(missing), TRACK_LOOKUP_BATCH_SIZE)]
+    
+    def fetch(group: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+        try:
+            return group, make_spotify_request("GET", "/tracks", params={"ids": ",".join(group)})
+        except Exception as e:
+            return group, {"success": False, "error": str(e)}
+    
+    if len(groups) > 1:
+        get_access_token()  # Refresh once up front, not from every worker
+    with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(groups))) as executor:
+        responses = list(executor.map(fetch, groups))
+    
+    fetched = {}
+    for group, response in responses:
+        if not response.get("success", True):
+            continue  # Leave these unresolved - the caller shows the raw IDs
+        # Results come back in request order, with null for IDs that don't exist
+        for tid, track in zip(group, response.get("tracks") or []):
+            if track:
+                fetched[tid] = _slim_item(track)
+            else:
+                unknown.add(tid)
+    
+    if fetched:
+        tracks.update(fetched)
+        now = time.time()
+        try:
+            with _file_lock(TRACK_CACHE_PATH):
+                stored = _read_json_file(TRACK_CACHE_PATH, {})
+                entries = stored.get("entries", {}) if isinstance(stored, dict) else {}
+                entries.update({tid: {"item": item, "cached_at": now} for tid, item in fetched.items()})
+                newest = sorted(entries.items(), key=lambda kv: kv[1].get("cached_at", 0), reverse=True)
+                _write_json_atomic(TRACK_CACHE_PATH, {"entries": dict(newest[:TRACK_CACHE_MAX_ENTRIES])})
+        except OSError:
+            pass  # Cache is an optimization - never fail the tool call over it
+    
+    return tracks, unknown
+
+
+def _describe_track_id(track_id: str) -> str:
+    """Display line for a single track ID (falls back to the ID if the lookup fails)"""
+    tracks, _ = lookup_tracks([track_id])
+    return _format_track(tracks[track_id]) if track_id in tracks else track_id
+
+
+# =============================================================================
+# PLAYLIST CATALOG
+# =============================================================================
+
+def _fetch_offset_pages(
+    endpoint: str,
+    page_size: int,
+    params: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch every item of an offset-paginated endpoint
+    
+    The first page tells us the total; the remaining offsets are then
+    fetched concurrently instead of following 'next' links one by one.
+    
+    Returns:
+        (items in API order, error message or None)
+    """
+    def fetch(offset: int) -> Dict[str, Any]:
+        return make_spotify_request("GET", endpoint, params={**(params or {}), "limit": page_size, "offset": offset})
+    
+    first = fetch(0)
+    if not first.get("success", True):
+        return [], first.get("error", "Unknown error")
+    
+    items = list(first.get("items", []))
+    offsets = list(range(page_size, first.get("total", len(items)), page_size))
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(offsets))) as executor:
+            pages = list(executor.map(fetch, offsets))
+        for page in pages:
+            if not page.get("success", True):
+                return items, page.get("error", "Unknown error")
+            items.extend(page.get("items", []))
+    
+    return items, None
+
+
+def _load_playlist_catalog() -> Dict[str, Any]:
+    """Read the local playlist catalog (empty catalog if never synced)"""
+    catalog = _read_json_file(PLAYLIST_CATALOG_PATH, {})
+    if not isinstance(catalog, dict) or not isinstance(catalog.get("playlists"), list):
+        return {"synced_at": 0, "with_tracks": False, "playlists": []}
+    return catalog
+
+
+def sync_playlist_catalog(include_tracks: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Incrementally sync the local catalog of the user's playlists
+    
+    Playlist pages are fetched concurrently by offset. Track membership is only
+    (re)fetched for playlists whose snapshot_id changed since the last sync.
+    
+    Args:
+        include_tracks: Also index track membership. None = keep whatever the
+                        catalog did last time.
+    
+    Returns:
+        Summary dict (total, new, changed, unchanged, removed, track_fetches, errors)
+        plus the synced catalog under "catalog"
+    """
+    previous = _load_playlist_catalog()
+    if include_tracks is None:
+        include_tracks = previous.get("with_tracks", False)
+    known = {p["id"]: p for p in previous["playlists"]}
+    
+    items, error = _fetch_offset_pages("/me/playlists", 50)
+    if error:
+        raise Exception(f"Failed to list playlists: {error}")
+    
+    summary = {"total": 0, "new": 0, "changed": 0, "unchanged": 0, "track_fetches": 0, "errors": []}
+    playlists = []
+    needs_tracks = []
+    
+    for item in items:
+        if not item:
+            continue
+        old = known.get(item["id"])
+        entry = {
+            "id": item["id"],
+            "name": item.get("name", ""),
+            "owner_id": (item.get("owner") or {}).get("id"),
+            "snapshot_id": item.get("snapshot_id"),
+            "total": (item.get("tracks") or {}).get("total", 0),
+            "tracks": None
+        }
+        if old is None:
+            summary["new"] += 1
+        elif old.get("snapshot_id") == entry["snapshot_id"]:
+            summary["unchanged"] += 1
+            entry["tracks"] = old.get("tracks")
+        else:
+            summary["changed"] += 1
+        
+        if include_tracks and entry["tracks"] is None:
+            needs_tracks.append((entry, old))
+        playlists.append(entry)
+    
+    def fetch_tracks(pair: Tuple[Dict[str, Any], Optional[Dict[str, Any]]]) -> None:
+        entry, old = pair
+        track_items, track_error = _fetch_offset_pages(
+            f"/playlists/{entry['id']}/tracks", 100, params={"fields": "items(track(id)),total"}
+        )
+        if track_error:
+            # Keep the old membership + snapshot so the next sync retries this playlist
+            summary["errors"].append(f"{entry['name']}: {track_error}")
+            entry["snapshot_id"] = old.get("snapshot_id") if old else None
+            entry["tracks"] = old.get("tracks") if old else None
+            return
+        entry["tracks"] = [t["track"]["id"] for t in track_items if t.get("track") and t["track"].get("id")]
+    
+    if needs_tracks:
+        summary["track_fetches"] = len(needs_tracks)
+        # Each playlist fetch fans out its own pages - keep the outer pool small
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS // 2, len(needs_tracks))) as executor:
+            list(executor.map(fetch_tracks, needs_tracks))
+    
+    summary["total"] = len(playlists)
+    summary["removed"] = len(set(known) - {p["id"] for p in playlists})
+    catalog = {"synced_at": time.time(), "with_tracks": include_tracks, "playlists": playlists}
+    
+    try:
+        with _file_lock(PLAYLIST_CATALOG_PATH):
+            _write_json_atomic(PLAYLIST_CATALOG_PATH, catalog)
+    except OSError:
+        pass  # Still usable for this call
+    
+    summary["catalog"] = catalog
+    return summary
+
+
+def _get_playlist_catalog(need_tracks: bool = False) -> Dict[str, Any]:
+    """Local catalog, synced first if missing, stale, or lacking track membership"""
+    catalog = _load_playlist_catalog()
+    fresh = time.time() - catalog.get("synced_at", 0) < PLAYLIST_CATALOG_MAX_AGE_SECONDS
+    if fresh and (catalog.get("with_tracks") or not need_tracks):
+        return catalog
+    return sync_playlist_catalog(include_tracks=True if need_tracks else None)["catalog"]
+
+
+def _match_playlists(catalog: Dict[str, Any], name: str) -> List[Dict[str, Any]]:
+    """Playlists matching a name: exact matches first, then prefix, then substring"""
+    wanted = " ".join(name.casefold().split())
+    exact, prefix, partial = [], [], []
+    for playlist in catalog["playlists"]:
+        candidate = " ".join(playlist["name"].casefold().split())
+        if candidate == wanted:
+            exact.append(playlist)
+        elif candidate.startswith(wanted):
+            prefix.append(playlist)
+        elif wanted in candidate:
+            partial.append(playlist)
+    return exact + prefix + partial
+
+
+def _catalog_track_ids(playlist_id: str) -> Optional[set]:
+    """Track IDs the catalog knows are in a playlist (None if membership isn't indexed)"""
+    for playlist in _load_playlist_catalog()["playlists"]:
+        if playlist["id"] == playlist_id:
+            return set(playlist["tracks"]) if playlist.get("tracks") is not None else None
+    return None
+
+
+def _catalog_record_add(playlist_id: str, track_ids: List[str], new_playlist: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Reflect our own changes in the catalog without a re-sync
+    
+    snapshot_id is deliberately left alone: if someone else changed the playlist
+    meanwhile, the next sync still sees a different snapshot and refetches it.
+    """
+    try:
+        with _file_lock(PLAYLIST_CATALOG_PATH):
+            catalog = _read_json_file(PLAYLIST_CATALOG_PATH, None)
+            if not isinstance(catalog, dict) or not isinstance(catalog.get("playlists"), list):
+                return  # Never synced - nothing to keep consistent
+            
+            if new_playlist:
+                catalog["playlists"].insert(0, {
+                    **new_playlist,
+                    "snapshot_id": None,
+                    "total": 0,
+                    "tracks": [] if catalog.get("with_tracks") else None
+                })
+            
+            for playlist in catalog["playlists"]:
+                if playlist["id"] == playlist_id:
+                    playlist["total"] = playlist.get("total", 0) + len(track_ids)
+                    if playlist.get("tracks") is not None:
+                        playlist["tracks"].extend(track_ids)
+                    break
+            
+            _write_json_atomic(PLAYLIST_CATALOG_PATH, catalog)
+    except OSError:
+        pass
+
+
+def sync_playlists(include_tracks: Optional[bool] = None) -> str:
+    """Sync the playlist catalog and report what changed"""
+    summary = sync_playlist_catalog(include_tracks)
+    catalog = summary["catalog"]
+    
+    result = f"""🔄 Synced {summary['total']} playlist(s)
+🆕 New: {summary['new']} | ✏️ Changed: {summary['changed']} | ✅ Unchanged (skipped): {summary['unchanged']} | 🗑️ Removed: {summary['removed']}
+🎵 Track membership: {"indexed" if catalog["with_tracks"] else "not indexed (use include_tracks=true)"}"""
+    if summary["track_fetches"]:
+        result += f"\n📥 Fetched tracks for {summary['track_fetches']} playlist(s)"
+    if summary["errors"]:
+        result += f"\n\n⚠️ {len(summary['errors'])} playlist(s) failed (will retry next sync):\n" + "\n".join(summary["errors"])
+    return result
+
+
+def find_playlist(name: str) -> str:
+    """Find the user's playlists by name from the local catalog"""
+    catalog = _get_playlist_catalog()
+    matches = _match_playlists(catalog, name)
+    if not matches:
+        return f"🔍 No playlist in your library matches: {name}"
+    
+    lines = [f"• {p['name']} ({p.get('total', 0)} tracks) - ID: {p['id']}" for p in matches[:20]]
+    return f"📋 {len(matches)} playlist(s) matching '{name}':\n" + "\n".join(lines)
+
+
+def playlists_with_track(track_id: Optional[str] = None, query: Optional[str] = None) -> str:
+    """List the user's playlists that contain a track (by ID or song query)"""
+    if track_id:
+        display = _describe_track_id(track_id)
+    else:
+        _, track, error = _resolve_track_queries([query])[0]
+        if track is None:
+            return f"❌ Track not found: {error}"
+        track_id = track["id"]
+        display = _format_track(track)
+    
+    catalog = _get_playlist_catalog(need_tracks=True)
+    matches = [p for p in catalog["playlists"] if track_id in (p.get("tracks") or ())]
+    if not matches:
+        return f"🔍 {display} is not in any of your {len(catalog['playlists'])} playlists"
+    
+    lines = [f"• {p['name']} - ID: {p['id']}" for p in matches]
+    return f"📋 {display} is in {len(matches)} playlist(s):\n" + "\n".join(lines)
+
+
+# =============================================================================
+# DEVICES
+# =============================================================================
+
+NO_DEVICE_MESSAGE = "⚠️ No active Spotify device found. Please open Spotify on a device and try again."
+
+
+def _update_device_cache(
+    devices: Optional[List[Dict[str, Any]]] = None,
+    active_id: Optional[str] = None,
+    invalidate: bool = False
+) -> None:
+    """Store a fresh device list, record the device now playing, or force a refetch"""
+    try:
+        with _file_lock(DEVICE_CACHE_PATH):
+            cache = _read_json_file(DEVICE_CACHE_PATH, {})
+            if not isinstance(cache, dict):
+                cache = {}
+            if devices is not None:
+                cache["devices"] = devices
+                cache["fetched_at"] = time.time()
+            if active_id:
+                for device in cache.get("devices", []):
+                    device["is_active"] = device.get("id") == active_id
+                cache["last_device_id"] = active_id
+            if invalidate:
+                cache["fetched_at"] = 0
+            _write_json_atomic(DEVICE_CACHE_PATH, cache)
+    except OSError:
+        pass
+
+
+def _get_devices(refresh: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    The user's devices, served from devices.json for DEVICE_CACHE_TTL_SECONDS
+    
+    Returns:
+        (devices, error message or None)
+    """
+    cache = _read_json_file(DEVICE_CACHE_PATH, {})
+    if not isinstance(cache, dict):
+        cache = {}
+    if not refresh and time.time() - cache.get("fetched_at", 0) < DEVICE_CACHE_TTL_SECONDS:
+        return cache.get("devices", []), None
+    
+    response = make_spotify_request("GET", "/me/player/devices")
+    if not response.get("success", True):
+        return [], response.get("error", "Unknown error")
+    
+    devices = [d for d in response.get("devices", []) if d.get("id")]
+    active = next((d["id"] for d in devices if d.get("is_active")), None)
+    _update_device_cache(devices=devices, active_id=active)
+    return devices, None
+
+
+def _find_device(devices: List[Dict[str, Any]], wanted: str) -> Optional[Dict[str, Any]]:
+    """Match a device by ID or (case-insensitive) name"""
+    for device in devices:
+        if device.get("id") == wanted or device.get("name", "").casefold() == wanted.casefold():
+            return device
+    return None
+
+
+def _prepare_playback_device(
+    device_id: Optional[str] = None,
+    transfer: bool = False,
+    refresh: bool = False
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Preflight a playback command against the cached device list
+    
+    Picks the requested device, else the active one, else SPOTIFY_PREFERRED_DEVICE,
+    else the last device we played on, else the first controllable device.
+    
+    Args:
+        device_id: Explicit target (ID or name)
+        transfer: Transfer playback to an inactive target now (needed for queueing;
+                  'play' just passes device_id to the play request instead)
+        refresh: Bypass the device cache (after a stale-cache 404)
+    
+    Returns:
+        (target device ID, note for the result message, error message) - target is
+        None with no error when the device list is unavailable (send as before)
+    """
+    devices, error = _get_devices(refresh=refresh)
+    if error:
+        return None, None, None
+    
+    controllable = [d for d in devices if not d.get("is_restricted")]
+    
+    if device_id:
+        target = _find_device(devices, device_id)
+        if target is None and not refresh:
+            # Just-opened devices aren't in the cached list yet - look once more before failing
+            devices, error = _get_devices(refresh=True)
+            if error:
+                return None, None, None
+            controllable = [d for d in devices if not d.get("is_restricted")]
+            target = _find_device(devices, device_id)
+        if target is None:
+            names = ", ".join(d.get("name", d["id"]) for d in controllable) or "none"
+            return None, None, f"⚠️ Device not found: {device_id}. Available devices: {names}"
+    else:
+        target = next((d for d in controllable if d.get("is_active")), None)
+        if target is not None:
+            return target["id"], None, None
+        
+        cache = _read_json_file(DEVICE_CACHE_PATH, {})
+        last_id = cache.get("last_device_id") if isinstance(cache, dict) else None
+        target = (
+            (SPOTIFY_PREFERRED_DEVICE and _find_device(controllable, SPOTIFY_PREFERRED_DEVICE))
+            or (last_id and _find_device(controllable, last_id))
+            or (controllable[0] if controllable else None)
+        )
+        if target is None:
+            return None, None, NO_DEVICE_MESSAGE
+    
+    if target.get("is_active"):
+        return target["id"], None, None
+    
+    if transfer:
+        response = make_spotify_request("PUT", "/me/player", data={"device_ids": [target["id"]], "play": False})
+        if response.get("success") == False:
+            return None, None, f"❌ Failed to transfer playback to {target.get('name')}: {response.get('error', 'Unknown error')}"
+        _update_device_cache(active_id=target["id"])
+    
+    return target["id"], f"🔀 Using {target.get('name', target['id'])} ({target.get('type', 'device')})", None
+
+
+def _now_playing_is_fresh(snapshot: Any) -> bool:
+    return (isinstance(snapshot, dict) and snapshot.get("client_id") == SPOTIFY_CLIENT_ID
+            and time.time() - snapshot.get("fetched_at", 0) < NOW_PLAYING_TTL_SECONDS)
+
+
+def get_now_playing_snapshot() -> Dict[str, Any]:
+    """
+    Current playback, shared across tools via now_playing.json
+    
+    Fetched from Spotify at most once per NOW_PLAYING_TTL_SECONDS (single-flight
+    under the file lock, so a burst of callers costs one request). send_heartbeat
+    reads and writes the same file with the same format. Display only - it can be
+    seconds old, so decisions that change playback use get_player_state().
+    
+    Returns:
+        Dict with item (id, uri, name, artists, album, duration_ms - or None when
+        nothing is playing), is_playing, progress_ms (extrapolated to now) and
+        fetched_at; or the failed API response ({"success": False, ...})
+    """
+    snapshot = _read_json_file(NOW_PLAYING_PATH, None)
+    if not _now_playing_is_fresh(snapshot):
+        with _file_lock(NOW_PLAYING_PATH):
+            snapshot = _read_json_file(NOW_PLAYING_PATH, None)
+            if not _now_playing_is_fresh(snapshot):
+                response = make_spotify_request("GET", "/me/player/currently-playing")
+                if not response.get("success", True):
+                    return response
+                
+                item = response.get("item")
+                snapshot = {
+                    "fetched_at": time.time(),
+                    "client_id": SPOTIFY_CLIENT_ID,
+                    "is_playing": bool(response.get("is_playing")) and bool(item),
+                    "progress_ms": response.get("progress_ms") or 0,
+                    "item": {
+                        "id": item.get("id"),
+                        "uri": item.get("uri"),
+                        "name": item.get("name", "Unknown"),
+                        "artists": [a.get("name", "") for a in item.get("artists", [])],
+                        "album": (item.get("album") or {}).get("name", ""),
+                        "duration_ms": item.get("duration_ms", 0)
+                    } if item else None
+                }
                 try:
-                    return json.loads(response_body)
-                except json.JSONDecodeError:
-                    # Empty or invalid JSON but status was OK = success
-                    return {"success": True}
-            return {"success": True}
+                    _write_json_atomic(NOW_PLAYING_PATH, snapshot)
+                except OSError:
+                    pass
+    
+    # Progress moves on while the snapshot is reused
+    snapshot = dict(snapshot)
+    if snapshot["is_playing"] and snapshot["item"]:
+        elapsed_ms = int((time.time() - snapshot["fetched_at"]) * 1000)
+        snapshot["progress_ms"] = min(snapshot["progress_ms"] + elapsed_ms, snapshot["item"]["duration_ms"])
+    return snapshot
+
+
+def get_player_state() -> Dict[str, Any]:
+    """
+    Fresh playback state (never the shared snapshot) for side-effecting decisions
+    
+    Another client may have started something since the snapshot was taken -
+    replacing that because of a stale "idle" would be wrong. Episodes are
+    requested too - without additional_types a playing podcast has item null.
+    
+    Returns:
+        The /me/player response ({"success": True} without a device when nothing
+        is active), or the failed API response
+    """
+    return make_spotify_request("GET", "/me/player", params={"additional_types": "track,episode"})
+
+
+def _player_is_idle(state: Dict[str, Any]) -> bool:
+    """
+    Nothing to queue behind: no active device, or a device with nothing loaded
+    
+    A paused track or a playing podcast/ad is not idle. Unknown state (failed
+    read) counts as not idle, so we queue instead of replacing playback.
+    """
+    if not state.get("success", True):
+        return False
+    if not state.get("device"):
+        return True
+    if state.get("is_playing") or state.get("item"):
+        return False
+    return state.get("currently_playing_type") in (None, "unknown")
+
+
+def _invalidate_now_playing() -> None:
+    """Drop the shared snapshot after we changed playback"""
+    try:
+        os.remove(NOW_PLAYING_PATH)
+    except OSError:
+        pass
+
+
+def list_devices() -> str:
+    """List available playback devices (refreshes the device cache)"""
+    devices, error = _get_devices(refresh=True)
+    if error:
+        return f"❌ Failed to get devices: {error}"
+    if not devices:
+        return "📱 No Spotify devices available. Open Spotify on a device first."
+    
+    lines = []
+    for device in devices:
+        status = "▶️ active" if device.get("is_active") else "idle"
+        restricted = " (restricted)" if device.get("is_restricted") else ""
+        lines.append(f"• {device.get('name')} - {device.get('type')} [{status}]{restricted} - ID: {device['id']}")
+    return f"📱 Your devices ({len(devices)}):\n" + "\n".join(lines)
+
+
+# =============================================================================
+# LISTENING HISTORY
+# =============================================================================
+
+LIBRARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    played_at_ms INTEGER PRIMARY KEY,  -- Spotify's played_at (UTC, ms since epoch)
+    track_id TEXT NOT NULL,
+    track_name TEXT NOT NULL,
+    artist TEXT NOT NULL,              -- Primary artist (what top-artist stats group by)
+    artists TEXT NOT NULL,             -- All credited artists, for display
+    album TEXT,
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    context_uri TEXT
+);
+CREATE TABLE IF NOT EXISTS saved_tracks (
+    track_id TEXT PRIMARY KEY,
+    added_at_ms INTEGER NOT NULL,      -- When it was saved (UTC, ms since epoch)
+    track_name TEXT NOT NULL,
+    artists TEXT NOT NULL,
+    album TEXT,
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    uri TEXT,
+    export_run INTEGER NOT NULL        -- Export that last saw it (full exports drop unsaved tracks)
+);
+CREATE INDEX IF NOT EXISTS saved_tracks_added_at ON saved_tracks (added_at_ms);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _local_timezone():
+    """LOCAL_TIMEZONE as a tzinfo (None = the system's local time if the name is unknown)"""
+    try:
+        return ZoneInfo(LOCAL_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _open_library_db() -> sqlite3.Connection:
+    """
+    Open spotify.db with the schema in place
+    
+    Registers local_day(ms) / local_hour(ms) so aggregations can bucket by
+    LOCAL_TIMEZONE (DST-aware) inside the SQL itself.
+    """
+    os.makedirs(SPOTIFY_CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(LIBRARY_DB_PATH, timeout=10)
+    conn.executescript(LIBRARY_SCHEMA)
+    tz = _local_timezone()
+    conn.create_function(
+        "local_day", 1, lambda ms: datetime.fromtimestamp(ms / 1000, tz).strftime("%Y-%m-%d"), deterministic=True
+    )
+    conn.create_function("local_hour", 1, lambda ms: datetime.fromtimestamp(ms / 1000, tz).hour, deterministic=True)
+    return conn
+
+
+def _get_sync_state(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_sync_state(conn: sqlite3.Connection, name: str, value: Any) -> None:
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, str(value)))
+
+
+def _spotify_time_ms(value: str) -> int:
+    """Spotify ISO timestamp ("2025-10-15T18:04:11.123Z") -> ms since epoch"""
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def _format_minutes(ms: int) -> str:
+    minutes = round(ms / 60000)
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes} min"
+
+
+def sync_listening_history() -> Dict[str, Any]:
+    """
+    Pull plays newer than the newest stored one from /me/player/recently-played
+    
+    Pages forward with the `after` cursor, so a sync only fetches new plays
+    (usually one request). Spotify only exposes the ~50 most recent plays, so
+    the first sync starts there and the history grows with every later sync.
+    
+    Returns:
+        Dict with new (plays added), total, first_ms / last_ms (stored range)
+        and error (None on success)
+    """
+    with contextlib.closing(_open_library_db()) as conn:
+        newest = conn.execute("SELECT MAX(played_at_ms) FROM plays").fetchone()[0]
+        params = {"limit": HISTORY_PAGE_SIZE}
+        if newest:
+            params["after"] = newest
+        
+        new = 0
+        error = None
+        for _ in range(HISTORY_MAX_PAGES):
+            response = make_spotify_request("GET", "/me/player/recently-played", params=params)
+            if not response.get("success", True):
+                error = response.get("error", "Unknown error")
+                break
+            
+            rows = []
+            for entry in response.get("items") or []:
+                track = entry.get("track") or {}
+                if not track.get("id") or not entry.get("played_at"):
+                    continue  # Local files / podcast episodes
+                artists = [a.get("name", "") for a in track.get("artists", [])] or ["Unknown"]
+                rows.append((
+                    _spotify_time_ms(entry["played_at"]),
+                    track["id"],
+                    track.get("name", "Unknown"),
+                    artists[0],
+                    ", ".join(artists),
+                    (track.get("album") or {}).get("name"),
+                    track.get("duration_ms") or 0,
+                    (entry.get("context") or {}).get("uri")
+                ))
+            with conn:
+                new += conn.executemany(
+                    "INSERT OR IGNORE INTO plays VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                ).rowcount
             
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
+            # Without a starting cursor there is nothing older to page back to
+            after = (response.get("cursors") or {}).get("after")
+            if "after" not in params or not rows or not response.get("next") or not after:
+                break
+            if int(after) <= params["after"]:
+                break
+            params["after"] = int(after)
+        
+        if error is None:
+            _set_sync_state(conn, "history_synced_at", time.time())
+        total, first_ms, last_ms = conn.execute(
+            "SELECT COUNT(*), MIN(played_at_ms), MAX(played_at_ms) FROM plays"
+        ).fetchone()
+    
+    return {"new": new, "total": total, "first_ms": first_ms, "last_ms": last_ms, "error": error}
+
+
+def sync_history() -> str:
+    """Sync the listening history and report what was added"""
+    summary = sync_listening_history()
+    if summary["error"] and not summary["new"]:
+        return f"❌ Failed to sync listening history: {summary['error']}"
+    
+    tz = _local_timezone()
+    result = f"🕘 Listening history synced: {summary['new']} new play(s)"
+    if summary["total"]:
+        first = datetime.fromtimestamp(summary["first_ms"] / 1000, tz).strftime("%Y-%m-%d %H:%M")
+        last = datetime.fromtimestamp(summary["last_ms"] / 1000, tz).strftime("%Y-%m-%d %H:%M")
+        result += f"\n📚 {summary['total']} play(s) stored ({first} → {last})"
+    if summary["error"]:
+        result += f"\n⚠️ Stopped early: {summary['error']}"
+    return result
+
+
+def listening_stats(period: str = "week", limit: int = 10) -> str:
+    """
+    Top tracks / artists and listening time for a period, computed in SQLite
+    
+    Args:
+        period: "day" (today), "week" (last 7 days) or "month" (last 30 days), in LOCAL_TIMEZONE
+        limit: Number of top tracks / artists to show
+    
+    Returns:
+        Formatted stats
+    """
+    period = (period or "week").lower()
+    if period not in HISTORY_PERIODS:
+        return f"❌ Unknown period: {period}. Use one of: {', '.join(HISTORY_PERIODS)}"
+    if limit < 1:
+        limit = 10
+    
+    # Stats are local queries; only pull new plays when the last sync is stale
+    note = ""
+    with contextlib.closing(_open_library_db()) as conn:
+        synced_at = float(_get_sync_state(conn, "history_synced_at") or 0)
+    if time.time() - synced_at >= HISTORY_SYNC_MAX_AGE_SECONDS:
+        summary = sync_listening_history()
+        if summary["error"]:
+            note = f"\n⚠️ Could not fetch new plays ({summary['error']}) - showing stored history"
+    
+    tz = _local_timezone()
+    start = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=HISTORY_PERIODS[period] - 1)
+    since_ms = int(start.timestamp() * 1000)
+    
+    with contextlib.closing(_open_library_db()) as conn:
+        plays, total_ms = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(duration_ms), 0) FROM plays WHERE played_at_ms >= ?", (since_ms,)
+        ).fetchone()
+        if not plays:
+            return f"🔇 No plays recorded since {start:%Y-%m-%d} (run sync_history regularly to build the history){note}"
+        
+        top_tracks = conn.execute("""
+            SELECT track_name, artists, COUNT(*) AS n
+            FROM plays WHERE played_at_ms >= ?
+            GROUP BY track_id ORDER BY n DESC, MAX(played_at_ms) DESC LIMIT ?
+        """, (since_ms, limit)).fetchall()
+        top_artists = conn.execute("""
+            SELECT artist, COUNT(*) AS n, SUM(duration_ms)
+            FROM plays WHERE played_at_ms >= ?
+            GROUP BY artist ORDER BY n DESC, MAX(played_at_ms) DESC LIMIT ?
+        """, (since_ms, limit)).fetchall()
+        by_day = conn.execute("""
+            SELECT local_day(played_at_ms) AS day, COUNT(*), SUM(duration_ms)
+            FROM plays WHERE played_at_ms >= ? GROUP BY day ORDER BY day
+        """, (since_ms,)).fetchall()
+        by_hour = conn.execute("""
+            SELECT local_hour(played_at_ms) AS hour, SUM(duration_ms)
+            FROM plays WHERE played_at_ms >= ? GROUP BY hour ORDER BY hour
+        """, (since_ms,)).fetchall()
+    
+    label = {"day": "today", "week": "last 7 days", "month": "last 30 days"}[period]
+    lines = [f"📊 Listening stats ({label}, since {start:%Y-%m-%d}): {plays} play(s), ~{_format_minutes(total_ms)}"]
+    
+    lines.append("\n🎵 Top tracks:")
+    lines += [f"{i}. {name} - {artists} ({n}x)" for i, (name, artists, n) in enumerate(top_tracks, 1)]
+    
+    lines.append("\n🎤 Top artists:")
+    lines += [f"{i}. {artist} ({n} plays, ~{_format_minutes(ms)})" for i, (artist, n, ms) in enumerate(top_artists, 1)]
+    
+    if period != "day":
+        lines.append("\n📅 Per day:")
+        lines += [f"• {day}: {n} play(s), ~{_format_minutes(ms)}" for day, n, ms in by_day]
+    
+    # Plays stored without a duration count as 0 ms - no listening time, no chart
+    busiest = max((ms or 0 for _, ms in by_hour), default=0)
+    if busiest:
+        lines.append(f"\n🕐 Listening time by hour ({LOCAL_TIMEZONE}):")
+        for hour, ms in by_hour:
+            bar = "█" * max(1, round((ms or 0) / busiest * 20))
+            lines.append(f"{hour:02d}:00 {bar} {_format_minutes(ms or 0)}")
+    
+    return "\n".join(lines) + note
+
+
+def export_saved_tracks() -> Dict[str, Any]:
+    """
+    Export the user's saved tracks (/me/tracks) into the saved_tracks table
+    
+    The first page gives the total; the remaining offsets are fetched
+    LIBRARY_EXPORT_WORKERS at a time and written to SQLite page by page as they
+    arrive, in order. Later runs are incremental: the library is newest-first,
+    so only about (total - stored) tracks are new, and the export stops at the
+    first already-known added_at. One full pass rebuilds the table when tracks
+    were unsaved: if the counts disagree afterwards, if the known tracks on the
+    page where the export stopped differ from the stored ones, or if the last
+    full pass is older than SAVED_TRACKS_FULL_EXPORT_MAX_AGE_SECONDS.
+    
+    Limitation: the count check relies on the table matching the library after
+    the previous export. If it drifted (e.g. an interrupted rebuild), an unsave
+    deeper in the library that isn't on the boundary page can leave the counts
+    equal - that track stays in saved_tracks until the periodic full pass.
+    
+    Returns:
+        Dict with new (newly saved / re-saved), removed (unsaved), total
+        (library size), stored, pages, full (whether a full pass ran) and
+        error (None on success)
+    """
+    def fetch(offset: int) -> Dict[str, Any]:
         try:
-            error_json = json.loads(error_body)
-            error_msg = error_json.get("error", {}).get("message", error_body)
-        except:
-            error_msg = error_body
-        return {"success": False, "error": error_msg, "status": e.code}
+            return make_spotify_request("GET", "/me/tracks", params={"limit": SAVED_TRACKS_PAGE_SIZE, "offset": offset})
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    summary = {"new": 0, "removed": 0, "total": 0, "stored": 0, "pages": 0, "full": False, "error": None}
+    
+    with contextlib.closing(_open_library_db()) as conn:
+        run = int(time.time() * 1000)
+        boundary = {"drifted": False}
+        
+        def export(newest_known: Optional[int], known_count: int) -> None:
+            """One pass: newest_known=None exports everything, else stops at the first known track"""
+            
+            def store(page: Dict[str, Any]) -> bool:
+                """Write a page; True once it reaches a track the last export already had"""
+                rows = []
+                reached_known = False
+                items = page.get("items") or []
+                for position, entry in enumerate(items):
+                    track = entry.get("track") or {}
+                    if not track.get("id") or not entry.get("added_at"):
+                        continue
+                    added_at_ms = _spotify_time_ms(entry["added_at"])
+                    # added_at has 1s resolution: same-second saves are re-stored, not skipped
+                    if newest_known is not None and added_at_ms < newest_known:
+                        reached_known = True
+                        # Free fingerprint: the rest of this page must be our newest known tracks
+                        page_known = {(e.get("track") or {}).get("id") for e in items[position:]} - {None}
+                        stored_known = {row[0] for row in conn.execute(
+                            "SELECT track_id FROM saved_tracks WHERE added_at_ms < ? ORDER BY added_at_ms DESC LIMIT ?",
+                            (newest_known, len(page_known))
+                        )}
+                        boundary["drifted"] = page_known != stored_known
+                        break
+                    rows.append((
+                        track["id"],
+                        added_at_ms,
+                        track.get("name", "Unknown"),
+                        ", ".join(a.get("name", "") for a in track.get("artists", [])) or "Unknown",
+                        (track.get("album") or {}).get("name"),
+                        track.get("duration_ms") or 0,
+                        track.get("uri"),
+                        run
+                    ))
+                placeholders = ",".join("?" * len(rows))
+                stored = dict(conn.execute(
+                    f"SELECT track_id, added_at_ms FROM saved_tracks WHERE track_id IN ({placeholders})",
+                    [row[0] for row in rows]
+                ).fetchall()) if rows else {}
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO saved_tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                summary["new"] += sum(1 for row in rows if stored.get(row[0]) != row[1])
+                summary["pages"] += 1
+                return reached_known
+            
+            first = fetch(0)
+            if not first.get("success", True):
+                summary["error"] = first.get("error", "Unknown error")
+                return
+            total = summary["total"] = first.get("total", 0)
+            if store(first):
+                return
+            
+            # Incremental: the new saves fill offsets [0, total - known_count); the page
+            # holding the boundary should contain the first known track
+            target = total if newest_known is None else min(total, total - known_count + 1)
+            offset = SAVED_TRACKS_PAGE_SIZE
+            with ThreadPoolExecutor(max_workers=LIBRARY_EXPORT_WORKERS) as executor:
+                while offset < total:
+                    # At least one more page if the estimate fell short (unsaved tracks)
+                    end = min(total, max(target, offset + SAVED_TRACKS_PAGE_SIZE))
+                    offsets = list(range(offset, end, SAVED_TRACKS_PAGE_SIZE))
+                    for page in executor.map(fetch, offsets):
+                        if not page.get("success", True):
+                            summary["error"] = page.get("error", "Unknown error")
+                            return
+                        if store(page):
+                            return
+                    offset = offsets[-1] + SAVED_TRACKS_PAGE_SIZE
+        
+        # Only a completed pass moves the watermark, so an interrupted export leaves no gap
+        watermark = _get_sync_state(conn, "saved_tracks_watermark")
+        newest_known = int(watermark) if watermark else None
+        last_full = float(_get_sync_state(conn, "saved_tracks_full_export_at") or 0)
+        if time.time() - last_full > SAVED_TRACKS_FULL_EXPORT_MAX_AGE_SECONDS:
+            newest_known = None  # Periodic full pass
+        known_count = conn.execute(
+            "SELECT COUNT(*) FROM saved_tracks WHERE added_at_ms < ?", (newest_known or 0,)
+        ).fetchone()[0]
+        export(newest_known, known_count)
+        
+        stored = conn.execute("SELECT COUNT(*) FROM saved_tracks").fetchone()[0]
+        if not summary["error"] and newest_known is not None and (stored != summary["total"] or boundary["drifted"]):
+            # Tracks were unsaved since the last export - rebuild from a full pass
+            export(None, 0)
+            newest_known = None
+        
+        summary["full"] = newest_known is None
+        if summary["full"] and not summary["error"]:
+            with conn:
+                summary["removed"] = conn.execute(
+                    "DELETE FROM saved_tracks WHERE export_run != ?", (run,)
+                ).rowcount
+            _set_sync_state(conn, "saved_tracks_full_export_at", time.time())
+        
+        if not summary["error"]:
+            newest = conn.execute("SELECT MAX(added_at_ms) FROM saved_tracks").fetchone()[0]
+            if newest is not None:
+                _set_sync_state(conn, "saved_tracks_watermark", newest)
+            _set_sync_state(conn, "saved_tracks_exported_at", time.time())
+        summary["stored"] = conn.execute("SELECT COUNT(*) FROM saved_tracks").fetchone()[0]
+    
+    return summary
+
+
+def export_library() -> str:
+    """Export saved tracks to spotify.db and report what changed"""
+    summary = export_saved_tracks()
+    if summary["error"] and not summary["pages"]:
+        return f"❌ Failed to export saved tracks: {summary['error']}"
+    
+    kind = "Full export" if summary["full"] else "Incremental export"
+    result = f"""💾 {kind} of your saved tracks: {summary['new']} new, {summary['removed']} removed
+📚 {summary['stored']} of {summary['total']} saved track(s) stored in {LIBRARY_DB_PATH} (table saved_tracks)
+📄 {summary['pages']} page(s) fetched"""
+    if summary["error"]:
+        result += f"\n⚠️ Stopped early: {summary['error']} - run export_library again to continue"
+    return result
+
+
+# =============================================================================
+# MOOD INDEX
+# =============================================================================
+
+NUMPY_MISSING_MESSAGE = "❌ The mood index needs NumPy - install it with: pip install numpy"
+
+
+def _load_mood_index() -> Optional[Dict[str, Any]]:
+    """mood_index.npz as {ids, names, features} (None if never built or unreadable)"""
+    try:
+        with np.load(MOOD_INDEX_PATH, allow_pickle=False) as data:
+            return {key: data[key] for key in ("ids", "names", "features")}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _audio_feature_row(features: Dict[str, Any]) -> List[float]:
+    """Spotify audio-features object -> one matrix row (MOOD_FEATURES order, 0..1)"""
+    row = [float(features.get(name) or 0.0) for name in MOOD_FEATURES[:-1]]
+    row.append(min(max((float(features.get("tempo") or 0.0) - 60.0) / 120.0, 0.0), 1.0))
+    return row
+
+
+def _get_objects_by_id(endpoint: str, key: str, ids: List[str], batch_size: int) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+    """
+    Bulk GET endpoint?ids=... in groups of batch_size, sent concurrently
+    
+    Returns:
+        (objects by ID - IDs Spotify returned null for are left out, last error or None)
+    """
+    groups = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    if not groups:
+        return {}, None
+    
+    def fetch(group: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+        try:
+            return group, make_spotify_request("GET", endpoint, params={"ids": ",".join(group)})
+        except Exception as e:
+            return group, {"success": False, "error": str(e)}
+    
+    objects = {}
+    error = None
+    get_access_token()  # Refresh once up front, not from every worker
+    with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(groups))) as executor:
+        for group, response in executor.map(fetch, groups):
+            if not response.get("success", True):
+                error = response.get("error", "Unknown error")
+                continue
+            objects.update({oid: obj for oid, obj in zip(group, response.get(key) or []) if obj})
+    return objects, error
+
+
+def _genre_feature_rows(track_ids: List[str]) -> Tuple[Dict[str, List[float]], Optional[str]]:
+    """
+    Approximate feature rows from artist genres (fallback when audio features are unavailable)
+    
+    Tracks -> artist IDs (GET /tracks), artists -> genres (GET /artists); each
+    track gets the mean MOOD_GENRE_HINTS row of every hint its artists' genres
+    contain. Tracks whose artists have no matching genre get no row.
+    
+    Returns:
+        (rows by track ID, error or None)
+    """
+    tracks, error = _get_objects_by_id("/tracks", "tracks", track_ids, TRACK_LOOKUP_BATCH_SIZE)
+    track_artists = {
+        tid: [a["id"] for a in track.get("artists", []) if a.get("id")]
+        for tid, track in tracks.items()
+    }
+    artist_ids = list(dict.fromkeys(aid for aids in track_artists.values() for aid in aids))
+    artists, artist_error = _get_objects_by_id("/artists", "artists", artist_ids, ARTIST_LOOKUP_BATCH_SIZE)
+    
+    rows = {}
+    for tid, aids in track_artists.items():
+        hints = [
+            hint
+            for aid in aids
+            for genre in (artists.get(aid) or {}).get("genres", [])
+            for keyword, hint in MOOD_GENRE_HINTS.items()
+            if keyword in genre
+        ]
+        if hints:
+            rows[tid] = [sum(column) / len(hints) for column in zip(*hints)]
+    return rows, error or artist_error
+
+
+def build_mood_index_data() -> Dict[str, Any]:
+    """
+    (Re)build the mood index from saved tracks and playlist tracks
+    
+    Track lists come from the local saved-tracks export and playlist catalog
+    (both synced incrementally first). Audio features are reused from the
+    previous index; only new tracks hit GET /audio-features, 100 IDs per
+    request, sent concurrently. Tracks still without features (or all of them,
+    when the endpoint is forbidden for this app) are placed from their artists'
+    genres. Stored as a float32 matrix in mood_index.npz; a failed build is
+    recorded in spotify.db so play_mood doesn't retry it on every call.
+    
+    Returns:
+        Dict with tracks (indexed), fetched (new tracks given audio features), from_genres
+        (tracks placed by genre), missing (tracks left out) and error (None on success)
+    """
+    names = {}
+    export = export_saved_tracks()
+    with contextlib.closing(_open_library_db()) as conn:
+        for track_id, track_name, artists in conn.execute("SELECT track_id, track_name, artists FROM saved_tracks"):
+            names[track_id] = f"{track_name} - {artists}"
+    
+    playlist_ids = []
+    for playlist in _get_playlist_catalog(need_tracks=True)["playlists"]:
+        playlist_ids.extend(playlist.get("tracks") or [])
+    unnamed = [tid for tid in dict.fromkeys(playlist_ids) if tid not in names]
+    tracks, _ = lookup_tracks(unnamed)
+    for tid in unnamed:
+        if tid in tracks:
+            names[tid] = _format_track(tracks[tid]).removeprefix("🎵 ")
+    
+    if not names:
+        return _record_mood_index_failure(
+            {"tracks": 0, "fetched": 0, "from_genres": 0, "missing": 0,
+             "error": export["error"] or "No saved or playlist tracks found"}
+        )
+    
+    # Reuse features of tracks that were already indexed
+    rows = {}
+    previous = _load_mood_index()
+    if previous is not None:
+        for tid, row in zip(previous["ids"].tolist(), previous["features"]):
+            if tid in names:
+                rows[tid] = row
+    
+    missing = [tid for tid in names if tid not in rows]
+    groups = [missing[i:i + AUDIO_FEATURES_BATCH_SIZE] for i in range(0, len(missing), AUDIO_FEATURES_BATCH_SIZE)]
+    
+    with contextlib.closing(_open_library_db()) as conn:
+        forbidden_at = float(_get_sync_state(conn, "audio_features_forbidden_at") or 0)
+    if time.time() - forbidden_at < AUDIO_FEATURES_RETRY_SECONDS:
+        groups = []  # Known to be forbidden for this app - go straight to genres
+    
+    def fetch(group: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+        try:
+            return group, make_spotify_request("GET", "/audio-features", params={"ids": ",".join(group)})
+        except Exception as e:
+            return group, {"success": False, "error": str(e)}
+    
+    error = None
+    forbidden = False
+    if groups:
+        get_access_token()  # Refresh once up front, not from every worker
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(groups))) as executor:
+            for group, response in executor.map(fetch, groups):
+                if not response.get("success", True):
+                    forbidden = forbidden or response.get("status") == 403
+                    error = response.get("error", "Unknown error")
+                    continue
+                for tid, features in zip(group, response.get("audio_features") or []):
+                    if features:
+                        rows[tid] = _audio_feature_row(features)
+    fetched = sum(1 for tid in missing if tid in rows)
+    if forbidden:
+        with contextlib.closing(_open_library_db()) as conn:
+            _set_sync_state(conn, "audio_features_forbidden_at", time.time())
+        error = None  # Expected for newer apps - the genre fallback covers it
+    
+    # Fallback: tracks without audio features are placed by their artists' genres
+    without_features = [tid for tid in missing if tid not in rows]
+    genre_rows, genre_error = _genre_feature_rows(without_features)
+    rows.update(genre_rows)
+    error = error or genre_error
+    
+    if not rows:
+        return _record_mood_index_failure(
+            {"tracks": 0, "fetched": fetched, "from_genres": 0, "missing": len(names),
+             "error": error or "No audio features or artist genres available for your tracks"}
+        )
+    
+    ids = list(rows)
+    os.makedirs(SPOTIFY_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=SPOTIFY_CACHE_DIR, suffix=".npz.tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            ids=np.array(ids),
+            names=np.array([names[tid] for tid in ids]),
+            features=np.array([rows[tid] for tid in ids], dtype=np.float32)
+        )
+    os.replace(tmp_path, MOOD_INDEX_PATH)
+    with contextlib.closing(_open_library_db()) as conn:
+        _set_sync_state(conn, "mood_index_failure", "")
+    
+    return {"tracks": len(ids), "fetched": fetched, "from_genres": len(genre_rows),
+            "missing": len(names) - len(ids), "error": error}
+
+
+def _record_mood_index_failure(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Remember a failed build (time + error) so play_mood can report it without rebuilding"""
+    with contextlib.closing(_open_library_db()) as conn:
+        _set_sync_state(conn, "mood_index_failure", json.dumps({"at": time.time(), "error": summary["error"]}))
+    return summary
+
+
+def build_mood_index() -> str:
+    """Build / refresh the mood index and report its size"""
+    if np is None:
+        return NUMPY_MISSING_MESSAGE
+    
+    summary = build_mood_index_data()
+    if not summary["tracks"]:
+        return f"❌ Failed to build the mood index: {summary['error']}"
+    
+    result = f"""🧭 Mood index built: {summary['tracks']} track(s) from your saved tracks and playlists
+🔍 Audio features fetched for {summary['fetched']} new track(s)
+🌡️ Moods: {', '.join(MOOD_TARGETS)}"""
+    if summary["from_genres"]:
+        result += f"\n🏷️ {summary['from_genres']} track(s) placed by their artists' genres (no audio features available)"
+    if summary["missing"]:
+        result += f"\n⚠️ {summary['missing']} track(s) have no audio features or usable genres and were left out"
+    if summary["error"]:
+        result += f"\n⚠️ Some features could not be fetched: {summary['error']}"
+    return result
+
+
+def play_mood(temperature: str, limit: int = 10, device_id: Optional[str] = None) -> str:
+    """
+    Play tracks matching an emotional temperature - no searches, one play request
+    
+    Weighted nearest-neighbour lookup of the temperature's target vector over
+    the whole feature matrix, then a random pick among the closest candidates.
+    
+    Args:
+        temperature: One of MOOD_TARGETS (the send_heartbeat temperatures)
+        limit: Number of tracks to play (1-PLAY_URIS_MAX)
+        device_id: Device ID or name to play on
+    
+    Returns:
+        Success/error message
+    """
+    if np is None:
+        return NUMPY_MISSING_MESSAGE
+    
+    temperature = (temperature or "").strip().lower()
+    if temperature not in MOOD_TARGETS:
+        return f"❌ Unknown temperature: {temperature or '(none)'}. Use one of: {', '.join(MOOD_TARGETS)}"
+    limit = min(max(limit or 10, 1), PLAY_URIS_MAX)
+    
+    index = _load_mood_index()
+    if index is None:
+        with contextlib.closing(_open_library_db()) as conn:
+            failure = json.loads(_get_sync_state(conn, "mood_index_failure") or "null")
+        if failure and time.time() - failure["at"] < MOOD_INDEX_RETRY_SECONDS:
+            return (f"❌ No mood index - the last build failed {_format_minutes(int((time.time() - failure['at']) * 1000))} ago: "
+                    f"{failure['error']}. Run build_mood_index to retry.")
+        summary = build_mood_index_data()
+        if not summary["tracks"]:
+            return f"❌ No mood index yet and building it failed: {summary['error']}"
+        index = _load_mood_index()
+    
+    target = np.array(MOOD_TARGETS[temperature], dtype=np.float32)
+    weights = np.array(MOOD_FEATURE_WEIGHTS, dtype=np.float32)
+    distances = ((index["features"] - target) ** 2) @ weights
+    
+    count = min(limit * MOOD_CANDIDATES_FACTOR, len(distances))
+    candidates = np.argpartition(distances, count - 1)[:count]
+    picks = np.random.default_rng().choice(candidates, size=min(limit, count), replace=False)
+    picks = picks[np.argsort(distances[picks])]  # Closest match first
+    
+    ids = index["ids"][picks].tolist()
+    response, note, error = _start_playback({"uris": [f"spotify:track:{tid}" for tid in ids]}, device_id)
+    if error:
+        return error
+    if not response.get("success"):
+        if response.get("status") == 404:
+            return NO_DEVICE_MESSAGE
+        return f"❌ Failed to play: {response.get('error', 'Unknown error')}"
+    
+    lines = [f"🎵 {name}" for name in index["names"][picks].tolist()]
+    result = f"🌡️ Playing '{temperature}' - {len(ids)} track(s) from your library:\n" + _format_track_list(lines)
+    return f"{result}\n{note}" if note else result
 
 
 # =============================================================================
@@ -171,6 +2014,15 @@ def search_spotify(
     if limit < 1 or limit > 50:
         limit = 10
     
+    # Programmatic top-result lookups go through the persistent query cache
+    # (free-text browsing always hits the API so results stay fresh)
+    use_cache = return_raw and limit == 1
+    items_key = f"{search_type}s"
+    if use_cache:
+        cached = _search_cache_get(query, search_type)
+        if cached:
+            return {items_key: {"items": [cached]}, "cached": True}
+    
     response = make_spotify_request(
         "GET",
         "/search",
@@ -188,6 +2040,10 @@ def search_spotify(
     
     # If raw response requested, return it for programmatic use
     if return_raw:
+        if use_cache:
+            items = [i for i in (response.get(items_key) or {}).get("items", []) if i]
+            if items:
+                _search_cache_put(query, search_type, items[0])
         return response
     
     # Otherwise format for human-readable output
@@ -210,21 +2066,252 @@ def search_spotify(
             artists = ", ".join([a["name"] for a in item["artists"]])
             results.append(f"💿 {item['name']} - {artists} (ID: {item['id']})")
     
-    elif search_type == "playlist":
-        items = response.get("playlists", {}).get("items", [])
-        for item in items:
-            results.append(f"📋 {item['name']} by {item['owner']['display_name']} (ID: {item['id']})")
+    elif search_type == "playlist":
+        items = response.get("playlists", {}).get("items", [])
+        for item in items:
+            results.append(f"📋 {item['name']} by {item['owner']['display_name']} (ID: {item['id']})")
+    
+    if not results:
+        return f"🔍 No {search_type}s found for: {query}"
+    
+    return f"🔍 Found {len(results)} {search_type}(s) for '{query}':\n\n" + "\n".join(results)
+
+
+def _resolve_track_queries(queries: List[str]) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Resolve song queries to their top track, searching in parallel
+    
+    Args:
+        queries: Song search strings
+    
+    Returns:
+        (query, track, error) per query, in input order - track is None when the search failed
+    """
+    def resolve(search_query: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        try:
+            search_response = search_spotify(search_query, "track", limit=1, return_raw=True)
+        except Exception as e:
+            return search_query, None, str(e)
+        
+        if not search_response.get("success", True) or "error" in search_response:
+            return search_query, None, search_response.get("error", "No results")
+        
+        items = search_response.get("tracks", {}).get("items", [])
+        if not items:
+            return search_query, None, "No tracks found"
+        return search_query, items[0], None
+    
+    if len(queries) <= 1:
+        return [resolve(q) for q in queries]
+    
+    get_access_token()  # Refresh once up front, not from every worker
+    with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(queries))) as executor:
+        return list(executor.map(resolve, queries))
+
+
+def _format_track(track: Dict[str, Any]) -> str:
+    """One-line track display for result messages"""
+    track_name = track.get("name", "Unknown")
+    artists = ", ".join([a["name"] for a in track.get("artists", [])])
+    return f"🎵 {track_name} - {artists}"
+
+
+def _format_track_list(lines: List[str]) -> str:
+    """Join result lines, summarizing past MAX_LISTED_TRACKS so huge playlists stay readable"""
+    if len(lines) <= MAX_LISTED_TRACKS:
+        return "\n".join(lines)
+    return "\n".join(lines[:MAX_LISTED_TRACKS]) + f"\n... and {len(lines) - MAX_LISTED_TRACKS} more"
+
+
+def _add_to_playlist_chunked(
+    playlist_id: str,
+    queries: Optional[List[str]] = None,
+    track_ids: Optional[List[str]] = None,
+    existing_ids: Optional[set] = None
+) -> Dict[str, Any]:
+    """
+    Add tracks to a playlist in 100-URI chunks, resolving queries as it goes
+    
+    Queries are resolved one chunk at a time while the previous chunk is being
+    posted, so search and add round-trips overlap. Chunks are posted strictly in
+    order on a single worker; the first failed chunk stops the rest.
+    
+    Args:
+        playlist_id: Spotify playlist ID
+        queries: Song search strings (resolved to their top track)
+        track_ids: Spotify track IDs (used when no queries are given; names looked up in bulk)
+        existing_ids: Track IDs already in the playlist (skipped, as are repeats within the call)
+    
+    Returns:
+        Dict with added / not_added / duplicates (display lines, in order),
+        added_ids, found_count, failed_searches, chunks, snapshot_id (of the
+        last successful chunk) and error (None on success)
+    """
+    state = {"added": [], "added_ids": [], "chunks": 0, "snapshot_id": None, "error": None}
+    
+    def post_chunk(chunk: List[Tuple[str, str]]) -> None:
+        if state["error"]:
+            return
+        try:
+            response = make_spotify_request(
+                "POST",
+                f"/playlists/{playlist_id}/tracks",
+                data={"uris": [uri for uri, _ in chunk]}
+            )
+        except Exception as e:
+            state["error"] = str(e)
+            return
+        if response.get("success") == False:
+            state["error"] = response.get("error", "Unknown error")
+            return
+        # Each add returns the playlist's new snapshot_id - keep the latest
+        state["snapshot_id"] = response.get("snapshot_id", state["snapshot_id"])
+        state["chunks"] += 1
+        state["added"].extend(display for _, display in chunk)
+        state["added_ids"].extend(uri.rsplit(":", 1)[-1] for uri, _ in chunk)
+    
+    failed_searches = []
+    found = []
+    duplicates = []
+    pending = []
+    seen = set(existing_ids or ())
+    
+    def queue_track(track_id: str, display: str) -> None:
+        if track_id in seen:
+            duplicates.append(display)
+            return
+        seen.add(track_id)
+        pending.append((f"spotify:track:{track_id}", display))
+        found.append(display)
+    
+    with ThreadPoolExecutor(max_workers=1) as poster:
+        if queries:
+            for start in range(0, len(queries), PLAYLIST_ADD_CHUNK_SIZE):
+                if state["error"]:
+                    break
+                for search_query, track, error in _resolve_track_queries(queries[start:start + PLAYLIST_ADD_CHUNK_SIZE]):
+                    if track is None:
+                        failed_searches.append(f"'{search_query}': {error}")
+                        continue
+                    queue_track(track["id"], _format_track(track))
+                
+                while len(pending) >= PLAYLIST_ADD_CHUNK_SIZE:
+                    poster.submit(post_chunk, pending[:PLAYLIST_ADD_CHUNK_SIZE])
+                    pending = pending[PLAYLIST_ADD_CHUNK_SIZE:]
+        else:
+            # One /tracks request per 50 IDs for display names; IDs Spotify
+            # doesn't know are reported instead of failing the whole chunk
+            details, unknown = lookup_tracks(track_ids or [])
+            for tid in track_ids or []:
+                if tid in unknown:
+                    failed_searches.append(f"'{tid}': Track not found")
+                    continue
+                queue_track(tid, _format_track(details[tid]) if tid in details else tid)
+        
+        for start in range(0, len(pending), PLAYLIST_ADD_CHUNK_SIZE):
+            poster.submit(post_chunk, pending[start:start + PLAYLIST_ADD_CHUNK_SIZE])
+    
+    return {
+        "added": state["added"],
+        "added_ids": state["added_ids"],
+        "duplicates": duplicates,
+        "found_count": len(found),
+        "not_added": found[len(state["added"]):],
+        "failed_searches": failed_searches,
+        "chunks": state["chunks"],
+        "snapshot_id": state["snapshot_id"],
+        "error": state["error"]
+    }
+
+
+def _describe_chunked_add(outcome: Dict[str, Any]) -> str:
+    """Result lines shared by add_to_playlist and create_playlist"""
+    added = outcome["added"]
+    result = f"🎵 Added {len(added)} track(s):\n" + _format_track_list(added)
+    
+    if outcome["chunks"] > 1:
+        result += f"\n\n📦 Added in {outcome['chunks']} chunks (snapshot {outcome['snapshot_id']})"
+    
+    if outcome["error"]:
+        not_added = outcome["not_added"]
+        result += f"\n\n❌ Stopped after {len(added)}/{outcome['found_count']} track(s): {outcome['error']}"
+        result += f"\n⚠️ {len(not_added)} found track(s) were NOT added (retry these):\n" + _format_track_list(not_added)
+    
+    if outcome["duplicates"]:
+        result += f"\n\n⏭️ Skipped {len(outcome['duplicates'])} duplicate(s) already in the playlist:\n"
+        result += _format_track_list(outcome["duplicates"])
+    
+    failed_searches = outcome["failed_searches"]
+    if failed_searches:
+        result += f"\n\n⚠️ Failed to find {len(failed_searches)} track(s):\n" + _format_track_list(failed_searches)
+    
+    return result
+
+
+def _start_playback(
+    payload: Dict[str, Any],
+    device_id: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[str], Optional[str]]:
+    """
+    Send one play request to the preflighted device
+    
+    An inactive target is woken up by the play request itself; a 404 means the
+    cached device list was stale, so it is refetched once and the play retried.
+    
+    Returns:
+        (play response, device note or None, device error message or None)
+    """
+    for refresh in (False, True):
+        target, note, error = _prepare_playback_device(device_id, refresh=refresh)
+        if error:
+            return {}, None, error
+        
+        response = make_spotify_request(
+            "PUT",
+            "/me/player/play",
+            data=payload,
+            params={"device_id": target} if target else None
+        )
+        if response.get("status") != 404:
+            break
+        _update_device_cache(invalidate=True)  # Device list was stale - refetch once
+    
+    if response.get("success"):
+        _invalidate_now_playing()
+        if target:
+            _update_device_cache(active_id=target)
+    return response, note, None
+
+
+def _search_first_item(query: str, content_type: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Top search result for play_music
+    
+    Returns:
+        (spotify_id, display name, error message) - error is None on success
+    """
+    search_response = search_spotify(query, content_type, limit=1, return_raw=True)
     
-    if not results:
-        return f"🔍 No {search_type}s found for: {query}"
+    if not search_response.get("success", True) or "error" in search_response:
+        return None, None, f"❌ Search failed: {search_response.get('error', 'No results found')}"
     
-    return f"🔍 Found {len(results)} {search_type}(s) for '{query}':\n\n" + "\n".join(results)
+    items = search_response.get(f"{content_type}s", {}).get("items", [])
+    if not items:
+        return None, None, f"🔍 No {content_type}s found for: {query}"
+    
+    first_item = items[0]
+    item_name = first_item.get("name", "Unknown")
+    if content_type == "track":
+        artists = ", ".join([a["name"] for a in first_item.get("artists", [])])
+        return first_item["id"], f"{item_name} - {artists}", None
+    return first_item["id"], item_name, None
 
 
 def play_music(
     spotify_id: Optional[str] = None,
     content_type: str = "track",
-    query: Optional[str] = None
+    query: Optional[str] = None,
+    device_id: Optional[str] = None
 ) -> str:
     """
     Play a track, album, artist, or playlist
@@ -233,60 +2320,64 @@ def play_music(
         spotify_id: Spotify ID of the content (if not provided, query must be provided)
         content_type: One of: track, album, artist, playlist
         query: Search query (alternative to spotify_id - will play first result)
+        device_id: Device ID or name to play on (default: active, else preferred/last used device)
     
     Returns:
         Success/error message
     """
+    item_display = spotify_id
+    describe_id = spotify_id if spotify_id and content_type == "track" else None
+    
+    # The user's own playlist by its exact name resolves locally - no search, and no
+    # public look-alikes. Partial names still search ("rock" is not "Dark Rock Nights")
+    from_catalog = False
+    if not spotify_id and query and content_type == "playlist":
+        matches = _match_playlists(_load_playlist_catalog(), query)
+        if matches and " ".join(matches[0]["name"].casefold().split()) == " ".join(query.casefold().split()):
+            spotify_id = matches[0]["id"]
+            item_display = matches[0]["name"]
+            from_catalog = True
+    
     # If no spotify_id provided, search for it
     if not spotify_id:
         if not query:
             return "❌ Either spotify_id or query must be provided"
-        
-        # Search for the content
-        search_response = search_spotify(query, content_type, limit=1, return_raw=True)
-        
-        if not search_response.get("success", True) or "error" in search_response:
-            return f"❌ Search failed: {search_response.get('error', 'No results found')}"
-        
-        # Extract first result
-        items_key = f"{content_type}s"
-        items = search_response.get(items_key, {}).get("items", [])
-        
-        if not items:
-            return f"🔍 No {content_type}s found for: {query}"
-        
-        first_item = items[0]
-        spotify_id = first_item["id"]
-        
-        # Get name for user feedback
-        item_name = first_item.get("name", "Unknown")
-        if content_type == "track":
-            artists = ", ".join([a["name"] for a in first_item.get("artists", [])])
-            item_display = f"{item_name} - {artists}"
-        else:
-            item_display = item_name
-    else:
-        item_display = spotify_id
-    
-    uri = f"spotify:{content_type}:{spotify_id}"
+        spotify_id, item_display, error = _search_first_item(query, content_type)
+        if error:
+            return error
     
     # Different payload structure for tracks vs context
     if content_type == "track":
-        payload = {"uris": [uri]}
+        payload = {"uris": [f"spotify:track:{spotify_id}"]}
     else:
-        payload = {"context_uri": uri}
+        payload = {"context_uri": f"spotify:{content_type}:{spotify_id}"}
+    
+    response, note, error = _start_playback(payload, device_id)
+    if error:
+        return error
     
-    response = make_spotify_request("PUT", "/me/player/play", data=payload)
+    if from_catalog and not response.get("success"):
+        # The catalog entry may be stale (playlist deleted since the last sync) - search instead
+        spotify_id, item_display, error = _search_first_item(query, content_type)
+        if error:
+            return error
+        response, note, error = _start_playback({"context_uri": f"spotify:playlist:{spotify_id}"}, device_id)
+        if error:
+            return error
     
     if response.get("success"):
+        if describe_id:
+            # Name lookup only once the music is already playing (usually served from tracks.json)
+            item_display = _describe_track_id(describe_id).removeprefix("🎵 ")
+        result = f"▶️ Now playing {content_type}: {item_display}"
         if query:
-            return f"▶️ Now playing: {item_display}\n(Found via search: '{query}')"
-        return f"▶️ Now playing {content_type}: {item_display}"
+            result = f"▶️ Now playing: {item_display}\n(Found via search: '{query}')"
+        return f"{result}\n{note}" if note else result
     else:
         error = response.get("error", "Unknown error")
         # Check if no active device
         if response.get("status") == 404:
-            return "⚠️ No active Spotify device found. Please open Spotify on a device and try again."
+            return NO_DEVICE_MESSAGE
         return f"❌ Failed to play: {error}"
 
 
@@ -295,6 +2386,7 @@ def pause_playback() -> str:
     response = make_spotify_request("PUT", "/me/player/pause")
     
     if response.get("success"):
+        _invalidate_now_playing()
         return "⏸️ Playback paused"
     else:
         return f"❌ Failed to pause: {response.get('error', 'Unknown error')}"
@@ -305,6 +2397,7 @@ def skip_to_next() -> str:
     response = make_spotify_request("POST", "/me/player/next")
     
     if response.get("success"):
+        _invalidate_now_playing()
         return "⏭️ Skipped to next track"
     else:
         return f"❌ Failed to skip: {response.get('error', 'Unknown error')}"
@@ -315,19 +2408,20 @@ def skip_to_previous() -> str:
     response = make_spotify_request("POST", "/me/player/previous")
     
     if response.get("success"):
+        _invalidate_now_playing()
         return "⏮️ Skipped to previous track"
     else:
         return f"❌ Failed to skip: {response.get('error', 'Unknown error')}"
 
 
 def get_now_playing() -> str:
-    """Get currently playing track information"""
-    response = make_spotify_request("GET", "/me/player/currently-playing")
+    """Get currently playing track information (from the shared now-playing snapshot)"""
+    response = get_now_playing_snapshot()
     
     if not response.get("success", True):
         return f"❌ Failed to get current track: {response.get('error', 'Unknown error')}"
     
-    if not response or not response.get("item"):
+    if not response.get("item"):
         return "🔇 Nothing currently playing"
     
     item = response["item"]
@@ -335,9 +2429,9 @@ def get_now_playing() -> str:
     progress_ms = response.get("progress_ms", 0)
     duration_ms = item.get("duration_ms", 0)
     
-    artists = ", ".join([a["name"] for a in item["artists"]])
+    artists = ", ".join(item["artists"])
     track_name = item["name"]
-    album_name = item["album"]["name"]
+    album_name = item["album"]
     
     # Convert milliseconds to minutes:seconds
     progress_min = progress_ms // 60000
@@ -394,6 +2488,7 @@ def create_playlist(
     
     playlist_id = response["id"]
     playlist_url = response["external_urls"]["spotify"]
+    _catalog_record_add(playlist_id, [], new_playlist={"id": playlist_id, "name": name, "owner_id": user_id})
     
     return f"""✅ Created playlist: {name}
 🆔 ID: {playlist_id}
@@ -418,69 +2513,28 @@ def add_tracks_to_playlist(
     Returns:
         Success/error message
     """
-    # If no track_ids provided, search for it
-    if not track_ids:
-        if not query:
-            return "❌ Either track_ids or query must be provided"
-        
-        # Split query by semicolon for multiple tracks
-        queries = [q.strip() for q in query.split(";") if q.strip()]
-        
-        track_ids = []
-        found_tracks = []
-        failed_searches = []
-        
-        # Search for each query
-        for search_query in queries:
-            search_response = search_spotify(search_query, "track", limit=1, return_raw=True)
-            
-            if not search_response.get("success", True) or "error" in search_response:
-                failed_searches.append(f"'{search_query}': {search_response.get('error', 'No results')}")
-                continue
-            
-            # Extract first result
-            items = search_response.get("tracks", {}).get("items", [])
-            
-            if not items:
-                failed_searches.append(f"'{search_query}': No tracks found")
-                continue
-            
-            first_track = items[0]
-            track_ids.append(first_track["id"])
-            
-            # Get track info for user feedback
-            track_name = first_track.get("name", "Unknown")
-            artists = ", ".join([a["name"] for a in first_track.get("artists", [])])
-            found_tracks.append(f"🎵 {track_name} - {artists}")
-        
-        if not track_ids:
-            return f"❌ No tracks found for any query:\n" + "\n".join(failed_searches)
-        
-        searched = True
-    else:
-        found_tracks = []
-        failed_searches = []
-        searched = False
+    if not track_ids and not query:
+        return "❌ Either track_ids or query must be provided"
     
-    # Convert track IDs to URIs
-    track_uris = [f"spotify:track:{tid}" for tid in track_ids]
+    # Tracks the local catalog already knows are in the playlist are skipped
+    existing_ids = _catalog_track_ids(playlist_id)
     
-    response = make_spotify_request(
-        "POST",
-        f"/playlists/{playlist_id}/tracks",
-        data={"uris": track_uris}
-    )
-    
-    if response.get("success") == False:
-        return f"❌ Failed to add tracks: {response.get('error', 'Unknown error')}"
+    if track_ids:
+        outcome = _add_to_playlist_chunked(playlist_id, track_ids=track_ids, existing_ids=existing_ids)
+    else:
+        # Split query by semicolon for multiple tracks
+        queries = [q.strip() for q in query.split(";") if q.strip()]
+        outcome = _add_to_playlist_chunked(playlist_id, queries=queries, existing_ids=existing_ids)
+    _catalog_record_add(playlist_id, outcome["added_ids"])
     
-    if searched:
-        result = f"✅ Added {len(track_ids)} track(s) to playlist:\n\n" + "\n".join(found_tracks)
-        if failed_searches:
-            result += f"\n\n⚠️ Failed to find {len(failed_searches)} track(s):\n" + "\n".join(failed_searches)
-        return result
+    if outcome["found_count"] == 0 and not outcome["duplicates"]:
+        what = "track ID" if track_ids else "query"
+        return f"❌ No tracks found for any {what}:\n" + _format_track_list(outcome["failed_searches"])
+    if outcome["error"] and not outcome["added"]:
+        return f"❌ Failed to add tracks: {outcome['error']}"
     
-    return f"✅ Added {len(track_ids)} track(s) to playlist {playlist_id}"
+    status = "⚠️ Partially updated" if outcome["error"] else "✅ Updated"
+    return f"{status} playlist {playlist_id}:\n\n" + _describe_chunked_add(outcome)
 
 
 def create_and_populate_playlist(
@@ -525,8 +2579,9 @@ def create_and_populate_playlist(
     
     playlist_id = create_response["id"]
     playlist_url = create_response["external_urls"]["spotify"]
+    _catalog_record_add(playlist_id, [], new_playlist={"id": playlist_id, "name": name, "owner_id": user_id})
     
-    # Step 2: Search for and add songs
+    # Step 2: Parse song queries
     queries = [q.strip() for q in songs.split(";") if q.strip()]
     
     if not queries:
@@ -536,96 +2591,49 @@ def create_and_populate_playlist(
 
 ⚠️ No songs provided to add"""
     
-    track_ids = []
-    found_tracks = []
-    failed_searches = []
-    
-    # Search for each song
-    for search_query in queries:
-        search_response = search_spotify(search_query, "track", limit=1, return_raw=True)
-        
-        if not search_response.get("success", True) or "error" in search_response:
-            failed_searches.append(f"'{search_query}': {search_response.get('error', 'No results')}")
-            continue
-        
-        items = search_response.get("tracks", {}).get("items", [])
-        
-        if not items:
-            failed_searches.append(f"'{search_query}': No tracks found")
-            continue
-        
-        first_track = items[0]
-        track_ids.append(first_track["id"])
-        
-        track_name = first_track.get("name", "Unknown")
-        artists = ", ".join([a["name"] for a in first_track.get("artists", [])])
-        found_tracks.append(f"🎵 {track_name} - {artists}")
+    # Step 3: Search for songs and add them in 100-track chunks (pipelined)
+    outcome = _add_to_playlist_chunked(playlist_id, queries=queries)
+    _catalog_record_add(playlist_id, outcome["added_ids"])
     
-    # Step 3: Add found tracks to the new playlist
-    if track_ids:
-        track_uris = [f"spotify:track:{tid}" for tid in track_ids]
-        
-        add_response = make_spotify_request(
-            "POST",
-            f"/playlists/{playlist_id}/tracks",
-            data={"uris": track_uris}
-        )
-        
-        if add_response.get("success") == False:
-            return f"""✅ Created playlist: {name}
+    if outcome["found_count"] and not outcome["added"]:
+        return f"""✅ Created playlist: {name}
 🆔 ID: {playlist_id}
 🔗 URL: {playlist_url}
 
-❌ But failed to add tracks: {add_response.get('error', 'Unknown error')}"""
+❌ But failed to add tracks: {outcome['error']}"""
     
     # Step 4: Build comprehensive result message
     result = f"""✅ Created & populated playlist: {name}
 🆔 ID: {playlist_id}
 🔗 URL: {playlist_url}
 
-🎵 Added {len(track_ids)} track(s):
 """
-    result += "\n".join(found_tracks)
-    
-    if failed_searches:
-        result += f"\n\n⚠️ Failed to find {len(failed_searches)} track(s):\n"
-        result += "\n".join(failed_searches)
-    
-    return result
+    return result + _describe_chunked_add(outcome)
 
 
 def get_my_playlists(limit: int = 20) -> str:
     """
-    Get user's playlists
+    Get user's playlists (from the incrementally synced local catalog)
     
     Args:
-        limit: Number of playlists to return (1-50)
+        limit: Number of playlists to return (no 50 cap - the catalog holds them all)
     
     Returns:
         Formatted list of playlists
     """
-    if limit < 1 or limit > 50:
+    if limit < 1:
         limit = 20
     
-    response = make_spotify_request(
-        "GET",
-        "/me/playlists",
-        params={"limit": limit}
-    )
-    
-    if not response.get("success", True):
-        return f"❌ Failed to get playlists: {response.get('error', 'Unknown error')}"
-    
-    items = response.get("items", [])
+    playlists = _get_playlist_catalog()["playlists"]
     
-    if not items:
+    if not playlists:
         return "📋 You have no playlists"
     
-    results = [f"📋 Your Playlists ({len(items)}):\n"]
+    shown = playlists[:limit]
+    results = [f"📋 Your Playlists ({len(shown)} of {len(playlists)}):\n"]
     
-    for item in items:
-        track_count = item["tracks"]["total"]
-        results.append(f"• {item['name']} ({track_count} tracks) - ID: {item['id']}")
+    for item in shown:
+        results.append(f"• {item['name']} ({item.get('total', 0)} tracks) - ID: {item['id']}")
     
     return "\n".join(results)
 
@@ -633,7 +2641,8 @@ def get_my_playlists(limit: int = 20) -> str:
 def add_to_queue(
     spotify_id: Optional[str] = None,
     content_type: str = "track",
-    query: Optional[str] = None
+    query: Optional[str] = None,
+    device_id: Optional[str] = None
 ) -> str:
     """
     Add track(s) to the playback queue
@@ -644,6 +2653,7 @@ def add_to_queue(
         query: Search query (alternative to spotify_id - will queue first result)
                Can be multiple queries separated by semicolons (;) to add multiple tracks
                Example: "bohemian rhapsody; stairway to heaven; hotel california"
+        device_id: Device ID or name to queue on (default: active, else preferred/last used device)
     
     Returns:
         Success/error message
@@ -651,106 +2661,244 @@ def add_to_queue(
     if content_type != "track":
         return "⚠️ Only tracks can be added to queue. Use 'play' action for albums/playlists."
     
-    # If no spotify_id provided, search for it
-    if not spotify_id:
-        if not query:
-            return "❌ Either spotify_id or query must be provided"
-        
+    if not spotify_id and not query:
+        return "❌ Either spotify_id or query must be provided"
+    
+    failed_searches = []
+    if spotify_id:
+        # Queue by ID right away - the display name is looked up after the post succeeded
+        tracks = [(spotify_id, spotify_id)]
+    else:
         # Split query by semicolon for multiple tracks
         queries = [q.strip() for q in query.split(";") if q.strip()]
+        tracks = []
         
-        track_ids = []
-        found_tracks = []
-        failed_searches = []
-        
-        # Search for each query
-        for search_query in queries:
-            search_response = search_spotify(search_query, "track", limit=1, return_raw=True)
-            
-            if not search_response.get("success", True) or "error" in search_response:
-                failed_searches.append(f"'{search_query}': {search_response.get('error', 'No results')}")
+        # Search for all queries in parallel (results keep input order)
+        for search_query, track, error in _resolve_track_queries(queries):
+            if track is None:
+                failed_searches.append(f"'{search_query}': {error}")
                 continue
-            
-            # Extract first result
-            items = search_response.get("tracks", {}).get("items", [])
-            
-            if not items:
-                failed_searches.append(f"'{search_query}': No tracks found")
-                continue
-            
-            first_track = items[0]
-            track_ids.append(first_track["id"])
-            
-            # Get track info for user feedback
-            track_name = first_track.get("name", "Unknown")
-            artists = ", ".join([a["name"] for a in first_track.get("artists", [])])
-            found_tracks.append(f"🎵 {track_name} - {artists}")
+            tracks.append((track["id"], _format_track(track)))
         
-        if not track_ids:
+        if not tracks:
             return f"❌ No tracks found for any query:\n" + "\n".join(failed_searches)
-        
-        # Add all tracks to queue
-        added_count = 0
-        queue_errors = []
-        
-        for track_id, track_info in zip(track_ids, found_tracks):
-            uri = f"spotify:track:{track_id}"
-            response = make_spotify_request(
-                "POST",
-                "/me/player/queue",
-                params={"uri": uri}
-            )
-            
-            if response.get("success"):
-                added_count += 1
-            else:
-                error = response.get("error", "Unknown error")
-                if response.get("status") == 404:
-                    return "⚠️ No active Spotify device found. Please open Spotify on a device and try again."
-                queue_errors.append(f"{track_info}: {error}")
-        
-        result = f"✅ Added {added_count} track(s) to queue:\n\n" + "\n".join(found_tracks[:added_count])
-        
-        if failed_searches:
-            result += f"\n\n⚠️ Failed to find {len(failed_searches)} track(s):\n" + "\n".join(failed_searches)
-        
-        if queue_errors:
-            result += f"\n\n❌ Failed to queue {len(queue_errors)} track(s):\n" + "\n".join(queue_errors)
-        
-        return result
     
-    else:
-        # Single track by ID
-        uri = f"spotify:track:{spotify_id}"
-        
+    # Idle player: start playback with the whole list in ONE request instead of N queue posts.
+    # A single track is simply queued - probing the player would cost as much as the post
+    idle = len(tracks) > 1 and _player_is_idle(get_player_state())
+    
+    note = None
+    queued_tracks = []
+    if idle:
+        target, note, error = _prepare_playback_device(device_id)
+        if error:
+            return error
+        head = tracks[:PLAY_URIS_MAX]
         response = make_spotify_request(
-            "POST",
-            "/me/player/queue",
-            params={"uri": uri}
+            "PUT",
+            "/me/player/play",
+            data={"uris": [f"spotify:track:{track_id}" for track_id, _ in head]},
+            params={"device_id": target} if target else None
         )
+        if response.get("success"):
+            _invalidate_now_playing()
+            if target:
+                _update_device_cache(active_id=target)
+            queued_tracks = [track_info for _, track_info in head]
+            tracks = tracks[PLAY_URIS_MAX:]
+            note = "▶️ Player was idle - started playback with these tracks" + (f"\n{note}" if note else "")
+            device_id = target
+        elif response.get("status") != 404:
+            return f"❌ Failed to start playback: {response.get('error', 'Unknown error')}"
+    
+    # Remaining tracks: sequential queue posts (each sent after the previous one
+    # is acknowledged, so queue order matches input order) over the pooled connection
+    outcome = _queue_tracks_in_order(tracks, device_id)
+    if outcome["error"] and not queued_tracks and not outcome["queued"]:
+        return outcome["error"]
+    queued_tracks += outcome["queued"]
+    note = note or outcome["note"]
+    
+    if spotify_id:
+        if outcome["failed"]:
+            return f"❌ Failed to add to queue: {outcome['failed'][0]}"
+        result = f"✅ Added track to queue: {_describe_track_id(spotify_id)}"
+    else:
+        result = f"✅ Added {len(queued_tracks)} track(s) to queue:\n\n" + _format_track_list(queued_tracks)
+    
+    if note:
+        result += f"\n{note}"
+    
+    if failed_searches:
+        result += f"\n\n⚠️ Failed to find {len(failed_searches)} track(s):\n" + "\n".join(failed_searches)
+    
+    if outcome["failed"] and not spotify_id:
+        result += f"\n\n❌ Failed to queue {len(outcome['failed'])} track(s):\n" + _format_track_list(outcome["failed"])
+    
+    if outcome["error"] and outcome["not_queued"]:
+        result += f"\n\n{outcome['error']}\n⚠️ Not queued ({len(outcome['not_queued'])}):\n" + _format_track_list(outcome["not_queued"])
+    
+    return result
+
+
+def _queue_tracks_in_order(tracks: List[Tuple[str, str]], device_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Post tracks to the queue one after another, in order
+    
+    Each post waits for the previous one's acknowledgement (the queue has no
+    position parameter, so this is what keeps order). There is no fixed spacing:
+    a 429 pauses the posts through the shared back-off. A 404 triggers one device
+    refresh/transfer and a retry; a second 404 stops and reports the rest as not queued.
+    
+    Args:
+        tracks: (track_id, display line) pairs
+        device_id: Device ID or name to target (default: active/preferred device)
+    
+    Returns:
+        Dict with queued / failed / not_queued (display lines), note and error
+    """
+    outcome = {"queued": [], "failed": [], "not_queued": [], "note": None, "error": None}
+    if not tracks:
+        return outcome
+    
+    # Preflight the device - transfer playback first if nothing is active
+    target, outcome["note"], error = _prepare_playback_device(device_id, transfer=True)
+    if error:
+        outcome["error"] = error
+        outcome["not_queued"] = [track_info for _, track_info in tracks]
+        return outcome
+    
+    retried = False
+    index = 0
+    while index < len(tracks):
+        track_id, track_info = tracks[index]
+        
+        params = {"uri": f"spotify:track:{track_id}"}
+        if target:
+            params["device_id"] = target
+        response = make_spotify_request("POST", "/me/player/queue", params=params)
         
         if response.get("success"):
-            return f"✅ Added track to queue: {spotify_id}"
+            outcome["queued"].append(track_info)
+        elif response.get("error") == BATCH_DEADLINE_ERROR:
+            outcome["error"] = f"⏱️ {BATCH_DEADLINE_ERROR}"
+            outcome["not_queued"] = [info for _, info in tracks[index:]]
+            return outcome
+        elif response.get("status") == 404:
+            if retried:
+                outcome["error"] = NO_DEVICE_MESSAGE
+                outcome["not_queued"] = [info for _, info in tracks[index:]]
+                return outcome
+            # Cached device list was stale - refetch, transfer, retry this track once
+            retried = True
+            _update_device_cache(invalidate=True)
+            target, outcome["note"], error = _prepare_playback_device(device_id, transfer=True, refresh=True)
+            if error:
+                outcome["error"] = error
+                outcome["not_queued"] = [info for _, info in tracks[index:]]
+                return outcome
+            continue
         else:
-            error = response.get("error", "Unknown error")
-            if response.get("status") == 404:
-                return "⚠️ No active Spotify device found. Please open Spotify on a device and try again."
-            return f"❌ Failed to add to queue: {error}"
+            outcome["failed"].append(f"{track_info}: {response.get('error', 'Unknown error')}")
+        index += 1
+    
+    return outcome
 
 
 # =============================================================================
 # BATCH OPERATIONS
 # =============================================================================
 
-def _execute_batch(operations: List[Dict[str, Any]]) -> str:
+def _split_queries(text: Optional[str]) -> List[str]:
+    """Semicolon-separated song list -> individual queries"""
+    return [q.strip() for q in (text or "").split(";") if q.strip()]
+
+
+def _plan_batch_searches(operations: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Resolve every top-result search a batch will need in one concurrent stage
+    
+    Walks the operations, collects the queries that play / add_to_queue /
+    add_to_playlist / create_playlist will look up, drops duplicates and
+    resolves the rest in parallel. Results land in the search cache, so the
+    operations themselves - still run in order - find them without API calls.
+    Playlist plays are skipped: they usually resolve from the local catalog.
+    Raw track IDs from all operations are looked up together (one /tracks
+    request per 50) so every operation displays names from tracks.json.
+    
+    Returns:
+        Dict with 'queries' (total collected), 'unique' (actually resolved)
+        and 'track_ids' (distinct IDs looked up)
+    """
+    wanted = []
+    track_ids = []
+    for op in operations:
+        if not isinstance(op, dict):
+            continue
+        op_action = op.get("action")
+        content_type = op.get("content_type") or "track"
+        
+        if op.get("spotify_id") and content_type == "track" and op_action in ("play", "add_to_queue", "playlists_with_track"):
+            track_ids.append(op["spotify_id"])
+        elif op_action == "add_to_playlist" and op.get("track_ids"):
+            track_ids.extend(tid.strip() for tid in op["track_ids"].split(","))
+        
+        if op_action == "play" and not op.get("spotify_id") and op.get("query") and content_type != "playlist":
+            wanted.append((op["query"], content_type))
+        elif op_action == "add_to_queue" and not op.get("spotify_id") and content_type == "track":
+            wanted.extend((q, "track") for q in _split_queries(op.get("query")))
+        elif op_action == "add_to_playlist" and not op.get("track_ids"):
+            wanted.extend((q, "track") for q in _split_queries(op.get("query")))
+        elif op_action == "create_playlist":
+            wanted.extend((q, "track") for q in _split_queries(op.get("songs")))
+    
+    unique = {}
+    for search_query, search_type in wanted:
+        unique.setdefault(_search_cache_key(search_query, search_type), (search_query, search_type))
+    
+    track_ids = list(dict.fromkeys(tid for tid in track_ids if tid))
+    prefetch_ids = len(track_ids) > 1
+    
+    if len(unique) > 1 or prefetch_ids:
+        get_access_token()  # Refresh once up front, not from every worker
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(unique) + 1)) as executor:
+            if prefetch_ids:
+                executor.submit(lookup_tracks, track_ids)
+            if len(unique) > 1:
+                list(executor.map(
+                    lambda pair: search_spotify(pair[0], pair[1], limit=1, return_raw=True),
+                    unique.values()
+                ))
+                with _search_cache["lock"]:
+                    _search_cache["counted"].update(unique)
+    
+    return {"queries": len(wanted), "unique": len(unique), "track_ids": len(track_ids) if prefetch_ids else 0}
+
+
+# Playback state is shared, so these run strictly in batch order (play -> queue -> skip)
+PLAYBACK_ACTIONS = ("play", "pause", "next", "previous", "now_playing", "add_to_queue", "devices", "play_mood")
+# Actions that change playlists - later actions that read playlists wait for them
+PLAYLIST_MUTATIONS = ("create_playlist", "add_to_playlist", "sync_playlists")
+
+MAX_BATCH_OPERATIONS = 50
+BATCH_MAX_WORKERS = 4  # Each op may fan out its own searches - keep this small
+DEFAULT_BATCH_DEADLINE_SECONDS = 45  # Stay inside the tool-call timeout
+
+
+def _execute_batch(operations: List[Dict[str, Any]], deadline_seconds: Optional[float] = None) -> str:
     """
     Execute multiple Spotify operations in a single tool call!
     MASSIVE API credit saver - combines multiple actions into ONE call.
     
+    Independent operations run concurrently; playback operations keep their
+    order, and anything reading playlists waits for earlier playlist changes.
+    Whatever hasn't finished by the deadline is reported as not completed.
+    
     Args:
         operations: List of operation dictionaries, each containing:
                    - action: The action to perform (any valid spotify_control action EXCEPT execute_batch)
                    - All other parameters for that specific action
+        deadline_seconds: Overall time budget (default DEFAULT_BATCH_DEADLINE_SECONDS)
     
     Returns:
         Combined results from all operations with individual success/error reporting
@@ -758,125 +2906,268 @@ def _execute_batch(operations: List[Dict[str, Any]]) -> str:
     if not operations or not isinstance(operations, list):
         return "❌ operations must be a non-empty list"
     
-    if len(operations) > 10:
-        return "❌ Maximum 10 operations per batch call (to prevent timeouts)"
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return f"❌ Maximum {MAX_BATCH_OPERATIONS} operations per batch call"
     
-    results = []
-    success_count = 0
-    error_count = 0
+    if not deadline_seconds or deadline_seconds <= 0:
+        deadline_seconds = DEFAULT_BATCH_DEADLINE_SECONDS
     
-    for idx, op in enumerate(operations, 1):
-        if not isinstance(op, dict):
-            results.append(f"❌ Operation {idx}: Invalid format (must be a dictionary)")
-            error_count += 1
-            continue
+    deadline = time.time() + deadline_seconds
+    with _memoized_requests(), _batch_deadline(deadline):
+        return _run_batch(operations, deadline)
+
+
+@contextlib.contextmanager
+def _batch_deadline(deadline: float):
+    """Scope in which every Spotify request is bounded by the batch deadline"""
+    _request_deadline["at"] = deadline
+    try:
+        yield
+    finally:
+        _request_deadline["at"] = None
+
+
+def _batch_dependencies(operations: List[Dict[str, Any]]) -> List[List[int]]:
+    """For each operation, the indexes of earlier operations it must wait for"""
+    dependencies = []
+    last_playback = None
+    mutations = []  # (index, playlist_id or None)
+    
+    for idx, op in enumerate(operations):
+        deps = []
+        op_action = op.get("action") if isinstance(op, dict) else None
         
-        operation_action = op.get("action")
-        if not operation_action:
-            results.append(f"❌ Operation {idx}: Missing 'action' parameter")
-            error_count += 1
-            continue
+        if op_action in PLAYBACK_ACTIONS:
+            if last_playback is not None:
+                deps.append(last_playback)
+            last_playback = idx
         
-        if operation_action == "execute_batch":
-            results.append(f"❌ Operation {idx}: Cannot nest execute_batch calls")
-            error_count += 1
-            continue
+        reads_playlists = op_action in ("find_playlist", "my_playlists", "playlists_with_track", "build_mood_index") or (
+            op_action == "play" and op.get("content_type") == "playlist"
+        )
+        if reads_playlists or op_action == "sync_playlists":
+            deps.extend(i for i, _ in mutations)
+        elif op_action == "add_to_playlist":
+            # Adds to the same playlist keep their order
+            deps.extend(i for i, playlist_id in mutations if playlist_id in (None, op.get("spotify_id")))
         
-        # Execute the operation
-        try:
-            # Extract parameters for this operation
-            query = op.get("query")
-            spotify_id = op.get("spotify_id")
-            content_type = op.get("content_type")
-            playlist_name = op.get("playlist_name")
-            playlist_description = op.get("playlist_description")
-            track_ids = op.get("track_ids")
-            songs = op.get("songs")
-            limit = op.get("limit")
-            
-            # Call the appropriate function based on action
-            if operation_action == "search":
-                if not query:
-                    result = "❌ Query required for search"
-                else:
-                    content_type = content_type or "track"
-                    limit = limit or 10
-                    result = search_spotify(query, content_type, limit)
-            
-            elif operation_action == "play":
-                if not spotify_id and not query:
-                    result = "❌ Either spotify_id or query required to play music"
-                else:
-                    content_type = content_type or "track"
-                    result = play_music(spotify_id=spotify_id, content_type=content_type, query=query)
-            
-            elif operation_action == "pause":
-                result = pause_playback()
-            
-            elif operation_action == "next":
-                result = skip_to_next()
-            
-            elif operation_action == "previous":
-                result = skip_to_previous()
-            
-            elif operation_action == "now_playing":
-                result = get_now_playing()
-            
-            elif operation_action == "create_playlist":
-                if not playlist_name:
-                    result = "❌ playlist_name required to create playlist"
-                else:
-                    # If songs provided, create and populate in one go!
-                    if songs:
-                        result = create_and_populate_playlist(
-                            name=playlist_name,
-                            songs=songs,
-                            description=playlist_description or "",
-                            public=False
-                        )
-                    else:
-                        result = create_playlist(playlist_name, playlist_description or "")
-            
-            elif operation_action == "add_to_playlist":
-                if not spotify_id:
-                    result = "❌ spotify_id (playlist ID) required"
-                elif not track_ids and not query:
-                    result = "❌ Either track_ids or query required"
-                else:
-                    # Convert comma-separated track_ids to list if provided
-                    track_list = None
-                    if track_ids:
-                        track_list = [tid.strip() for tid in track_ids.split(",")]
-                    result = add_tracks_to_playlist(playlist_id=spotify_id, track_ids=track_list, query=query)
-            
-            elif operation_action == "my_playlists":
-                limit = limit or 20
-                result = get_my_playlists(limit)
-            
-            elif operation_action == "add_to_queue":
-                if not spotify_id and not query:
-                    result = "❌ Either spotify_id or query required to add to queue"
-                else:
-                    content_type = content_type or "track"
-                    result = add_to_queue(spotify_id=spotify_id, content_type=content_type, query=query)
-            
+        if op_action in PLAYLIST_MUTATIONS:
+            mutations.append((idx, op.get("spotify_id") if op_action == "add_to_playlist" else None))
+        
+        dependencies.append(sorted(set(deps)))
+    
+    return dependencies
+
+
+def _run_operation(op: Dict[str, Any], search_results: Dict[Any, str]) -> str:
+    """Run a single batch operation and return its result message"""
+    operation_action = op.get("action")
+    
+    # Extract parameters for this operation
+    query = op.get("query")
+    spotify_id = op.get("spotify_id")
+    content_type = op.get("content_type")
+    playlist_name = op.get("playlist_name")
+    playlist_description = op.get("playlist_description")
+    track_ids = op.get("track_ids")
+    songs = op.get("songs")
+    limit = op.get("limit")
+    device_id = op.get("device_id")
+    
+    # Call the appropriate function based on action
+    if operation_action == "search":
+        if not query:
+            result = "❌ Query required for search"
+        else:
+            content_type = content_type or "track"
+            limit = limit or 10
+            search_key = (_search_cache_key(query, content_type), limit)
+            if search_key not in search_results:
+                search_results[search_key] = search_spotify(query, content_type, limit)
+            result = search_results[search_key]
+    
+    elif operation_action == "play":
+        if not spotify_id and not query:
+            result = "❌ Either spotify_id or query required to play music"
+        else:
+            content_type = content_type or "track"
+            result = play_music(spotify_id=spotify_id, content_type=content_type, query=query, device_id=device_id)
+    
+    elif operation_action == "pause":
+        result = pause_playback()
+    
+    elif operation_action == "next":
+        result = skip_to_next()
+    
+    elif operation_action == "previous":
+        result = skip_to_previous()
+    
+    elif operation_action == "now_playing":
+        result = get_now_playing()
+    
+    elif operation_action == "create_playlist":
+        if not playlist_name:
+            result = "❌ playlist_name required to create playlist"
+        else:
+            # If songs provided, create and populate in one go!
+            if songs:
+                result = create_and_populate_playlist(
+                    name=playlist_name,
+                    songs=songs,
+                    description=playlist_description or "",
+                    public=False
+                )
             else:
-                result = f"❌ Unknown action: {operation_action}"
-            
-            # Check if operation succeeded or failed
-            if result.startswith("❌"):
-                error_count += 1
+                result = create_playlist(playlist_name, playlist_description or "")
+    
+    elif operation_action == "add_to_playlist":
+        if not spotify_id:
+            result = "❌ spotify_id (playlist ID) required"
+        elif not track_ids and not query:
+            result = "❌ Either track_ids or query required"
+        else:
+            # Convert comma-separated track_ids to list if provided
+            track_list = None
+            if track_ids:
+                track_list = [tid.strip() for tid in track_ids.split(",")]
+            result = add_tracks_to_playlist(playlist_id=spotify_id, track_ids=track_list, query=query)
+    
+    elif operation_action == "my_playlists":
+        limit = limit or 20
+        result = get_my_playlists(limit)
+    
+    elif operation_action == "add_to_queue":
+        if not spotify_id and not query:
+            result = "❌ Either spotify_id or query required to add to queue"
+        else:
+            content_type = content_type or "track"
+            result = add_to_queue(spotify_id=spotify_id, content_type=content_type, query=query, device_id=device_id)
+    
+    elif operation_action == "sync_playlists":
+        result = sync_playlists(op.get("include_tracks"))
+    
+    elif operation_action == "find_playlist":
+        if not (query or playlist_name):
+            result = "❌ query (playlist name) required for find_playlist"
+        else:
+            result = find_playlist(query or playlist_name)
+    
+    elif operation_action == "playlists_with_track":
+        if not spotify_id and not query:
+            result = "❌ Either spotify_id (track ID) or query required"
+        else:
+            result = playlists_with_track(track_id=spotify_id, query=query)
+    
+    elif operation_action == "devices":
+        result = list_devices()
+    
+    elif operation_action == "cache_stats":
+        result = get_search_cache_stats()
+    
+    elif operation_action == "sync_history":
+        result = sync_history()
+    
+    elif operation_action == "export_library":
+        result = export_library()
+    
+    elif operation_action == "build_mood_index":
+        result = build_mood_index()
+    
+    elif operation_action == "play_mood":
+        result = play_mood(op.get("temperature"), limit or 10, device_id)
+    
+    elif operation_action == "listening_stats":
+        result = listening_stats(op.get("period") or "week", limit or 10)
+    
+    else:
+        result = f"❌ Unknown action: {operation_action}"
+    
+    return result
+
+
+def _run_batch(operations: List[Dict[str, Any]], deadline: float) -> str:
+    """Plan (pre-resolve searches), then run the operations on a dependency-aware pool"""
+    plan = _plan_batch_searches(operations)
+    search_results = {}  # Identical 'search' operations run once
+    dependencies = _batch_dependencies(operations)
+    
+    outcomes = [None] * len(operations)  # (status, message) with status ok/error/skipped
+    futures = {}
+    
+    def run(idx: int, op: Dict[str, Any]) -> None:
+        operation_action = op.get("action")
+        for dep in dependencies[idx]:
+            dep_future = futures.get(dep)
+            if dep_future is not None:
+                dep_future.result()  # Never raises - run() records its own errors
+        if time.time() >= deadline:
+            outcomes[idx] = ("skipped", f"⏱️ Operation {idx + 1} ({operation_action}): Not started - deadline reached")
+            return
+        try:
+            result = _run_operation(op, search_results)
+        except Exception as e:
+            outcomes[idx] = ("error", f"❌ Operation {idx + 1} ({operation_action}): Error - {str(e)}")
+            return
+        if "Batch deadline reached" in result:
+            # Ran partly - requests after the deadline were not sent (or timed out)
+            outcomes[idx] = ("stopped", f"⏱️ Operation {idx + 1} ({operation_action}): Stopped at deadline - partial result:\n{result}")
+            return
+        status = "error" if result.startswith("❌") else "ok"
+        outcomes[idx] = (status, f"🎵 Operation {idx + 1} ({operation_action}):\n{result}")
+    
+    executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS)
+    try:
+        for idx, op in enumerate(operations):
+            if not isinstance(op, dict):
+                outcomes[idx] = ("error", f"❌ Operation {idx + 1}: Invalid format (must be a dictionary)")
+            elif not op.get("action"):
+                outcomes[idx] = ("error", f"❌ Operation {idx + 1}: Missing 'action' parameter")
+            elif op.get("action") == "execute_batch":
+                outcomes[idx] = ("error", f"❌ Operation {idx + 1}: Cannot nest execute_batch calls")
             else:
-                success_count += 1
-            
-            results.append(f"🎵 Operation {idx} ({operation_action}):\n{result}")
+                # Submitted in order, so every dependency is already running or done
+                futures[idx] = executor.submit(run, idx, op)
         
-        except Exception as e:
-            results.append(f"❌ Operation {idx} ({operation_action}): Error - {str(e)}")
-            error_count += 1
+        for idx, future in futures.items():
+            try:
+                future.result(timeout=max(0.0, deadline - time.time()))
+            except Exception:
+                pass  # Timed out - reported below
+    finally:
+        # Queued ops are cancelled; running ones wind down quickly since their requests are
+        # bounded by the deadline - wait for them so nothing changes after we report
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    results = []
+    unfinished = []
+    stopped = []
+    counts = {"ok": 0, "error": 0, "skipped": 0, "stopped": 0}
+    for idx, op in enumerate(operations):
+        outcome = outcomes[idx]
+        if outcome is None:
+            # Cancelled before it started
+            operation_action = op.get("action") if isinstance(op, dict) else None
+            outcome = ("skipped", f"⏱️ Operation {idx + 1} ({operation_action}): Not started - deadline reached")
+        if outcome[0] == "skipped":
+            unfinished.append(str(idx + 1))
+        elif outcome[0] == "stopped":
+            stopped.append(str(idx + 1))
+        counts[outcome[0]] += 1
+        results.append(outcome[1])
     
     # Build summary
-    summary = f"📊 Batch Results: {success_count} succeeded, {error_count} failed\n"
+    summary = f"📊 Batch Results: {counts['ok']} succeeded, {counts['error']} failed"
+    if counts["stopped"]:
+        summary += f", {counts['stopped']} stopped at deadline"
+    summary += f", {counts['skipped']} not completed\n" if counts["skipped"] else "\n"
+    if plan["queries"]:
+        summary += f"🧠 Resolved {plan['unique']} unique song lookup(s) up front ({plan['queries']} requested)\n"
+    if plan["track_ids"]:
+        summary += f"🧠 Looked up {plan['track_ids']} track ID(s) in bulk\n"
+    if unfinished:
+        summary += f"⏱️ Deadline reached - operations not completed: {', '.join(unfinished)} (re-send just these)\n"
+    if stopped:
+        summary += f"⏱️ Partly done when the deadline hit: {', '.join(stopped)} (check their results before re-sending)\n"
     summary += "=" * 60 + "\n\n"
     summary += "\n\n".join(results)
     
@@ -897,6 +3188,11 @@ def spotify_control(
     track_ids: Optional[str] = None,
     songs: Optional[str] = None,
     limit: Optional[int] = None,
+    include_tracks: Optional[bool] = None,
+    device_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    period: Optional[str] = None,
+    temperature: Optional[str] = None,
     operations: Optional[List[Dict[str, Any]]] = None
 ) -> str:
     """
@@ -904,7 +3200,9 @@ def spotify_control(
     
     Args:
         action: Action to perform (search, play, pause, next, previous, now_playing, 
-                create_playlist, add_to_playlist, add_to_queue, my_playlists, execute_batch)
+                create_playlist, add_to_playlist, add_to_queue, my_playlists, sync_playlists,
+                find_playlist, playlists_with_track, devices, cache_stats, sync_history,
+                listening_stats, export_library, build_mood_index, play_mood, execute_batch)
         query: Search query - can be used with 'search', 'play', 'add_to_playlist', 'add_to_queue'
                For multiple tracks, separate queries with semicolons: "track1; track2; track3"
         spotify_id: Spotify ID of content to play or playlist to modify
@@ -916,6 +3214,13 @@ def spotify_control(
                You can add AS MANY songs as you want - no limit!
                Example: "bohemian rhapsody; stairway to heaven; hotel california; ..."
         limit: Limit for search/list results
+        include_tracks: For 'sync_playlists' - also index which tracks each playlist contains
+        device_id: Device ID or name for 'play' / 'add_to_queue' (default: active device,
+                   else SPOTIFY_PREFERRED_DEVICE, else the last used device)
+        deadline_seconds: Time budget for 'execute_batch' (default 45s); unfinished
+                          operations are reported instead of timing out the call
+        period: For 'listening_stats' - day (today), week (default) or month
+        temperature: For 'play_mood' - emotional temperature (warm, scorching, tender, feral, ...)
         operations: List of operation dicts (ONLY for 'execute_batch' action)
                    Each operation is a dict with 'action' and its required parameters
                    Example: [{"action": "create_playlist", "playlist_name": "Mix", "songs": "..."},
@@ -936,7 +3241,7 @@ def spotify_control(
             if not spotify_id and not query:
                 return "❌ Either spotify_id or query required to play music"
             content_type = content_type or "track"
-            return play_music(spotify_id=spotify_id, content_type=content_type, query=query)
+            return play_music(spotify_id=spotify_id, content_type=content_type, query=query, device_id=device_id)
         
         elif action == "pause":
             return pause_playback()
@@ -987,18 +3292,55 @@ def spotify_control(
             if not spotify_id and not query:
                 return "❌ Either spotify_id or query required to add to queue"
             content_type = content_type or "track"
-            return add_to_queue(spotify_id=spotify_id, content_type=content_type, query=query)
+            return add_to_queue(spotify_id=spotify_id, content_type=content_type, query=query, device_id=device_id)
+        
+        elif action == "sync_playlists":
+            return sync_playlists(include_tracks)
+        
+        elif action == "find_playlist":
+            if not (query or playlist_name):
+                return "❌ query (playlist name) required for find_playlist"
+            return find_playlist(query or playlist_name)
+        
+        elif action == "playlists_with_track":
+            if not spotify_id and not query:
+                return "❌ Either spotify_id (track ID) or query required"
+            return playlists_with_track(track_id=spotify_id, query=query)
+        
+        elif action == "devices":
+            return list_devices()
+        
+        elif action == "cache_stats":
+            return get_search_cache_stats()
+        
+        elif action == "sync_history":
+            return sync_history()
+        
+        elif action == "export_library":
+            return export_library()
+        
+        elif action == "build_mood_index":
+            return build_mood_index()
+        
+        elif action == "play_mood":
+            return play_mood(temperature, limit or 10, device_id)
+        
+        elif action == "listening_stats":
+            return listening_stats(period or "week", limit or 10)
         
         elif action == "execute_batch":
             if not operations:
                 return "❌ operations list required for execute_batch action"
-            return _execute_batch(operations)
+            return _execute_batch(operations, deadline_seconds)
         
         else:
-            return f"❌ Unknown action: {action}. Valid actions: search, play, pause, next, previous, now_playing, create_playlist, add_to_playlist, add_to_queue, my_playlists, execute_batch"
+            return f"❌ Unknown action: {action}. Valid actions: search, play, pause, next, previous, now_playing, create_playlist, add_to_playlist, add_to_queue, my_playlists, sync_playlists, find_playlist, playlists_with_track, devices, cache_stats, sync_history, listening_stats, export_library, build_mood_index, play_mood, execute_batch"
     
     except Exception as e:
         return f"❌ Error: {str(e)}"
+    
+    finally:
+        _flush_search_cache()
 
 
 # =============================================================================